@@ -0,0 +1,68 @@
+# benchmarks/auth_overhead.py
+# Per-request cost of authenticating an admin request: JWT decode alone, a hot
+# token from the verified-token cache, and the full get_current_company_context
+# dependency chain for claims-bearing and legacy tokens (caches warm).
+#
+#   python -m benchmarks.auth_overhead --iterations 50000
+
+import argparse
+import time
+
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, User, Role, Company, CompanyUser
+from dependencies.auth import (
+    create_access_token, create_user_access_token, decode_token, verify_token,
+    get_current_principal, get_current_company_context
+)
+
+
+def seed(db) -> User:
+    role = Role(name="HR_HEAD")
+    company = Company(code="BENCH", name="Benchmark Co", credits=0)
+    db.add_all([role, company])
+    db.flush()
+    user = User(email="admin@example.com", role=role.id, token_version=0)
+    db.add(user)
+    db.flush()
+    db.add(CompanyUser(company_id=company.id, user_id=user.id))
+    db.commit()
+    return user
+
+
+def timeit(label: str, fn, iterations: int) -> None:
+    fn()  # warm caches
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>28}: {elapsed / iterations * 1e6:8.1f} µs/call  ({iterations / elapsed:,.0f}/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = seed(db)
+
+    token = create_user_access_token(db, user)
+    legacy_token = create_access_token(data={"sub": str(user.id), "email": user.email})
+
+    def dependency_chain(raw_token: str):
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=raw_token)
+        return get_current_company_context(get_current_principal(credentials, db))
+
+    timeit("jwt decode (uncached)", lambda: decode_token(token), args.iterations)
+    timeit("verify_token (hot)", lambda: verify_token(token), args.iterations)
+    timeit("company context (claims)", lambda: dependency_chain(token), args.iterations)
+    timeit("company context (legacy)", lambda: dependency_chain(legacy_token), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
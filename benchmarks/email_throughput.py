@@ -0,0 +1,228 @@
+# benchmarks/email_throughput.py
+# Messages/second through the real outbox path: candidate invites and reference
+# emails are queued with EmailService, then delivered by EmailDispatcher over the
+# pooled SMTP transport to a local sink server.
+#
+#   python -m benchmarks.email_throughput --candidates 2000 --references 1000 --concurrency 4
+#   python -m benchmarks.email_throughput --sink-delay-ms 50   # simulate a remote server
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import threading
+import time
+from email import message_from_bytes
+from typing import Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from config import settings
+from models import Base, Company, Candidate, CandidateReferenceCheck, EmailOutbox
+from models.database import SessionLocal
+from models.email_outbox import EmailOutboxStatus
+
+
+class SMTPSink:
+    """Minimal SMTP server that accepts and discards mail, on its own thread and loop"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.connections = 0
+        self.messages = 0
+        # To address -> time the message was accepted
+        self.received: Dict[str, float] = {}
+        self.port = None
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "SMTPSink":
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, "127.0.0.1", 0)
+        )
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+        server.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        writer.write(b"220 sink ESMTP\r\n")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line[:4].upper()
+                if command == b"EHLO":
+                    writer.write(b"250-sink\r\n250 8BITMIME\r\n")
+                elif command == b"DATA":
+                    writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                    await writer.drain()
+                    data = await reader.readuntil(b"\r\n.\r\n")
+                    if self.delay:
+                        await asyncio.sleep(self.delay)
+                    to = message_from_bytes(data).get("To", "")
+                    self.received[to] = time.perf_counter()
+                    self.messages += 1
+                    writer.write(b"250 OK\r\n")
+                elif command == b"QUIT":
+                    writer.write(b"221 Bye\r\n")
+                    await writer.drain()
+                    break
+                else:
+                    # HELO, MAIL, RCPT, RSET, NOOP
+                    writer.write(b"250 OK\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def seed(db, candidates: int, references: int):
+    company = Company(code="BENCH", name="Benchmark Co", credits=candidates)
+    db.add(company)
+    db.flush()
+    db.bulk_insert_mappings(Candidate, [
+        {
+            "candidate_code": f"BENCH-{i:08d}",
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "email": f"candidate{i}@example.com",
+            "company_id": company.id,
+            "is_shadowed": False,
+        }
+        for i in range(candidates)
+    ])
+    db.flush()
+    rows = db.query(Candidate).filter(Candidate.company_id == company.id).order_by(Candidate.id).all()
+    db.bulk_insert_mappings(CandidateReferenceCheck, [
+        {
+            "candidate_id": rows[i % len(rows)].id,
+            "company_id": company.id,
+            "reference_name": f"Referee {i}",
+            "reference_email": f"referee{i}@example.org",
+        }
+        for i in range(references)
+    ])
+    db.commit()
+    refs = db.query(CandidateReferenceCheck).order_by(CandidateReferenceCheck.id).all()
+    return company, rows, refs
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def deliver(batch_size: int, send_latencies: List[float]) -> None:
+    # Imported after settings are pointed at the sink
+    from services.email_dispatcher import EmailDispatcher
+    from services.email_service import get_smtp_pool
+
+    pool = get_smtp_pool()
+    send = pool.send
+
+    async def timed_send(msg):
+        start = time.perf_counter()
+        await send(msg)
+        send_latencies.append(time.perf_counter() - start)
+
+    pool.send = timed_send
+    dispatcher = EmailDispatcher(batch_size=batch_size)
+    while True:
+        if await dispatcher.dispatch_once():
+            continue
+        # Nothing claimed: either drained or everything due is rate limited
+        db = SessionLocal()
+        try:
+            pending = db.query(EmailOutbox).filter(EmailOutbox.status == EmailOutboxStatus.PENDING).count()
+        finally:
+            db.close()
+        if not pending:
+            return
+        await asyncio.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--candidates", type=int, default=2000)
+    parser.add_argument("--references", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4, help="SMTP pool size (worker threads / connections)")
+    parser.add_argument("--batch", type=int, default=50, help="Dispatcher claim batch size")
+    parser.add_argument("--sink-delay-ms", type=float, default=0, help="Delay the sink adds to each DATA reply")
+    parser.add_argument("--sender-per-minute", type=float, default=0, help="Sender rate limit (0 = unlimited)")
+    parser.add_argument("--domain-per-minute", type=float, default=0, help="Per-domain rate limit (0 = unlimited)")
+    args = parser.parse_args()
+
+    sink = SMTPSink(delay=args.sink_delay_ms / 1000).start()
+    settings.SMTP_SERVER = "127.0.0.1"
+    settings.SMTP_PORT = sink.port
+    settings.SMTP_USERNAME = ""
+    settings.SMTP_USE_TLS = False
+    settings.SMTP_POOL_SIZE = args.concurrency
+    # Throttling is off unless asked for, so the transport itself is measured
+    settings.EMAIL_SENDER_RATE_PER_MINUTE = args.sender_per_minute
+    settings.EMAIL_DOMAIN_RATE_PER_MINUTE = args.domain_per_minute
+    settings.EMAIL_SENDER_DAILY_QUOTA = 0
+    settings.EMAIL_DOMAIN_DAILY_QUOTA = 0
+
+    # The dispatcher opens its own sessions, so share a file database with it
+    db_path = os.path.join(tempfile.mkdtemp(), "email_bench.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal.configure(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    from services.email_service import EmailService, shutdown_smtp_pool
+
+    company, candidates, references = seed(db, args.candidates, args.references)
+    candidates_by_id = {candidate.id: candidate for candidate in candidates}
+
+    email_service = EmailService()
+    start = time.perf_counter()
+    email_service.queue_candidate_emails(db, candidates, company_name=company.name)
+    for reference in references:
+        email_service.queue_reference_email(db, candidates_by_id[reference.candidate_id], reference)
+    db.commit()
+    queued_at = time.perf_counter()
+    total = args.candidates + args.references
+    print(f" queue: {total} emails rendered and committed in {queued_at - start:.2f}s "
+          f"-> {total / (queued_at - start):,.0f} msgs/s")
+
+    send_latencies: List[float] = []
+    asyncio.run(deliver(args.batch, send_latencies))
+    elapsed = time.perf_counter() - queued_at
+    shutdown_smtp_pool()
+    sink.stop()
+
+    sent = db.query(EmailOutbox).filter(EmailOutbox.status == EmailOutboxStatus.SENT).count()
+    end_to_end = [at - queued_at for at in sink.received.values()]
+    print(f"  send: {sent}/{total} delivered in {elapsed:.2f}s -> {sent / elapsed:,.0f} msgs/s "
+          f"({sent / elapsed * 60:,.0f}/min)")
+    print(f" smtp connections opened: {sink.connections} (pool size {args.concurrency})")
+    print(f" per-send latency ms: p50 {percentile(send_latencies, 50) * 1000:.1f}  "
+          f"p95 {percentile(send_latencies, 95) * 1000:.1f}  p99 {percentile(send_latencies, 99) * 1000:.1f}  "
+          f"mean {statistics.fmean(send_latencies) * 1000 if send_latencies else 0:.1f}")
+    print(f" queued->accepted ms: p50 {percentile(end_to_end, 50) * 1000:.0f}  "
+          f"p95 {percentile(end_to_end, 95) * 1000:.0f}  p99 {percentile(end_to_end, 99) * 1000:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/login_throughput.py
+# Logins/second of the password check in /accounts/login, and how long it stalls
+# the event loop, with bcrypt run inline (before) and on the bounded pool (after).
+# A probe coroutine ticks every 5ms; its lag is what every other request sees.
+#
+#   python -m benchmarks.login_throughput --logins 200 --concurrency 50 --workers 4
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+from config import settings
+from dependencies.auth import (
+    get_password_hash, verify_password, verify_password_async,
+    get_password_hash_pool, shutdown_password_hash_pool
+)
+
+PROBE_INTERVAL = 0.005
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def probe(lags: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def login_inline(password: str, hashed: str) -> bool:
+    return verify_password(password, hashed)
+
+
+async def login_pooled(password: str, hashed: str) -> bool:
+    return await verify_password_async(password, hashed)
+
+
+async def run(login, logins: int, concurrency: int, hashed: str):
+    lags: List[float] = []
+    latencies: List[float] = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            assert await login("correct horse battery staple", hashed)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    return elapsed, latencies, lags
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent login requests")
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS, help="bcrypt pool threads")
+    args = parser.parse_args()
+
+    settings.PASSWORD_HASH_WORKERS = args.workers
+    settings.PASSWORD_HASH_MAX_PENDING = max(args.concurrency, settings.PASSWORD_HASH_MAX_PENDING)
+    hashed = get_password_hash("correct horse battery staple")
+
+    for label, login in (("inline", login_inline), ("pooled", login_pooled)):
+        elapsed, latencies, lags = asyncio.run(run(login, args.logins, args.concurrency, hashed))
+        print(f"{label:>6}: {args.logins / elapsed:,.1f} logins/s  "
+              f"latency p50 {percentile(latencies, 50) * 1000:.0f}ms p99 {percentile(latencies, 99) * 1000:.0f}ms  "
+              f"loop lag p99 {percentile(lags, 99) * 1000:.1f}ms max {max(lags, default=0) * 1000:.1f}ms")
+
+    metrics = get_password_hash_pool().metrics()
+    print(f" pool: {metrics['workers']} workers, queue wait p50 {metrics['queue_wait_ms']['p50']}ms "
+          f"p95 {metrics['queue_wait_ms']['p95']}ms, bcrypt run p50 {metrics['run_ms']['p50']}ms")
+    shutdown_password_hash_pool()
+
+
+if __name__ == "__main__":
+    main()
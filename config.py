@@ -10,6 +10,23 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-here"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Cached user/role/company per token subject; changes are also invalidated explicitly
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    # Tokens carry company/role claims; their version is re-checked against the DB this often
+    TOKEN_VERSION_CACHE_TTL_SECONDS: int = 30
+    # Recently verified access tokens skip JWT decoding (entries also end at the token's exp)
+    VERIFIED_TOKEN_CACHE_SIZE: int = 10000
+    VERIFIED_TOKEN_CACHE_TTL_SECONDS: int = 300
+    # One-time passcodes: "memory" for a single worker, "redis" (REDIS_URL) when shared
+    OTP_STORE_BACKEND: str = "memory"
+    OTP_TTL_SECONDS: int = 300
+    OTP_MAX_ATTEMPTS: int = 5
+    # Codes issued per email per OTP_TTL_SECONDS window; re-issues keep the attempt budget
+    OTP_MAX_ISSUES: int = 5
+    # bcrypt runs on this many threads; more waiting calls than the cap get a 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
     
     # Email settings
     SMTP_SERVER: str = "smtp.gmail.com"
@@ -17,6 +34,37 @@ class Settings(BaseSettings):
     SMTP_USERNAME: str = "support@theinfiniti.ai"
     SMTP_PASSWORD: str = "dbfx zzic ctar hjyn"
     FROM_EMAIL: str = "support@theinfiniti.ai"
+    SMTP_USE_TLS: bool = True
+    # Connections kept open and reused; sends run on this many worker threads
+    SMTP_POOL_SIZE: int = 4
+    SMTP_IDLE_TIMEOUT: int = 60
+    SMTP_TIMEOUT: int = 30
+    
+    # Compiled once and cached; see utils/email_templates.py
+    EMAIL_TEMPLATE_DIR: str = "templates/email"
+    
+    # Email outbox dispatcher
+    EMAIL_DISPATCH_INTERVAL: float = 2.0
+    EMAIL_BATCH_SIZE: int = 50
+    EMAIL_MAX_ATTEMPTS: int = 6
+    # Retry delay doubles per attempt from the base, capped at the max
+    EMAIL_RETRY_BASE_SECONDS: int = 30
+    EMAIL_RETRY_MAX_SECONDS: int = 3600
+    # A SENDING row locked for this long is assumed abandoned and retried
+    EMAIL_SENDING_TIMEOUT_SECONDS: int = 300
+    # Sender and recipient-domain throttling (0 disables); messages over a limit
+    # are rescheduled rather than failed. Defaults stay under Gmail's sending limits.
+    EMAIL_SENDER_RATE_PER_MINUTE: float = 60
+    EMAIL_SENDER_BURST: int = 20
+    EMAIL_SENDER_DAILY_QUOTA: int = 2000
+    EMAIL_DOMAIN_RATE_PER_MINUTE: float = 30
+    EMAIL_DOMAIN_BURST: int = 10
+    EMAIL_DOMAIN_DAILY_QUOTA: int = 0
+    # Rate limits are kept per dispatcher, so exactly one may run. Among the
+    # workers of a host the first to take the lock file runs it (the others take
+    # over if it exits); on a multi-host deployment disable it on all hosts but one.
+    EMAIL_DISPATCHER_ENABLED: bool = True
+    EMAIL_DISPATCHER_LOCK_FILE: str = "/tmp/hrms-email-dispatcher.lock"
     
     # Frontend settings
     FRONTEND_URL: str = "http://localhost:3001"
@@ -52,6 +100,18 @@ class Settings(BaseSettings):
     AWS_REGION: str = "us-east-1"
     AWS_S3_BUCKET: str = "hrms-uploads"
     
+    # Report PDF rendering
+    REPORT_PDF_DIR: str = "generated_reports"
+    PDF_RENDER_WORKERS: int = 2
+    
+    # Candidate bulk import
+    IMPORT_CHUNK_SIZE: int = 1000
+    IMPORT_UPLOAD_DIR: str = "uploads/imports"
+    # A RUNNING job without a heartbeat for this long is treated as interrupted
+    IMPORT_JOB_STALE_SECONDS: int = 120
+    # Queue invite emails for imported candidates with each chunk
+    IMPORT_SEND_INVITES: bool = False
+    
     # Redis settings (for caching and sessions)
     REDIS_URL: str = "redis://localhost:6379"
     
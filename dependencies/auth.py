@@ -2,16 +2,23 @@
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
+from dataclasses import dataclass
 from typing import Optional
+import hashlib
 import secrets
+import time
 
 from models.database import get_db
-from models.user import User, CompanyUser
+from models.user import User, CompanyUser, Role
 from config import settings
+from utils.cache import TTLCache
+from utils.password_hashing import PasswordHashPool, PasswordHashOverloaded
+from utils.otp_store import OtpStore, InMemoryOtpStore, RedisOtpStore
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -19,12 +26,107 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # JWT token security
 security = HTTPBearer()
 
+ADMIN_ROLES = ("HR_HEAD", "HR", "SUPERADMIN")
+
+@dataclass(frozen=True)
+class Principal:
+    """What authorization needs to know about the token's user"""
+    user_id: int
+    email: str
+    role: Optional[str]
+    company_id: Optional[int]
+
+# Keyed by token subject (user id); invalidate_principal on role, company or delete changes
+_principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+# user id -> token version; bounds how long a revoked token keeps working on other workers
+_token_version_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.TOKEN_VERSION_CACHE_TTL_SECONDS
+)
+
+USER_TOKEN_TYPE = "user"
+
+# sha256(token) -> claims of tokens whose signature was already checked; entries
+# never outlive the token's exp
+_verified_token_cache = TTLCache(
+    maxsize=settings.VERIFIED_TOKEN_CACHE_SIZE,
+    ttl=settings.VERIFIED_TOKEN_CACHE_TTL_SECONDS
+)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+_password_hash_pool: Optional[PasswordHashPool] = None
+
+def get_password_hash_pool() -> PasswordHashPool:
+    """Shared bcrypt worker pool, created on first use"""
+    global _password_hash_pool
+    if _password_hash_pool is None:
+        _password_hash_pool = PasswordHashPool(
+            workers=settings.PASSWORD_HASH_WORKERS,
+            max_pending=settings.PASSWORD_HASH_MAX_PENDING
+        )
+    return _password_hash_pool
+
+def shutdown_password_hash_pool() -> None:
+    global _password_hash_pool
+    if _password_hash_pool is not None:
+        _password_hash_pool.close()
+        _password_hash_pool = None
+
+async def _run_password_hash(fn, *args):
+    try:
+        return await get_password_hash_pool().run(fn, *args)
+    except PasswordHashOverloaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again",
+            headers={"Retry-After": "1"},
+        )
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the bcrypt pool, keeping the event loop free"""
+    return await _run_password_hash(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the bcrypt pool, keeping the event loop free"""
+    return await _run_password_hash(get_password_hash, password)
+
+_otp_store: Optional[OtpStore] = None
+
+def get_otp_store() -> OtpStore:
+    """OTP store for the configured backend: "memory" (single node) or "redis" (shared)"""
+    global _otp_store
+    if _otp_store is None:
+        if settings.OTP_STORE_BACKEND == "redis":
+            _otp_store = RedisOtpStore(
+                settings.REDIS_URL,
+                settings.SECRET_KEY,
+                ttl=settings.OTP_TTL_SECONDS,
+                max_attempts=settings.OTP_MAX_ATTEMPTS,
+                max_issues=settings.OTP_MAX_ISSUES
+            )
+        else:
+            _otp_store = InMemoryOtpStore(
+                settings.SECRET_KEY,
+                ttl=settings.OTP_TTL_SECONDS,
+                max_attempts=settings.OTP_MAX_ATTEMPTS,
+                max_issues=settings.OTP_MAX_ISSUES
+            )
+    return _otp_store
+
+async def close_otp_store() -> None:
+    global _otp_store
+    if _otp_store is not None:
+        await _otp_store.close()
+        _otp_store = None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -35,7 +137,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> dict:
+def decode_token(token: str) -> dict:
+    """Full signature check and parse, bypassing the verified-token cache"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
@@ -46,6 +149,23 @@ def verify_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+def verify_token(token: str) -> dict:
+    """Claims of a valid token; tokens seen recently skip decoding until they expire"""
+    # Keyed by digest so raw tokens aren't kept in memory
+    key = hashlib.sha256(token.encode()).digest()
+    claims = _verified_token_cache.get(key)
+    if claims is not None:
+        return dict(claims)
+
+    payload = decode_token(token)
+    ttl = settings.VERIFIED_TOKEN_CACHE_TTL_SECONDS
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+    if ttl > 0:
+        _verified_token_cache.set(key, payload, ttl=ttl)
+    return dict(payload)
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -69,8 +189,135 @@ def get_current_user(
         )
     return user
 
+def load_principal(user_id, db: Session) -> Optional[Principal]:
+    """User, role name and company in one query"""
+    row = db.query(
+        User.id, User.email, Role.name, CompanyUser.company_id
+    ).outerjoin(
+        Role, Role.id == User.role
+    ).outerjoin(
+        CompanyUser, CompanyUser.user_id == User.id
+    ).filter(
+        User.id == user_id,
+        User.is_shadowed == False
+    ).first()
+    if row is None:
+        return None
+    return Principal(user_id=row[0], email=row[1], role=row[2], company_id=row[3])
+
+def invalidate_principal(user_id) -> None:
+    """Drop a cached principal after its role, company or account changed"""
+    _principal_cache.pop(str(user_id))
+    _token_version_cache.pop(str(user_id))
+
+def revoke_user_tokens(db: Session, user_id) -> None:
+    """Bump the user's token version so tokens with stale claims stop working (caller commits)"""
+    db.query(User).filter(User.id == user_id).update(
+        {User.token_version: User.token_version + 1}, synchronize_session=False
+    )
+    # Clearing now would let a concurrent request re-cache the old version before
+    # the commit lands, so drop the cached entries once the new version is visible
+    event.listen(db, "after_commit", lambda session: invalidate_principal(user_id), once=True)
+
+def create_user_access_token(db: Session, user: User) -> str:
+    """Access token carrying the claims authorization needs: company, role and token version"""
+    principal = load_principal(user.id, db)
+    return create_access_token(data={
+        "sub": str(user.id),
+        "email": user.email,
+        "type": USER_TOKEN_TYPE,
+        "company_id": principal.company_id if principal else None,
+        "role": principal.role if principal else None,
+        "ver": user.token_version or 0,
+    })
+
+def current_token_version(user_id, db: Session) -> Optional[int]:
+    """The user's token version, or None if the user is gone; cached briefly"""
+    key = str(user_id)
+    version = _token_version_cache.get(key)
+    if version is None:
+        row = db.query(User.token_version).filter(
+            User.id == user_id,
+            User.is_shadowed == False
+        ).first()
+        if row is None:
+            return None
+        version = row[0] or 0
+        _token_version_cache.set(key, version)
+    return version
+
+def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    payload = verify_token(credentials.credentials)
+    subject = payload.get("sub")
+    if subject is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    if payload.get("type") == USER_TOKEN_TYPE and "ver" in payload:
+        # Signed claims; the only lookup is the (cached) version check
+        if current_token_version(subject, db) != payload["ver"]:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return Principal(
+            user_id=int(subject),
+            email=payload.get("email"),
+            role=payload.get("role"),
+            company_id=payload.get("company_id"),
+        )
+    if payload.get("type") is not None:
+        # Candidate/reference tokens never authenticate a user
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    # Tokens issued before claims were added
+    key = str(subject)
+    principal = _principal_cache.get(key)
+    if principal is None:
+        principal = load_principal(subject, db)
+        if principal is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        _principal_cache.set(key, principal)
+    if payload.get("email") and payload["email"] != principal.email:
+        # A candidate token whose id happens to match a user
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return principal
+
+def get_current_company_context(principal: Principal = Depends(get_current_principal)) -> Principal:
+    """Admin principal with its company, without per-request user/role/company queries"""
+    if principal.role not in ADMIN_ROLES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    if principal.company_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User not associated with any company"
+        )
+    return principal
+
 def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
-    if not current_user.role_rel or current_user.role_rel.name not in ["HR_HEAD", "HR", "SUPERADMIN"]:
+    if not current_user.role_rel or current_user.role_rel.name not in ADMIN_ROLES:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
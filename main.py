@@ -9,6 +9,11 @@ import os
 from routers import auth, candidate, company, admin, common
 from models.database import engine, Base
 from config import settings
+from services.pdf_report_service import shutdown_pdf_pool
+from services.import_service import resume_import_jobs
+from services.email_service import shutdown_smtp_pool, load_email_templates
+from services.email_dispatcher import start_email_dispatcher, stop_email_dispatcher
+from dependencies.auth import shutdown_password_hash_pool, close_otp_store
 
 # Create uploads directory if it doesn't exist
 if not os.path.exists("uploads"):
@@ -20,9 +25,19 @@ async def lifespan(app: FastAPI):
     print("Starting HRMS FastAPI application...")
     # Create tables if they don't exist
     Base.metadata.create_all(bind=engine)
+    # Pick up candidate imports interrupted by the last shutdown
+    await resume_import_jobs()
+    load_email_templates()
+    # Deliver queued emails, including any left over from the last run
+    start_email_dispatcher()
     yield
     # Shutdown
     print("Shutting down HRMS FastAPI application...")
+    await stop_email_dispatcher()
+    shutdown_pdf_pool()
+    shutdown_smtp_pool()
+    shutdown_password_hash_pool()
+    await close_otp_store()
 
 app = FastAPI(
     title="HRMS API",
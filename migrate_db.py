@@ -120,6 +120,119 @@ def migrate_database():
             else:
                 print(f"✓ {column_name} column already exists")
         
+        # Token version for revoking access tokens with stale claims
+        result = connection.execute(text("""
+            SELECT COUNT(*) as count 
+            FROM information_schema.columns 
+            WHERE table_schema = 'hrms_db' 
+            AND table_name = 'user' 
+            AND column_name = 'token_version'
+        """))
+
+        if result.fetchone()[0] == 0:
+            print("Adding token_version column to user table...")
+            connection.execute(text("ALTER TABLE `user` ADD COLUMN token_version INT NOT NULL DEFAULT 0"))
+            connection.commit()
+            print("✓ token_version column added successfully")
+        else:
+            print("✓ token_version column already exists")
+        
+        # Normalized phone for duplicate detection, backfilled from phone
+        result = connection.execute(text("""
+            SELECT COUNT(*) as count 
+            FROM information_schema.columns 
+            WHERE table_schema = 'hrms_db' 
+            AND table_name = 'candidate' 
+            AND column_name = 'phone_normalized'
+        """))
+
+        if result.fetchone()[0] == 0:
+            print("Adding phone_normalized column to candidate table...")
+            connection.execute(text("ALTER TABLE candidate ADD COLUMN phone_normalized VARCHAR(20) NULL"))
+            connection.commit()
+            print("✓ phone_normalized column added successfully")
+        else:
+            print("✓ phone_normalized column already exists")
+
+        from utils.candidate_utils import normalize_phone
+
+        backfilled = 0
+        last_id = 0
+        while True:
+            rows = connection.execute(text("""
+                SELECT id, phone FROM candidate
+                WHERE id > :last_id AND phone_normalized IS NULL AND phone IS NOT NULL
+                ORDER BY id LIMIT 1000
+            """), {"last_id": last_id}).fetchall()
+            if not rows:
+                break
+            updates = [
+                {"id": row.id, "phone_normalized": normalize_phone(row.phone)}
+                for row in rows if normalize_phone(row.phone)
+            ]
+            if updates:
+                connection.execute(
+                    text("UPDATE candidate SET phone_normalized = :phone_normalized WHERE id = :id"), updates
+                )
+                connection.commit()
+            backfilled += len(updates)
+            last_id = rows[-1].id
+        print(f"✓ Backfilled phone_normalized for {backfilled} candidates")
+        
+        # Check and add indexes used by paginated list endpoints
+        print("\nChecking indexes...")
+
+        new_indexes = [
+            ("candidate", "ix_candidate_company_created", "company_id, is_shadowed, created_at, id"),
+            ("candidate", "ix_candidate_company_score", "company_id, is_shadowed, score, id"),
+            ("candidate", "ix_candidate_company_status", "company_id, is_shadowed, verification_status_id"),
+            ("candidate", "ix_candidate_company_email", "company_id, email"),
+            ("candidate", "ix_candidate_company_phone", "company_id, phone"),
+            ("candidate", "ix_candidate_company_phone_normalized", "company_id, phone_normalized"),
+        ]
+
+        for table_name, index_name, index_columns in new_indexes:
+            result = connection.execute(text(f"""
+                SELECT COUNT(*) as count 
+                FROM information_schema.statistics 
+                WHERE table_schema = 'hrms_db' 
+                AND table_name = '{table_name}' 
+                AND index_name = '{index_name}'
+            """))
+
+            if result.fetchone()[0] == 0:
+                print(f"Adding {index_name} index to {table_name} table...")
+                try:
+                    connection.execute(text(f"CREATE INDEX {index_name} ON {table_name} ({index_columns})"))
+                    connection.commit()
+                    print(f"✓ {index_name} index added successfully")
+                except Exception as e:
+                    print(f"⚠️ Error adding {index_name}: {e}")
+            else:
+                print(f"✓ {index_name} index already exists")
+        
+        # Backfill the candidate search index
+        print("\nChecking candidate search index...")
+        from models.candidate import CandidateSearch
+        from models.database import SessionLocal
+        from services.search_service import CandidateSearchService
+
+        CandidateSearch.__table__.create(bind=engine, checkfirst=True)
+        indexed = connection.execute(text("SELECT COUNT(*) FROM candidate_search")).fetchone()[0]
+        if indexed == 0:
+            print("Building candidate search index...")
+            db = SessionLocal()
+            try:
+                total = CandidateSearchService(db).rebuild_index()
+                print(f"✓ Indexed {total} candidates")
+            except Exception as e:
+                db.rollback()
+                print(f"⚠️ Error building search index: {e}")
+            finally:
+                db.close()
+        else:
+            print(f"✓ Candidate search index already populated ({indexed} candidates)")
+        
         print("\n🎉 Database migration completed successfully!")
 
 if __name__ == "__main__":
@@ -1,24 +1,28 @@
 # Import all models to ensure they are registered with SQLAlchemy
 from .database import Base, engine, get_db
 from .user import User, UserMeta, UserOtp, Role, CompanyUser
-from .company import Company, Subscription, SubscriptionCompany, Service
+from .company import Company, Subscription, SubscriptionCompany, Service, CreditLedger
 from .candidate import (
     Candidate, CandidateNid, CandidateAddress, CandidateEducation,
-    CandidateEmployment, CandidateBankAccount, CandidateAadharDetails
+    CandidateEmployment, CandidateBankAccount, CandidateAadharDetails, CandidateSearch
 )
 from .verification import (
     VerificationStatus, ReportIdentity, ReportEmployment,
-    ReportCourtCheck, ReportAml, ReportBankAccount
+    ReportCourtCheck, ReportAml, ReportBankAccount, ReportSnapshot
 )
 from .reference import CandidateReferenceCheck
+from .import_job import ImportJob, ImportJobError
+from .email_outbox import EmailOutbox
 
 __all__ = [
     "Base", "engine", "get_db",
     "User", "UserMeta", "UserOtp", "Role", "CompanyUser",
-    "Company", "Subscription", "SubscriptionCompany", "Service",
+    "Company", "Subscription", "SubscriptionCompany", "Service", "CreditLedger",
     "Candidate", "CandidateNid", "CandidateAddress", "CandidateEducation",
-    "CandidateEmployment", "CandidateBankAccount", "CandidateAadharDetails",
+    "CandidateEmployment", "CandidateBankAccount", "CandidateAadharDetails", "CandidateSearch",
     "VerificationStatus", "ReportIdentity", "ReportEmployment",
-    "ReportCourtCheck", "ReportAml", "ReportBankAccount",
-    "CandidateReferenceCheck"
+    "ReportCourtCheck", "ReportAml", "ReportBankAccount", "ReportSnapshot",
+    "CandidateReferenceCheck",
+    "ImportJob", "ImportJobError",
+    "EmailOutbox"
 ] 
\ No newline at end of file
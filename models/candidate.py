@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Date, Float, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Date, Float, Enum, Index, DDL, event
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from .database import Base
+from utils.candidate_utils import normalize_phone
 import enum
 
 class Gender(enum.Enum):
@@ -18,6 +19,17 @@ class CheckStatus(enum.Enum):
 
 class Candidate(Base):
     __tablename__ = "candidate"
+    __table_args__ = (
+        # Keyset pagination / sorting for company-scoped candidate and report lists,
+        # and the covering index for per-status insight counts
+        Index("ix_candidate_company_created", "company_id", "is_shadowed", "created_at", "id"),
+        Index("ix_candidate_company_score", "company_id", "is_shadowed", "score", "id"),
+        Index("ix_candidate_company_status", "company_id", "is_shadowed", "verification_status_id"),
+        # Duplicate checks on create/import
+        Index("ix_candidate_company_email", "company_id", "email"),
+        Index("ix_candidate_company_phone", "company_id", "phone"),
+        Index("ix_candidate_company_phone_normalized", "company_id", "phone_normalized"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -33,6 +45,9 @@ class Candidate(Base):
     mother_name = Column(String(100), nullable=True)
     marital_status = Column(String(50), nullable=True)
     phone = Column(String(20))
+    # normalize_phone(phone), kept in sync by _sync_phone_normalized; NULL when
+    # the phone has no digits. Duplicate checks match on it with equality.
+    phone_normalized = Column(String(20), nullable=True)
     alternate_phone = Column(String(20), nullable=True)
     email = Column(String(100))
     access_token = Column(String(40), nullable=True)
@@ -66,6 +81,11 @@ class Candidate(Base):
     report_aml = relationship("ReportAml", back_populates="candidate", uselist=False)
     report_bank_account = relationship("ReportBankAccount", back_populates="candidate", uselist=False)
 
+    @validates("phone")
+    def _sync_phone_normalized(self, key, phone):
+        self.phone_normalized = normalize_phone(phone) or None
+        return phone
+
 class CandidateNid(Base):
     __tablename__ = "candidate_nid"
 
@@ -183,4 +203,30 @@ class CandidateBankAccount(Base):
     ifsc = Column(String(50), nullable=True)
     name = Column(String(100), nullable=True)
 
-    candidate = relationship("Candidate", back_populates="bank_account") 
\ No newline at end of file
+    candidate = relationship("Candidate", back_populates="bank_account")
+
+class CandidateSearch(Base):
+    """Denormalized search document per candidate (names, email, phone, code, PAN/UAN)"""
+    __tablename__ = "candidate_search"
+    __table_args__ = (
+        # MySQL: ngram FULLTEXT index; other dialects ignore the prefix/parser
+        Index("ft_candidate_search_document", "document", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+    )
+
+    candidate_id = Column(Integer, ForeignKey("candidate.id"), primary_key=True)
+    company_id = Column(Integer, ForeignKey("company.id"), index=True)
+    document = Column(Text, nullable=True)
+
+# SQLite: external-content FTS5 index kept in sync with candidate_search by triggers
+for _statement in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS candidate_search_fts USING fts5("
+    "document, content='candidate_search', content_rowid='candidate_id', prefix='2 3 4')",
+    "CREATE TRIGGER IF NOT EXISTS candidate_search_ai AFTER INSERT ON candidate_search BEGIN "
+    "INSERT INTO candidate_search_fts(rowid, document) VALUES (new.candidate_id, new.document); END",
+    "CREATE TRIGGER IF NOT EXISTS candidate_search_ad AFTER DELETE ON candidate_search BEGIN "
+    "INSERT INTO candidate_search_fts(candidate_search_fts, rowid, document) VALUES ('delete', old.candidate_id, old.document); END",
+    "CREATE TRIGGER IF NOT EXISTS candidate_search_au AFTER UPDATE ON candidate_search BEGIN "
+    "INSERT INTO candidate_search_fts(candidate_search_fts, rowid, document) VALUES ('delete', old.candidate_id, old.document); "
+    "INSERT INTO candidate_search_fts(rowid, document) VALUES (new.candidate_id, new.document); END",
+):
+    event.listen(CandidateSearch.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
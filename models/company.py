@@ -63,4 +63,16 @@ class SubscriptionCompany(Base):
     subscription_id = Column(Integer, ForeignKey("subscription.id"))
 
     company = relationship("Company", back_populates="subscription_company")
-    subscription = relationship("Subscription", back_populates="companies") 
\ No newline at end of file
+    subscription = relationship("Subscription", back_populates="companies") 
+class CreditLedger(Base):
+    """Append-only record of every change to company.credits"""
+    __tablename__ = "credit_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    company_id = Column(Integer, ForeignKey("company.id"), index=True)
+    # Negative for reservations/usage, positive for top-ups and releases
+    delta = Column(Integer, nullable=False)
+    balance_after = Column(Integer, nullable=True)
+    reason = Column(String(50))
+    reference = Column(String(100), nullable=True)
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, Index
+from sqlalchemy.sql import func
+from datetime import datetime
+from .database import Base
+import enum
+
+class EmailOutboxStatus(enum.Enum):
+    PENDING = "PENDING"
+    SENDING = "SENDING"
+    SENT = "SENT"
+    DEAD = "DEAD"
+
+class EmailOutbox(Base):
+    """Email queued in the same transaction as the change that triggered it; delivered by the dispatcher"""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # Dispatcher claim: due PENDING rows, oldest first
+        Index("ix_email_outbox_status_next", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    html_body = Column(Text, nullable=True)
+    text_body = Column(Text, nullable=True)
+    # What the email is about, e.g. "candidate:12" or "reference:7"
+    reference = Column(String(100), nullable=True, index=True)
+    status = Column(Enum(EmailOutboxStatus), default=EmailOutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Set while a dispatcher holds the row; stale locks are reclaimed
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
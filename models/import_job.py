@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from .database import Base
+import enum
+
+class ImportJobStatus(enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+class ImportJob(Base):
+    """Background candidate import; counters and last_row advance with each committed chunk"""
+    __tablename__ = "import_job"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    company_id = Column(Integer, ForeignKey("company.id"), index=True)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=True)
+    status = Column(Enum(ImportJobStatus), default=ImportJobStatus.QUEUED, index=True)
+    filename = Column(String(255))
+    file_path = Column(String(500))
+    processed_rows = Column(Integer, default=0)
+    inserted_rows = Column(Integer, default=0)
+    failed_rows = Column(Integer, default=0)
+    duplicate_rows = Column(Integer, default=0)
+    # File row number of the last committed chunk; a resumed run skips up to here
+    last_row = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    # Token of the runner that claimed the job; every chunk commit checks it, so a
+    # runner whose job was requeued as stale stops instead of writing alongside the new one
+    runner_token = Column(String(32), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    errors = relationship("ImportJobError", back_populates="job", cascade="all, delete-orphan")
+
+class ImportJobError(Base):
+    __tablename__ = "import_job_error"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("import_job.id"), index=True)
+    row_number = Column(Integer)
+    error = Column(Text)
+
+    job = relationship("ImportJob", back_populates="errors")
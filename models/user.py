@@ -20,6 +20,8 @@ class User(Base):
     access_token = Column(String(40), nullable=True)
     role = Column(Integer, ForeignKey("role.id"))
     pass_code = Column(String(6))
+    # Bumped on role/company changes and deletion; tokens signed with an older version are rejected
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
 
     role_rel = relationship("Role", back_populates="users")
     company_user = relationship("CompanyUser", back_populates="user", uselist=False)
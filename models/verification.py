@@ -1,5 +1,6 @@
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.mysql import LONGTEXT
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -87,4 +88,18 @@ class ReportBankAccount(Base):
     data = Column(JSON, nullable=True)
     score = Column(Integer, nullable=True)
 
-    candidate = relationship("Candidate", back_populates="report_bank_account", uselist=False) 
\ No newline at end of file
+    candidate = relationship("Candidate", back_populates="report_bank_account", uselist=False)
+
+class ReportSnapshot(Base):
+    __tablename__ = "report_snapshot"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    candidate_id = Column(Integer, ForeignKey("candidate.id"), unique=True)
+    company_id = Column(Integer, ForeignKey("company.id"), index=True)
+    version = Column(Integer, default=1)
+    etag = Column(String(70))
+    generated_at = Column(DateTime, nullable=True)
+    # Pre-serialized report JSON; deferred so ETag checks never read it
+    body = deferred(Column(Text().with_variant(LONGTEXT, "mysql"), nullable=True))
@@ -5,12 +5,14 @@ from typing import List
 from models.database import get_db
 from models.user import User, CompanyUser
 from schemas.common import BaseResponse
-from dependencies.auth import get_current_admin_user
+from dependencies.auth import get_current_company_context, Principal
 
 # router = APIRouter()
 
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Header, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse, Response, FileResponse
 from sqlalchemy.orm import Session
 from models import CompanyUser, Candidate, Company  # Ensure all models are imported
 from models.candidate import Candidate
@@ -18,6 +20,15 @@ from schemas.admin import WhiteListSuperAdminDTO, AdminResponse
 from services.admin_service import AdminService
 from services.company_service import CompanyService
 from services.email_service import EmailService
+from services.email_dispatcher import wake_email_dispatcher
+from services.report_service import (
+    ReportService, normalize_status, etag_matches,
+    parse_export_columns, stream_report_export,
+    REPORT_DETAIL_FIELDS, report_fields_etag, project_report_body
+)
+from services.pdf_report_service import PdfReportService, render_company_reports_job
+from utils.fieldsets import parse_fields
+from schemas.admin import ReportListParams, ReportListResponse, ReportExportParams
 from dependencies.auth import get_super_admin_create_guard
 
 
@@ -38,6 +49,15 @@ async def white_list_super_admin(
 
         # Create super admin
         admin = await admin_service.white_list_super_admin(dto)
+
+        # Queue the welcome email; it commits with the company below
+        email_service.queue_email(
+            db,
+            admin.email,
+            'Welcome to Infiniti HRMS portal',
+            text_content=admin_service.get_admin_sign_up_message(admin.pass_code),
+            reference=f"admin:{admin.id}"
+        )
         
         # Create/update company for the super admin
         await company_service.upsert_company(
@@ -47,17 +67,7 @@ async def white_list_super_admin(
             credits=dto.credits,
             subscription_id=dto.subscription_id
         )
-
-        # Send email to admin
-        try:
-            message = admin_service.get_admin_sign_up_message(admin.pass_code)
-            await email_service.send_email(
-                admin.email,
-                'Welcome to Infiniti HRMS portal',
-                text_content=message
-            )
-        except Exception as err:
-            print(f"Error sending email: {err}")
+        wake_email_dispatcher()
 
         return AdminResponse(
             message="Super admin added successfully",
@@ -71,18 +81,11 @@ async def white_list_super_admin(
 
 @router.get("/config")
 async def get_admin_config(
-    current_user: User = Depends(get_current_admin_user),
+    context: Principal = Depends(get_current_company_context),
     db: Session = Depends(get_db)
 ):
     """Return admin portal config including company info and flags."""
-    company_user = db.query(CompanyUser).filter(CompanyUser.user_id == current_user.id).first()
-    if not company_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User not associated with any company"
-        )
-
-    company = db.query(Company).filter(Company.id == company_user.company_id).first()
+    company = db.query(Company).filter(Company.id == context.company_id).first()
     subscription = getattr(getattr(company, "subscription_company", None), "subscription", None) if company else None
 
     return {
@@ -116,85 +119,14 @@ async def get_admin_config(
 def start_of_day(dt: datetime) -> datetime:
     return datetime(dt.year, dt.month, dt.day)
 
-# Normalize backend status names to frontend-friendly ones
-# - None/UNKNOWN -> PENDING
-# - COMPLETED -> VERIFIED
-# - Keep SUBMITTED/IN_PROGRESS/REJECTED/REQUESTED as-is
-
-def normalize_status(status_name: str | None) -> str:
-    if not status_name or status_name.upper() == "UNKNOWN":
-        return "PENDING"
-    upper = status_name.upper()
-    if upper == "COMPLETED":
-        return "VERIFIED"
-    return upper
-
-def calculate_tow_time(candidate) -> str:
-    """Calculate Time of Work (TOW) based on employment history and verification time"""
-    try:
-        # Calculate work experience component (70% weight)
-        work_experience_score = 0
-        if candidate.employments and len(candidate.employments) > 0:
-            total_years = 0
-            for emp in candidate.employments:
-                if emp.starts_from:
-                    start_date = emp.starts_from
-                    end_date = emp.ends_at if emp.ends_at else datetime.utcnow().date()
-                    
-                    # Calculate years between start and end
-                    years = (end_date - start_date).days / 365.25
-                    total_years += years
-            
-            # Convert years to percentage (assuming 10+ years = 100%)
-            if total_years >= 10:
-                work_experience_score = 100
-            elif total_years <= 0:
-                work_experience_score = 0
-            else:
-                work_experience_score = int((total_years / 10) * 100)
-        else:
-            work_experience_score = 0
-        
-        # Calculate verification time component (30% weight)
-        verification_time_score = 0
-        if candidate.created_at:
-            # Calculate days since candidate was created
-            days_since_creation = (datetime.utcnow().date() - candidate.created_at.date()).days
-            
-            # If verification completed within 7 days = 100%, if > 30 days = 0%
-            if days_since_creation <= 7:
-                verification_time_score = 100
-            elif days_since_creation >= 30:
-                verification_time_score = 0
-            else:
-                verification_time_score = int(((30 - days_since_creation) / 23) * 100)
-        else:
-            verification_time_score = 50  # Default if no creation date
-        
-        # Calculate weighted average
-        final_score = int((work_experience_score * 0.7) + (verification_time_score * 0.3))
-        
-        return f"{final_score}%"
-            
-    except Exception as e:
-        print(f"Error calculating TOW time: {e}")
-        return "25%"  # Default fallback
-
 @router.get("/dashboard")
 async def get_admin_dashboard(
-    current_user: User = Depends(get_current_admin_user),
+    context: Principal = Depends(get_current_company_context),
     db: Session = Depends(get_db)
 ):
     """Get admin dashboard data for admin"""
     # 1. Find company for current user
-    company_user = db.query(CompanyUser).filter(CompanyUser.user_id == current_user.id).first()
-    if not company_user:
-        raise HTTPException(
-            # status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User not associated with any company"
-        )
-
-    company_id = company_user.company_id
+    company_id = context.company_id
 
     # 2. Get credits
     company = db.query(Company).filter(Company.id == company_id).first()
@@ -266,302 +198,124 @@ async def get_admin_dashboard(
 
 
 
-@router.get("/reports")
+@router.get("/reports", response_model=ReportListResponse)
 async def get_admin_reports(
-    current_user: User = Depends(get_current_admin_user),
+    params: ReportListParams = Depends(),
+    context: Principal = Depends(get_current_company_context),
     db: Session = Depends(get_db)
 ):
-    """Get admin reports"""
-    company_user = db.query(CompanyUser).filter(CompanyUser.user_id == current_user.id).first()
-    if not company_user:
+    """Get admin reports (keyset paginated, filtered and sorted server-side)"""
+    report_service = ReportService(db)
+    try:
+        report_items, next_cursor = await report_service.list_reports(
+            context.company_id,
+            limit=params.limit,
+            cursor=params.cursor,
+            sort=params.sort,
+            statuses=params.status.split(",") if params.status else None,
+            min_score=params.min_score,
+            max_score=params.max_score,
+            created_from=params.created_from,
+            created_to=params.created_to,
+        )
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User not associated with any company"
+            detail=str(e)
         )
-    
-    # Fetch candidates for this company
-    candidates = db.query(Candidate).filter(
-        Candidate.company_id == company_user.company_id,
-        Candidate.is_shadowed == False
-    ).all()
-
-    # Build report list items expected by frontend
-    def compute_score(c: Candidate) -> int:
-        scores = []
-        # Derive AML score as 100 when there are zero cases even if DB has 60
-        def derive_aml_score() -> int:
-            try:
-                if not getattr(c, "report_aml", None):
-                    return 100
-                aml_apis = getattr(c.report_aml, "apis", {}) or {}
-                aml_payload = aml_apis.get("aml") or {}
-                if isinstance(aml_payload, dict):
-                    data_block = aml_payload.get("data") or {}
-                    entity_checks = data_block.get("entitychecks") or aml_payload.get("entitychecks") or []
-                    case_outcome = data_block.get("Case_Outcome") or aml_payload.get("Case_Outcome") or {}
-                    no_cases = (len(entity_checks) == 0) and (not case_outcome)
-                    if no_cases:
-                        return 100
-                # Fall back to stored score if present
-                return c.report_aml.score if c.report_aml.score is not None else 100
-            except Exception:
-                return c.report_aml.score if getattr(c, "report_aml", None) and c.report_aml.score is not None else 100
-        if getattr(c, "report_identity", None) and c.report_identity.score is not None:
-            scores.append(c.report_identity.score)
-        if getattr(c, "report_court_check", None) and c.report_court_check.score is not None:
-            scores.append(c.report_court_check.score)
-        if getattr(c, "report_aml", None):
-            scores.append(derive_aml_score())
-        if getattr(c, "report_bank_account", None) and c.report_bank_account.score is not None:
-            scores.append(c.report_bank_account.score)
-        if scores:
-            return int(sum(scores) / len(scores))
-        return int(c.score) if c.score is not None else 0
-
-    report_items = [
-        {
-            "id": c.id,
-            "firstName": c.first_name or "",
-            "lastName": c.last_name or "",
-            "phone": c.phone or "",
-            "email": c.email or "",
-            "image": c.image,
-            "createdAt": (c.created_at.isoformat() if c.created_at else datetime.utcnow().isoformat()),
-            "status": normalize_status(c.verification_status.name if c.verification_status else None),
-            "score": compute_score(c),
-        }
-        for c in candidates
-    ]
-
-    # Sort by createdAt desc
-    report_items.sort(key=lambda x: x["createdAt"], reverse=True)
 
-    return {"reports": report_items}
+    return {"reports": report_items, "next": next_cursor}
 
 
 
-@router.get("/report/{candidate_id}")
-async def get_admin_report_detail(
-    candidate_id: int,
-    current_user: User = Depends(get_current_admin_user),
+@router.get("/reports/export")
+async def export_admin_reports(
+    params: ReportExportParams = Depends(),
+    context: Principal = Depends(get_current_company_context),
     db: Session = Depends(get_db)
 ):
-    """Get report detail for a candidate"""
-    # Ensure user belongs to company
-    company_user = db.query(CompanyUser).filter(CompanyUser.user_id == current_user.id).first()
-    if not company_user:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User not associated with any company")
-
-    c: Candidate = db.query(Candidate).filter(
-        Candidate.id == candidate_id,
-        Candidate.company_id == company_user.company_id
-    ).first()
-    if not c:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
-
-    # Build minimal structure matching frontend ReportDataModel
-    dob_str = c.dob.isoformat() if c.dob else (getattr(getattr(c, "aadhar_details", None), "dob", "") or "")
-    report = {
-        "identityData": {
-            "isApplicable": True,
-            "isIdentityVerified": True,
-            "impact": "Low",
-            "score": c.report_identity.score if getattr(c, "report_identity", None) and c.report_identity.score is not None else 100,
-            "weightage": 25,
-            "status": normalize_status(c.verification_status.name if c.verification_status else None),
-            "isAadharVerified": True,
-            "isDobVerified": True,
-            "isFatherNameVerified": True,
-            "isGenderVerified": True,
-            "isNameVerified": True,
-            "isPanVerified": True,
-            "currentAddressCheckScore": 100,
-            "permanentAddressCheckScore": 100,
-            "towTime": calculate_tow_time(c),  # Time of Work/Time on Work metric
-        },
-        "employmentData": {
-        "isApplicable": True,
-        "impact": "Low",
-        "status": normalize_status(
-            c.report_employment.verification_status.name
-            if getattr(c, "report_employment", None)
-               and getattr(c.report_employment, "verification_status", None)
-            else None
-        ),
-        "towTime": calculate_tow_time(c),
-        "data": (
-            getattr(c.report_employment, "data", None)
-            if getattr(c, "report_employment", None)
-            else None
-        )
-        or (
-            (getattr(c.report_employment, "apis", {}) or {}).get("employment_history")
-            if getattr(c, "report_employment", None)
-            else None
+    """Stream every report of the company as CSV or NDJSON"""
+    try:
+        columns = parse_export_columns(params.columns)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
-        or {"result": [], "status": 200, "message": "Verified"},
-    },
 
+    rows = stream_report_export(
+        context.company_id,
+        columns,
+        fmt=params.format,
+        statuses=params.status.split(",") if params.status else None,
+        min_score=params.min_score,
+        max_score=params.max_score,
+        created_from=params.created_from,
+        created_to=params.created_to,
+    )
+    media_type = "text/csv" if params.format == "csv" else "application/x-ndjson"
+    filename = f"reports-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{params.format}"
+    return StreamingResponse(
+        rows,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
-        "courtData": {
-            "isApplicable": True,
-            "score": c.report_court_check.score if getattr(c, "report_court_check", None) and c.report_court_check.score is not None else 100,
-            "impact": "Low",
-            "weightage": 25,
-            "status": normalize_status(c.verification_status.name if c.verification_status else None),
-            "data": (getattr(c.report_court_check, "data", None) if getattr(c, "report_court_check", None) else None)
-                or ((getattr(c.report_court_check, "apis", {}) or {}).get("court_search") if getattr(c, "report_court_check", None) else None)
-                or {"total": 0, "status": 200, "pdfName": "", "cases": []},
-        },
-        "amlData": {
-            "isApplicable": True,
-            "score": (lambda: (
-                (lambda aml_payload: (
-                    100 if (
-                        isinstance(aml_payload, dict)
-                        and (
-                            len((aml_payload.get("data") or {}).get("entitychecks") or aml_payload.get("entitychecks") or []) == 0
-                        )
-                        and (not ((aml_payload.get("data") or {}).get("Case_Outcome") or aml_payload.get("Case_Outcome") or {}))
-                    ) else 100 if aml_payload is None else (c.report_aml.score if getattr(c, "report_aml", None) and c.report_aml.score is not None else 100)
-                ))(
-                    (((getattr(c.report_aml, "apis", {}) or {}).get("aml") or {}) if getattr(c, "report_aml", None) else {})
-                )
-            ))(),
-            "impact": "Low",
-            "weightage": 25,
-            "status": normalize_status(c.verification_status.name if c.verification_status else None),
-            "data": {"Case_Outcome": {}, "entitychecks": []},
-        },
-        "bankAccountData": {
-            "isApplicable": True,
-            "impact": "Low",
-            "score": c.report_bank_account.score if getattr(c, "report_bank_account", None) and c.report_bank_account.score is not None else 100,
-            "weightage": 25,
-            "status": normalize_status(c.verification_status.name if c.verification_status else None),
-            "data": {
-                "status": 200,
-                "message": "Verified",
-                "ifscInfo": {},
-                "bankRefNo": "",
-                "nameMatchScore": 100,
-                "beneficiaryName": (
-                    # Use real beneficiary name from bank account (updated by external API)
-                    getattr(c.bank_account, "name", None) if getattr(c, "bank_account", None) else None
-                    # Fallback to report data if available
-                    or (getattr(c.report_bank_account, "data", {}).get("beneficiaryName") if getattr(c, "report_bank_account", None) else None)
-                    # Final fallback to candidate name
-                    or f"{c.first_name} {c.last_name or ''}".strip()
-                ),
-                "nameMatchStatus": "MATCHED",
-                "verificationStatus": "VERIFIED",
-            },
-        },
-    }
 
-    response = {
-        "id": c.id,
-        "firstName": c.first_name or "",
-        "lastName": c.last_name or "",
-        "phone": c.phone or "",
-        "email": c.email or "",
-        "image": c.image,
-        "candidateCode": c.candidate_code,
-        "score": int(c.score) if c.score is not None else 100,
-        "verificationStatus": {"name": normalize_status(c.verification_status.name if c.verification_status else None)},
-        "towTime": calculate_tow_time(c),  # Time of Work/Time on Work metric
-        "bankAccount": {
-            "accountNo": getattr(c.bank_account, "account_no", None) if getattr(c, "bank_account", None) else None,
-            "ifsc": getattr(c.bank_account, "ifsc", None) if getattr(c, "bank_account", None) else None,
-        },
-        "lastAction": None,
-        "middleName": c.middle_name,
-        "gender": str(c.gender.name) if c.gender else "",
-        "dob": dob_str,
-        "fatherName": c.father_name or "",
-        "motherName": c.mother_name or "",
-        "maritalStatus": c.marital_status or "",
-        "alternatePhone": c.alternate_phone or "",
-        "uan": c.uan or "",
-        "nid": {
-            "photo": getattr(c.nid, "photo", "") if getattr(c, "nid", None) else "",
-            "aadhar": getattr(c.nid, "aadhar", "") if getattr(c, "nid", None) else "",
-            "pan": getattr(c.nid, "pan", "") if getattr(c, "nid", None) else "",
-            "passport": getattr(c.nid, "passport", "") if getattr(c, "nid", None) else "",
-            "aadharNo": getattr(c.nid, "aadhar_no", "") if getattr(c, "nid", None) else "",
-            "uanNo": getattr(c.nid, "uan_no", "") if getattr(c, "nid", None) else "",
-            "panNo": getattr(c.nid, "pan_no", "") if getattr(c, "nid", None) else "",
-        },
-        "address": [
-            {
-                "inIndia": getattr(addr, "in_india", False),
-                "houseNo": getattr(addr, "house_no", ""),
-                "locality": getattr(addr, "locality", ""),
-                "residencyName": getattr(addr, "residency_name", ""),
-                "city": getattr(addr, "city", ""),
-                "state": getattr(addr, "state", ""),
-                "pincode": getattr(addr, "pincode", ""),  # This maps to pin_code in DB
-                "landmark": getattr(addr, "landmark", ""),
-                "residingFrom": addr.residing_from.isoformat() if getattr(addr, "residing_from", None) else "",
-                "residencyProof": getattr(addr, "residency_proof", ""),
-                "isCurrent": getattr(addr, "is_current", False),
-            }
-            for addr in (c.address or [])
-        ],
-        "isFresher": len(c.employments or []) == 0,
-        "educations": [
-            {
-                "university": getattr(ed, "university", ""),
-                "degree": getattr(ed, "degree", ""),
-                "course": getattr(ed, "course", ""),
-                "idNumber": getattr(ed, "id_number", ""),
-                "grade": getattr(ed, "grade", ""),
-                "college": getattr(ed, "college", ""),
-                "country": getattr(ed, "country", ""),
-                "state": getattr(ed, "state", ""),
-                "city": getattr(ed, "city", ""),
-                "markSheet": getattr(ed, "mark_sheet", ""),
-                "certificate": getattr(ed, "certificate", ""),
-            }
-            for ed in (c.educations or [])
-        ],
-        "employments": [
-            {
-                "company": getattr(emp, "company", ""),
-                "designation": getattr(emp, "designation", ""),
-                "city": getattr(emp, "city", ""),
-                "phone": getattr(emp, "phone", ""),
-                "email": getattr(emp, "email", ""),
-                "address": getattr(emp, "address", ""),
-                "employeeType": getattr(emp, "employee_type", ""),
-                "department": getattr(emp, "department", ""),
-                "startsFrom": emp.starts_from.isoformat() if getattr(emp, "starts_from", None) else "",
-                "endsAt": emp.ends_at.isoformat() if getattr(emp, "ends_at", None) else "",
-                "currentlyWorking": bool(getattr(emp, "currently_working", False)),
-                "salary": getattr(emp, "salary", 0) or 0,
-                "uan": getattr(emp, "uan", ""),
-                "employeeCode": getattr(emp, "employee_code", ""),
-                "band": getattr(emp, "band", ""),
-                "remark": getattr(emp, "remark", ""),
-            }
-            for emp in (c.employments or [])
-        ],
-        "bankAccount": {
-            "accountNo": getattr(c.bank_account, "account_no", "") if c.bank_account else "",
-            "ifsc": getattr(c.bank_account, "ifsc", "") if c.bank_account else "",
-            "name": getattr(c.bank_account, "name", "") if c.bank_account else ""
-        },
-        "report": report,
-        "updatedAt": c.updated_at.isoformat() if c.updated_at else datetime.utcnow().isoformat(),
-        "subscription": {"id": 1, "name": "Basic"},
-        "services": [],
-    }
+@router.get("/report/{candidate_id}")
+async def get_admin_report_detail(
+    candidate_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated top-level fields to return"),
+    if_none_match: Optional[str] = Header(None),
+    context: Principal = Depends(get_current_company_context),
+    db: Session = Depends(get_db)
+):
+    """Get report detail for a candidate, served from its cached snapshot"""
+    try:
+        selected = parse_fields(fields, REPORT_DETAIL_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    return response
+    report_service = ReportService(db)
+    snapshot = await report_service.get_report_snapshot(candidate_id, context.company_id)
+    if not snapshot:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
 
+    # The snapshot is pre-serialized, so no relations are loaded either way; a
+    # field selection only trims the body and gets its own ETag
+    etag = report_fields_etag(snapshot.etag, selected)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    body = project_report_body(snapshot.body, selected)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
+@router.get("/report/{candidate_id}/pdf")
+async def download_admin_report_pdf(
+    candidate_id: int,
+    context: Principal = Depends(get_current_company_context),
+    db: Session = Depends(get_db)
+):
+    """Download the verification report PDF, rendered off the event loop and cached per report version"""
+    pdf_service = PdfReportService(db)
+    path = await pdf_service.get_report_pdf(candidate_id, context.company_id)
+    if not path:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
 
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=f"report-{candidate_id}.pdf"
+    )
 
 
+@router.post("/reports/pdf/render", response_model=BaseResponse, status_code=status.HTTP_202_ACCEPTED)
+async def render_admin_report_pdfs(
+    background_tasks: BackgroundTasks,
+    context: Principal = Depends(get_current_company_context)
+):
+    """Queue PDF rendering for every completed report of the company"""
+    background_tasks.add_task(render_company_reports_job, context.company_id)
+    return BaseResponse(message="Report PDF rendering started")
@@ -3,16 +3,18 @@ from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import secrets
-import random
 
 from models.database import get_db
-from models.user import User, UserMeta, UserOtp, Role, CompanyUser
+from models.user import User, UserMeta, Role, CompanyUser
 from models.company import Company
 from schemas.auth import UserSignUp, UserLogin, OtpRequest, OtpVerify, TokenResponse, UserResponse
 from dependencies.auth import (
     verify_password, get_password_hash, create_access_token, 
-    generate_access_token, get_current_user
+    generate_access_token, get_current_user, create_user_access_token,
+    verify_password_async, get_password_hash_async, get_otp_store
 )
+from utils.otp_store import OtpResult
+from config import settings
 from services.email_service import EmailService
 from services.candidate_service import CandidateService
 from utils.candidate_utils import decrypt_slug
@@ -62,7 +64,7 @@ async def user_signup(
         )
     
     # Update user with password and clear pass code
-    user_with_pass_code.password = get_password_hash(user_data.password)
+    user_with_pass_code.password = await get_password_hash_async(user_data.password)
     user_with_pass_code.pass_code = None  # Clear pass code after successful signup
     
     # Create user meta if not exists
@@ -105,9 +107,7 @@ async def user_signup(
     db.refresh(user_with_pass_code)
     
     # Generate access token
-    access_token = create_access_token(
-        data={"sub": str(user_with_pass_code.id), "email": user_with_pass_code.email}
-    )
+    access_token = create_user_access_token(db, user_with_pass_code)
     
     return TokenResponse(
         accessToken=access_token,
@@ -162,7 +162,7 @@ async def user_login(
 ):
     """User login endpoint"""
     user = db.query(User).filter(User.email == user_data.email).first()
-    if not user or not verify_password(user_data.password, user.password):
+    if not user or not await verify_password_async(user_data.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -177,9 +177,7 @@ async def user_login(
     )
 
     # Generate access token
-    access_token = create_access_token(
-        data={"sub": str(user.id), "email": user.email}
-    )
+    access_token = create_user_access_token(db, user)
 
     # Parse name
     first_name = ""
@@ -207,27 +205,17 @@ async def user_login(
 
 
 @router.post("/otp/request")
-async def request_otp(
-    otp_data: OtpRequest,
-    db: Session = Depends(get_db)
-):
+async def request_otp(otp_data: OtpRequest):
     """Request OTP endpoint"""
-    # Generate OTP
-    otp = str(random.randint(100000, 999999))
-    
-    # Check if OTP already exists for this email
-    existing_otp = db.query(UserOtp).filter(UserOtp.email == otp_data.email).first()
-    if existing_otp:
-        existing_otp.otp = otp
-        existing_otp.updated_at = datetime.utcnow()
-    else:
-        new_otp = UserOtp(
-            email=otp_data.email,
-            otp=otp
+    # Generate OTP; the store expires it after OTP_TTL_SECONDS. Re-requests keep
+    # the attempt budget, so alternating request and verify gains no guesses
+    otp = f"{secrets.randbelow(1000000):06d}"
+    if not await get_otp_store().issue(otp_data.email.lower(), otp):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many OTP requests, please try again later",
+            headers={"Retry-After": str(settings.OTP_TTL_SECONDS)}
         )
-        db.add(new_otp)
-    
-    db.commit()
     
     # TODO: Send email with OTP
     # For now, just return success message
@@ -239,9 +227,19 @@ async def verify_otp(
     db: Session = Depends(get_db)
 ):
     """Verify OTP endpoint"""
-    # Find OTP record
-    otp_record = db.query(UserOtp).filter(UserOtp.email == otp_data.email).first()
-    if not otp_record or otp_record.otp != otp_data.otp:
+    # Checked and consumed in one step; wrong guesses spend attempts
+    result = await get_otp_store().verify_and_consume(otp_data.email.lower(), otp_data.otp)
+    if result == OtpResult.LOCKED:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, please try again later"
+        )
+    if result == OtpResult.MISSING:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="OTP expired or not requested"
+        )
+    if result != OtpResult.OK:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid OTP"
@@ -255,10 +253,6 @@ async def verify_otp(
             detail="User not found"
         )
     
-    # Delete OTP record
-    db.delete(otp_record)
-    db.commit()
-    
     # Get user meta and role
     user_meta = db.query(UserMeta).filter(UserMeta.user_id == user.id).first()
     role = db.query(Role).filter(Role.id == user.role).first()
@@ -1,10 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, BackgroundTasks
+from fastapi.responses import HTMLResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List
 import uuid
-import csv
-import io
 
 from models.database import get_db
 from models.user import User, CompanyUser
@@ -12,15 +10,19 @@ from models.candidate import Candidate, CandidateNid, CandidateAddress, Candidat
 from models.company import Company
 from schemas.candidate import (
     CandidateCreate, CandidateUpdate, CandidateResponse, CandidateLogin,
-    CandidateListResponse, ReferenceCreate, ReferenceUpdate, ReferenceResponse,
+    CandidateListResponse, CandidateSearchResponse, ImportJobResponse, ReferenceCreate, ReferenceUpdate, ReferenceResponse,
     CandidateSendEmail, CandidateReject, CandidateAadharOTP, CandidateAadharVerify
 )
 from schemas.common import PaginationParams, BaseResponse
 from schemas.auth import TokenResponse
-from dependencies.auth import get_current_admin_user, get_current_candidate_user, get_password_hash, create_access_token
+from dependencies.auth import get_current_admin_user, get_current_candidate_user, get_password_hash, create_access_token, get_current_company_context, Principal
 from services.candidate_service import CandidateService
+from services.credit_service import CreditService
+from services.search_service import CandidateSearchService
+from services.import_service import CandidateImportService, IMPORT_EXTENSIONS, run_import_job, stream_import_errors
 from services.verification_service import VerificationService
 from utils.candidate_utils import generate_candidate_code, encrypt_slug, decrypt_slug
+from utils.fieldsets import parse_fields, select_fields
 from services.email_service import EmailService
 
 router = APIRouter()
@@ -28,30 +30,14 @@ router = APIRouter()
 @router.post("", response_model=BaseResponse)
 async def add_candidate(
     candidate_data: CandidateCreate,
-    current_user: User = Depends(get_current_admin_user),
+    context: Principal = Depends(get_current_company_context),
     db: Session = Depends(get_db)
 ):
     """Add a new candidate"""
-    # Get company ID from current user
-    company_user = db.query(CompanyUser).filter(CompanyUser.user_id == current_user.id).first()
-    if not company_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User not associated with any company"
-        )
-    
-    # Check company credits
-    company = db.query(Company).filter(Company.id == company_user.company_id).first()
-    if not company or company.credits <= 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Not enough credits"
-        )
-    
     # Check if candidate already exists
     existing_candidate = db.query(Candidate).filter(
         Candidate.email == candidate_data.email,
-        Candidate.company_id == company_user.company_id,
+        Candidate.company_id == context.company_id,
         Candidate.is_shadowed == False
     ).first()
     
@@ -61,10 +47,23 @@ async def add_candidate(
             detail="Candidate with this email already exists"
         )
     
+    # Reserve the credit up front with a conditional decrement
+    credit_service = CreditService(db)
+    if not credit_service.reserve(context.company_id, 1, "candidate", candidate_data.email):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Not enough credits"
+        )
+    db.commit()
+    
+    # Set once the candidate is committed; from then on the credit is spent
+    created = False
     try:
         # Create candidate
         candidate_service = CandidateService(db)
-        candidate = await candidate_service.add_candidate(candidate_data, company_user.company_id)
+        # The invite is queued in the candidate's transaction and sent by the outbox dispatcher
+        candidate = await candidate_service.add_candidate(candidate_data, context.company_id, send_invite=True)
+        created = candidate is not None
         
         if not candidate:
             raise HTTPException(
@@ -72,25 +71,6 @@ async def add_candidate(
                 detail="Failed to create candidate"
             )
         
-        # Deduct credit
-        company.credits -= 1
-        db.commit()
-        
-        # Send email to candidate
-        try:
-            print(f"📧 Attempting to send email to candidate: {candidate.email}")
-            email_service = EmailService()
-            # Pass the candidate object directly as expected by the method
-            email_result = await email_service.send_candidate_email(candidate)
-            if email_result:
-                print(f"✅ Email sent successfully to {candidate.email}")
-            else:
-                print(f"⚠️ Email service returned False for {candidate.email}")
-        except Exception as e:
-            print(f"❌ Failed to send email: {e}")
-            print(f"❌ Error type: {type(e).__name__}")
-            # Don't fail the request if email fails
-        
         return BaseResponse(
             success=True,
             message="Candidate created successfully",
@@ -99,103 +79,153 @@ async def add_candidate(
         
     except Exception as e:
         db.rollback()
+        if not created:
+            credit_service.grant(context.company_id, 1, "release", candidate_data.email)
+            db.commit()
         print(f"Error creating candidate: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating candidate: {str(e)}"
         )
 
-@router.post("/upload", response_model=BaseResponse)
+@router.post("/upload", response_model=ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_candidates(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_admin_user),
+    context: Principal = Depends(get_current_company_context),
     db: Session = Depends(get_db)
 ):
-    """Upload candidates from CSV file"""
-    if not file.filename.endswith('.csv'):
+    """Upload candidates from a CSV or XLSX file; the import runs as a background job"""
+    if not file.filename or not file.filename.lower().endswith(IMPORT_EXTENSIONS):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only CSV files are allowed"
+            detail="Only CSV and XLSX files are allowed"
         )
     
-    # Get company ID from current user
-    company_user = db.query(CompanyUser).filter(CompanyUser.user_id == current_user.id).first()
-    if not company_user:
+    import_service = CandidateImportService(db)
+    job = await import_service.create_job(
+        context.company_id, context.user_id, file.filename, file.file
+    )
+    background_tasks.add_task(run_import_job, job.id)
+    return job
+
+@router.get("/upload/{job_id}", response_model=ImportJobResponse)
+async def get_import_job(
+    job_id: int,
+    context: Principal = Depends(get_current_company_context),
+    db: Session = Depends(get_db)
+):
+    """Get progress of a candidate import job"""
+    job = await CandidateImportService(db).get_job(job_id, context.company_id)
+    if not job:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User not associated with any company"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
         )
-    
-    # Read CSV file
-    content = await file.read()
-    csv_text = content.decode('utf-8')
-    csv_reader = csv.DictReader(io.StringIO(csv_text))
-    
-    candidates_data = []
-    for row in csv_reader:
-        candidates_data.append(CandidateCreate(**row))
-    
-    # Check company credits
-    company = db.query(Company).filter(Company.id == company_user.company_id).first()
-    if not company or company.credits < len(candidates_data):
+    return job
+
+@router.get("/upload/{job_id}/errors")
+async def download_import_errors(
+    job_id: int,
+    context: Principal = Depends(get_current_company_context),
+    db: Session = Depends(get_db)
+):
+    """Download the rejected rows of an import job as CSV"""
+    job = await CandidateImportService(db).get_job(job_id, context.company_id)
+    if not job:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Not enough credits. You have only {company.credits if company else 0} left."
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
         )
-    
-    # Add candidates
-    candidate_service = CandidateService(db)
-    added_candidates = await candidate_service.add_candidates(candidates_data, company_user.company_id)
-    
-    if not added_candidates:
+    return StreamingResponse(
+        stream_import_errors(job.id),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="import-{job.id}-errors.csv"'}
+    )
+
+@router.post("/upload/{job_id}/resume", response_model=ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def resume_import(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    context: Principal = Depends(get_current_company_context),
+    db: Session = Depends(get_db)
+):
+    """Resume a failed or stalled import job from its last committed chunk"""
+    import_service = CandidateImportService(db)
+    job = await import_service.get_job(job_id, context.company_id)
+    if not job:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No candidates added"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
         )
-    
-    # Reduce company credits
-    company.credits -= len(added_candidates)
-    db.commit()
-    
-    # Send emails to candidates
-    # email_service = EmailService() # This line is removed as per the edit hint
-    for candidate in added_candidates:
-        # await email_service.send_candidate_email(candidate) # This line is removed as per the edit hint
-        print(f"Bulk candidate created: {candidate.email}")
-    
-    return BaseResponse(message="Candidates added successfully")
+    if not await import_service.requeue_job(job):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Import job is not resumable"
+        )
+    background_tasks.add_task(run_import_job, job.id)
+    return job
 
 @router.get("", response_model=CandidateListResponse)
 async def get_candidates(
     pagination: PaginationParams = Depends(),
-    current_user: User = Depends(get_current_admin_user),
+    context: Principal = Depends(get_current_company_context),
     db: Session = Depends(get_db)
 ):
     """Get candidates list with pagination"""
-    company_user = db.query(CompanyUser).filter(CompanyUser.user_id == current_user.id).first()
-    if not company_user:
+    candidate_service = CandidateService(db)
+    try:
+        items, next_cursor = await candidate_service.get_candidates(
+            context.company_id, 
+            pagination.limit, 
+            pagination.next
+        )
+    except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User not associated with any company"
+            detail="Invalid cursor"
         )
+    insights = await candidate_service.get_candidate_insights(context.company_id)
     
-    candidate_service = CandidateService(db)
-    items = await candidate_service.get_candidates(
-        company_user.company_id, 
-        pagination.limit, 
-        pagination.next
-    )
-    insights = await candidate_service.get_candidate_insights(company_user.company_id)
-    
-    return CandidateListResponse(
-        items=items,
-        insights=insights,
-        next=pagination.next + pagination.limit if len(items) == pagination.limit else -1
-    )
+    # Rows are already shaped like CandidateResponse; response_model validates
+    # and serializes them to JSON in one pass
+    return {
+        "items": items,
+        "insights": insights,
+        "next": next_cursor
+    }
+
+@router.get("/search", response_model=CandidateSearchResponse)
+async def search_candidates(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    context: Principal = Depends(get_current_company_context),
+    db: Session = Depends(get_db)
+):
+    """Search candidates by name, email, phone, candidate code, PAN or UAN"""
+    candidate_ids = CandidateSearchService(db).search_ids(context.company_id, q, limit)
+    items = await CandidateService(db).get_candidate_rows(context.company_id, candidate_ids)
+    return {"items": items}
+
+# Top-level fields of /details/{slug} that need relationship loads, and the
+# candidate graph relations each one reads
+DETAIL_SECTIONS = {
+    "nid": {"nid"},
+    "address": {"address"},
+    "educations": {"educations"},
+    "employments": {"employments"},
+    "bankAccount": {"bank_account", "report_bank_account"},
+}
+DETAIL_FIELDS = {
+    "id", "name", "firstName", "middleName", "lastName", "gender", "dob", "phone", "email",
+    "uan", "companyName", "companyDescription", "message", "status",
+    *DETAIL_SECTIONS,
+}
 
 @router.get("/details/{slug}")
 async def get_candidate_details_by_slug(
     slug: str,
+    fields: Optional[str] = Query(None, description="Comma-separated top-level fields to return"),
     db: Session = Depends(get_db)
 ):
     """Get candidate details by encrypted slug"""
@@ -207,8 +237,23 @@ async def get_candidate_details_by_slug(
             detail="Invalid slug"
         )
     
+    try:
+        selected = parse_fields(fields, DETAIL_FIELDS)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    # Only load the relations behind the requested sections
+    relations = None
+    if selected is not None:
+        relations = set()
+        for field in selected & DETAIL_SECTIONS.keys():
+            relations |= DETAIL_SECTIONS[field]
+    
     candidate_service = CandidateService(db)
-    candidate = await candidate_service.get_candidate_by_id(candidate_id)
+    candidate = await candidate_service.get_candidate_graph(candidate_id, relations=relations)
     
     if not candidate:
         raise HTTPException(
@@ -216,13 +261,9 @@ async def get_candidate_details_by_slug(
             detail="Candidate not found"
         )
     
-    # Build comprehensive details similar to previous behavior
-    nid = getattr(candidate, "nid", None)
-    address_list = getattr(candidate, "address", []) or []
-    education_list = getattr(candidate, "educations", []) or []
-    employment_list = getattr(candidate, "employments", []) or []
-    bank = getattr(candidate, "bank_account", None)
-    bank_report = getattr(candidate, "report_bank_account", None)
+    def wanted(field: str) -> bool:
+        return selected is None or field in selected
+    
     # Fallback for DOB from aadhar details if primary is missing
     dob_str = (
         candidate.dob.isoformat() if getattr(candidate, "dob", None) else (
@@ -230,7 +271,8 @@ async def get_candidate_details_by_slug(
         )
         )
     
-    return {
+    # Build comprehensive details similar to previous behavior
+    details = {
         "id": candidate.id,
         "name": candidate.first_name,
         "firstName": candidate.first_name or "",
@@ -245,7 +287,11 @@ async def get_candidate_details_by_slug(
         "companyDescription": "",
         "message": "Welcome to our company",
         "status": candidate.verification_status.name if candidate.verification_status else "PENDING",
-        "nid": {
+    }
+    
+    if wanted("nid"):
+        nid = candidate.nid
+        details["nid"] = {
             "photo": getattr(nid, "photo", "") if nid else "",
             "aadhar": getattr(nid, "aadhar", "") if nid else "",
             "pan": getattr(nid, "pan", "") if nid else "",
@@ -254,8 +300,10 @@ async def get_candidate_details_by_slug(
             "uanNo": getattr(nid, "uan_no", "") if nid else "",
             "panNo": getattr(nid, "pan_no", "") if nid else "",
             "passportNo": getattr(nid, "passport_no", "") if nid else "",
-        },
-        "address": [
+        }
+    
+    if wanted("address"):
+        details["address"] = [
             {
                 "inIndia": getattr(addr, "in_india", False),
                 "houseNo": getattr(addr, "house_no", ""),
@@ -269,9 +317,11 @@ async def get_candidate_details_by_slug(
                 "residencyProof": getattr(addr, "residency_proof", ""),
                 "isCurrent": getattr(addr, "is_current", False),
             }
-            for addr in address_list
-        ],
-        "educations": [
+            for addr in (candidate.address or [])
+        ]
+    
+    if wanted("educations"):
+        details["educations"] = [
             {
                 "university": getattr(ed, "university", ""),
                 "degree": getattr(ed, "degree", ""),
@@ -285,9 +335,11 @@ async def get_candidate_details_by_slug(
                 "markSheet": getattr(ed, "mark_sheet", ""),
                 "certificate": getattr(ed, "certificate", ""),
             }
-            for ed in education_list
-        ],
-        "employments": [
+            for ed in (candidate.educations or [])
+        ]
+    
+    if wanted("employments"):
+        details["employments"] = [
             {
                 "company": getattr(emp, "company", ""),
                 "designation": getattr(emp, "designation", ""),
@@ -306,9 +358,13 @@ async def get_candidate_details_by_slug(
                 "remark": getattr(emp, "remark", ""),
                 "manager": None,
             }
-            for emp in employment_list
-        ],
-        "bankAccount": {
+            for emp in (candidate.employments or [])
+        ]
+    
+    if wanted("bankAccount"):
+        bank = candidate.bank_account
+        bank_report = candidate.report_bank_account
+        details["bankAccount"] = {
             "accountNo": getattr(bank, "account_no", None) if bank else None,
             "ifsc": getattr(bank, "ifsc", None) if bank else None,
             "name": getattr(bank, "name", None) if bank else None,
@@ -317,8 +373,9 @@ async def get_candidate_details_by_slug(
                 or (((getattr(bank_report, "data", None) or {}).get("beneficiaryName")) if bank_report else None)
                 or (((((getattr(bank_report, "apis", None) or {}).get("bank_account", {})).get("beneficiaryName"))) if bank_report else None)
             ),
-        },
-    }
+        }
+    
+    return select_fields(details, selected)
 
 @router.post("/login", response_model=TokenResponse)
 async def candidate_login(
@@ -524,6 +581,7 @@ async def verify_bank_account(
             bank_report.data = bank_data
             
             db.commit()
+            await candidate_service.refresh_report_snapshot(candidate_id)
             return BaseResponse(message=f"Bank verification completed. API response: {bank}")
             
         except Exception as e:
@@ -578,20 +636,13 @@ async def create_bank_account(
 # Reference check endpoints
 @router.get("/reference")
 async def get_reference_data(
-    current_user: User = Depends(get_current_admin_user),
+    context: Principal = Depends(get_current_company_context),
     db: Session = Depends(get_db)
 ):
     """Get reference data for company (shaped for frontend)"""
-    company_user = db.query(CompanyUser).filter(CompanyUser.user_id == current_user.id).first()
-    if not company_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User not associated with any company"
-        )
-
     # Fetch raw references
     candidate_service = CandidateService(db)
-    refs = await candidate_service.get_reference_data(company_user.company_id)
+    refs = await candidate_service.get_reference_data(context.company_id)
 
     # Map backend model to frontend shape
     def map_status(s: str | None) -> str:
@@ -763,26 +814,22 @@ async def get_reference_details_by_id(
 @router.post("/complete", response_model=BaseResponse)
 async def add_complete_candidate(
     candidate_data: dict,
-    current_user: User = Depends(get_current_admin_user),
+    context: Principal = Depends(get_current_company_context),
     db: Session = Depends(get_db)
 ):
     """Add a new candidate with complete details including address, education, employment, and bank account"""
-    # Get company ID from current user
-    company_user = db.query(CompanyUser).filter(CompanyUser.user_id == current_user.id).first()
-    if not company_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User not associated with any company"
-        )
-    
-    # Check company credits
-    company = db.query(Company).filter(Company.id == company_user.company_id).first()
-    if not company or company.credits <= 0:
+    # Reserve the credit up front with a conditional decrement
+    credit_service = CreditService(db)
+    if not credit_service.reserve(context.company_id, 1, "candidate", candidate_data.get("email")):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Not enough credits"
         )
+    db.commit()
     
+    # Set once the basic candidate is committed (add_candidate commits it);
+    # a later failure in the details must not refund a credit that was used
+    created = False
     try:
         # Start transaction
         db.begin()
@@ -803,7 +850,8 @@ async def add_complete_candidate(
         )
         
         candidate_service = CandidateService(db)
-        candidate = await candidate_service.add_candidate(basic_candidate_data, company_user.company_id)
+        candidate = await candidate_service.add_candidate(basic_candidate_data, context.company_id)
+        created = candidate is not None
         
         if not candidate:
             raise HTTPException(
@@ -905,9 +953,8 @@ async def add_complete_candidate(
         # Commit all changes
         db.commit()
         
-        # Reduce company credits
-        company.credits -= 1
-        db.commit()
+        # Re-index now that PAN/UAN are stored
+        await candidate_service.update_search_index(candidate)
         
         # Skip email sending for now
         print(f"Complete candidate created successfully: {candidate.email}")
@@ -920,6 +967,9 @@ async def add_complete_candidate(
             
     except Exception as e:
         db.rollback()
+        if not created:
+            credit_service.grant(context.company_id, 1, "release", candidate_data.get("email"))
+            db.commit()
         print(f"Error creating complete candidate: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -8,6 +8,8 @@ from datetime import datetime
 from models.database import get_db
 from models.verification import VerificationStatus
 from schemas.common import BaseResponse
+from dependencies.auth import get_password_hash_pool, get_current_super_admin_user
+from models.user import User
 
 router = APIRouter()
 
@@ -55,4 +57,11 @@ async def upload_file(
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "timestamp": "2024-01-01T00:00:00Z"} 
\ No newline at end of file
+    return {"status": "healthy", "timestamp": "2024-01-01T00:00:00Z"}
+
+@router.get("/metrics/password-hashing")
+async def password_hashing_metrics(
+    current_user: User = Depends(get_current_super_admin_user)
+):
+    """bcrypt pool load: pending/completed/rejected calls and queue wait/run time percentiles"""
+    return get_password_hash_pool().metrics() 
\ No newline at end of file
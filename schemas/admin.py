@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional
+from typing import List, Optional
+from datetime import datetime
 
 class WhiteListSuperAdminDTO(BaseModel):
     email: EmailStr
@@ -33,3 +34,34 @@ class EmailPassCodeDTO(BaseModel):
 class AdminResponse(BaseModel):
     message: str
     pass_code: Optional[str] = None  # For testing purposes
+
+class ReportFilterParams(BaseModel):
+    status: Optional[str] = None  # Comma separated, e.g. "PENDING,VERIFIED"
+    min_score: Optional[int] = Field(default=None, ge=0, le=100)
+    max_score: Optional[int] = Field(default=None, ge=0, le=100)
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+class ReportListParams(ReportFilterParams):
+    limit: Optional[int] = Field(default=50, ge=1, le=200)
+    cursor: Optional[str] = None
+    sort: Optional[str] = Field(default="-created_at", pattern=r"^-?(created_at|score)$")
+
+class ReportListItem(BaseModel):
+    id: int
+    firstName: str
+    lastName: str
+    phone: str
+    email: str
+    image: Optional[str] = None
+    createdAt: str
+    status: str
+    score: Optional[int] = None
+
+class ReportListResponse(BaseModel):
+    reports: List[ReportListItem]
+    next: Optional[str] = None
+
+class ReportExportParams(ReportFilterParams):
+    format: Optional[str] = Field(default="csv", pattern=r"^(csv|ndjson)$")
+    columns: Optional[str] = None  # Comma separated export column names, default all
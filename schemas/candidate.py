@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from datetime import datetime, date
 from enum import Enum
@@ -149,7 +149,38 @@ class CandidateResponse(BaseModel):
 class CandidateListResponse(BaseModel):
     items: List[CandidateResponse]
     insights: dict
-    next: int
+    next: Optional[str] = None
+
+class CandidateSearchResponse(BaseModel):
+    items: List[CandidateResponse]
+
+class ImportJobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+class ImportJobResponse(BaseModel):
+    id: int
+    status: ImportJobStatus
+    filename: str
+    processed_rows: int = 0
+    inserted_rows: int = 0
+    failed_rows: int = 0
+    duplicate_rows: int = 0
+    last_row: int = 0
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @field_validator("status", mode="before")
+    @classmethod
+    def _status_value(cls, v):
+        # ORM rows carry the model-side enum
+        return getattr(v, "value", v)
+
+    class Config:
+        from_attributes = True
 
 class ReferenceCreate(BaseModel):
     reference_name: str = Field(..., min_length=1, max_length=100)
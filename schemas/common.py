@@ -10,7 +10,7 @@ class BaseResponse(BaseModel):
 
 class PaginationParams(BaseModel):
     limit: Optional[int] = Field(default=10, ge=1, le=100)
-    next: Optional[int] = Field(default=0, ge=0)
+    next: Optional[str] = Field(default=None, description="Opaque cursor from the previous page")
 
 class PaginatedResponse(BaseModel, Generic[T]):
     items: List[T]
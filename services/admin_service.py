@@ -130,12 +130,14 @@ class AdminService:
 
         # Soft delete by setting is_shadowed to True
         admin.is_shadowed = True
+        from dependencies.auth import revoke_user_tokens
+        revoke_user_tokens(self.db, admin_id)
         self.db.commit()
         return True
 
     async def reset_password(self, user_id: int, new_password: str) -> bool:
         """Reset user password"""
-        from dependencies.auth import get_password_hash
+        from dependencies.auth import get_password_hash_async
         
         user = self.db.query(User).filter(User.id == user_id).first()
         if not user:
@@ -144,6 +146,8 @@ class AdminService:
                 detail="User not found"
             )
 
-        user.password = get_password_hash(new_password)
+        user.password = await get_password_hash_async(new_password)
+        from dependencies.auth import revoke_user_tokens
+        revoke_user_tokens(self.db, user_id)
         self.db.commit()
         return True
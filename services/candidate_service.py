@@ -1,7 +1,8 @@
 # services/candidate_service.py
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import List, Optional, Dict, Any
+from sqlalchemy.orm import Session, joinedload, selectinload, aliased
+from sqlalchemy import and_, or_, func, select
+from typing import List, Optional, Dict, Any, Tuple, Set
+import logging
 import uuid
 from datetime import datetime
 from datetime import date as _date
@@ -13,9 +14,50 @@ from models.reference import CandidateReferenceCheck, ReferenceCheckStatus
 from schemas.candidate import CandidateCreate, CandidateUpdate, CandidateLogin
 from dependencies.auth import get_password_hash, create_access_token
 from utils.candidate_utils import generate_candidate_code
+from utils.pagination import encode_cursor, decode_id_cursor, keyset_page
 import re
 from models.company import Company
 from services.email_service import EmailService
+from services.email_dispatcher import wake_email_dispatcher
+from services.search_service import CandidateSearchService
+
+logger = logging.getLogger(__name__)
+
+
+# Columns read by list views (CandidateResponse); wide columns such as
+# aadhar_address are never loaded for lists
+CANDIDATE_LIST_COLUMNS = (
+    Candidate.id,
+    Candidate.candidate_code,
+    Candidate.first_name,
+    Candidate.middle_name,
+    Candidate.last_name,
+    Candidate.gender,
+    Candidate.dob,
+    Candidate.phone,
+    Candidate.email,
+    Candidate.score,
+    Candidate.company_id,
+    Candidate.created_at,
+)
+
+# The keyset anchor row (last row of the previous page), read in a subquery.
+# Built once: constructing an alias per request costs more than the seek.
+CANDIDATE_ANCHOR = aliased(Candidate, name="anchor")
+
+# Optional relations of the candidate graph and how each is loaded
+CANDIDATE_GRAPH_LOADS = {
+    "nid": joinedload(Candidate.nid),
+    "bank_account": joinedload(Candidate.bank_account),
+    "report_identity": joinedload(Candidate.report_identity),
+    "report_employment": joinedload(Candidate.report_employment),
+    "report_court_check": joinedload(Candidate.report_court_check),
+    "report_aml": joinedload(Candidate.report_aml),
+    "report_bank_account": joinedload(Candidate.report_bank_account),
+    "employments": joinedload(Candidate.employments),
+    "address": selectinload(Candidate.address),
+    "educations": selectinload(Candidate.educations),
+}
 
 
 def camel_to_snake(name):
@@ -28,8 +70,8 @@ class CandidateService:
     def __init__(self, db: Session):
         self.db = db
 
-    async def add_candidate(self, candidate_data: CandidateCreate, company_id: int) -> Optional[Candidate]:
-        """Add a new candidate"""
+    async def add_candidate(self, candidate_data: CandidateCreate, company_id: int, send_invite: bool = False) -> Optional[Candidate]:
+        """Add a new candidate; with send_invite the invite email is queued in the same transaction"""
         try:
             # Generate candidate code
             candidate_code = generate_candidate_code()
@@ -58,11 +100,19 @@ class CandidateService:
             )
             
             self.db.add(candidate)
-            self.db.commit()
-            self.db.refresh(candidate)
+            # Flush for the id the invite link is built from
+            self.db.flush()
             
             # Load company relationship for email service
             candidate.company = self.db.query(Company).filter(Company.id == company_id).first()
+            if send_invite:
+                EmailService().queue_candidate_email(self.db, candidate)
+            
+            self.db.commit()
+            self.db.refresh(candidate)
+            await self.update_search_index(candidate)
+            if send_invite:
+                wake_email_dispatcher()
             
             print(f"Created candidate with ID: {candidate.id}, DOB: {candidate.dob}")
             return candidate
@@ -72,28 +122,84 @@ class CandidateService:
             print(f"Error creating candidate: {str(e)}")
             raise e
 
-    async def add_candidates(self, candidates_data: List[CandidateCreate], company_id: int) -> List[Candidate]:
-        """Add multiple candidates"""
-        candidates = []
-        for candidate_data in candidates_data:
-            candidate = await self.add_candidate(candidate_data, company_id)
-            if candidate:
-                candidates.append(candidate)
-        
-        return candidates
+    def _list_row_query(self):
+        """Project only the columns CandidateResponse needs, plus the status name"""
+        return self.db.query(
+            *CANDIDATE_LIST_COLUMNS, VerificationStatus.name.label("status")
+        ).select_from(Candidate).outerjoin(
+            VerificationStatus, Candidate.verification_status_id == VerificationStatus.id
+        )
 
-    async def get_candidates(self, company_id: int, limit: int = 10, offset: int = 0) -> List[Candidate]:
-        """Get candidates with pagination"""
-        candidates = self.db.query(Candidate).filter(
-            Candidate.company_id == company_id
-        ).offset(offset).limit(limit).all()
-        
-        return candidates
+    async def get_candidates(self, company_id: int, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one keyset page of candidate list rows (newest first) and the cursor for the next page"""
+        query = self._list_row_query().filter(
+            Candidate.company_id == company_id,
+            Candidate.is_shadowed == False
+        )
+
+        # Seek past the last row of the previous page along
+        # ix_candidate_company_created instead of counting with OFFSET
+        anchor_created, last_id = None, None
+        if cursor:
+            last_id = decode_id_cursor(cursor)
+            anchor_created = select(CANDIDATE_ANCHOR.created_at).where(
+                CANDIDATE_ANCHOR.id == last_id, CANDIDATE_ANCHOR.company_id == company_id
+            )
+
+        rows = keyset_page(
+            query, Candidate.created_at, Candidate.id, limit,
+            anchor_sort=anchor_created, last_id=last_id
+        )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1].id])
+
+        return [row._asdict() for row in rows], next_cursor
+
+    async def get_candidate_rows(self, company_id: int, candidate_ids: List[int]) -> List[Dict[str, Any]]:
+        """Get candidate list rows for the given ids, keeping their order"""
+        if not candidate_ids:
+            return []
+        rows = self._list_row_query().filter(
+            Candidate.id.in_(candidate_ids),
+            Candidate.company_id == company_id,
+            Candidate.is_shadowed == False
+        ).all()
+        by_id = {row.id: row._asdict() for row in rows}
+        return [by_id[i] for i in candidate_ids if i in by_id]
 
     async def get_candidate_by_id(self, candidate_id: int) -> Optional[Candidate]:
         """Get candidate by ID"""
         return self.db.query(Candidate).filter(Candidate.id == candidate_id).first()
 
+    async def get_candidate_graph(
+        self,
+        candidate_id: int,
+        company_id: Optional[int] = None,
+        relations: Optional[Set[str]] = None
+    ) -> Optional[Candidate]:
+        """Get candidate with the relations the report/detail views read.
+
+        To-one relations and employments are joined into the main query; address
+        and education lists are batch-loaded, so the whole graph costs three queries.
+        Pass ``relations`` (names from CANDIDATE_GRAPH_LOADS) to load only those;
+        company, verification status and Aadhaar details are always loaded.
+        """
+        names = CANDIDATE_GRAPH_LOADS.keys() if relations is None else relations
+        query = self.db.query(Candidate).options(
+            joinedload(Candidate.company),
+            joinedload(Candidate.verification_status),
+            joinedload(Candidate.aadhar_details),
+            *[CANDIDATE_GRAPH_LOADS[name] for name in names],
+        ).filter(Candidate.id == candidate_id)
+
+        if company_id is not None:
+            query = query.filter(Candidate.company_id == company_id)
+
+        return query.first()
+
     async def get_candidate_for_email(self, candidate_id: int) -> Optional[Candidate]:
         """Get candidate with company info for email"""
         return self.db.query(Candidate).filter(
@@ -382,27 +488,45 @@ class CandidateService:
                     created_reference_checks.append(ref_check)
 
         # If verify flag is set and we created reference checks based on employment entries,
-        # send reference emails to all collected referees.
-        try:
-            if (update_data.get('verify') is True) and created_reference_checks:
-                email_service = EmailService()
-                for ref in created_reference_checks:
-                    try:
-                        await email_service.send_reference_email(candidate, ref)
-                        # Mark as REQUESTED after successful send
-                        ref.status = ReferenceCheckStatus.REQUESTED
-                    except Exception:
-                        # Do not block candidate update on email failures
-                        pass
-        except Exception:
-            # Swallow any unexpected email-related exceptions
-            pass
+        # queue reference emails to all collected referees; they commit with the update
+        # and the outbox dispatcher retries delivery
+        reference_emails_queued = False
+        if (update_data.get('verify') is True) and created_reference_checks:
+            email_service = EmailService()
+            for ref in created_reference_checks:
+                if email_service.queue_reference_email(self.db, candidate, ref):
+                    ref.status = ReferenceCheckStatus.REQUESTED
+                    reference_emails_queued = True
 
         self.db.commit()
+        if reference_emails_queued:
+            wake_email_dispatcher()
         self.db.refresh(candidate)
+        await self.update_search_index(candidate)
+        await self.refresh_report_snapshot(candidate.id)
         return candidate
 
-    async def update_candidate_status(self, status: str, candidate_id: int) -> bool:
+    async def update_search_index(self, candidate: Candidate) -> None:
+        """Refresh the candidate's full-text search document"""
+        try:
+            CandidateSearchService(self.db).index_candidate(candidate)
+            self.db.commit()
+        except Exception:
+            # Search lags until the next write or a reindex; never fail the write
+            self.db.rollback()
+            logger.exception("Search index update failed for candidate %s", candidate.id)
+
+    async def refresh_report_snapshot(self, candidate_id: int) -> None:
+        """Regenerate the cached report snapshot after the candidate changed"""
+        from services.report_service import ReportService
+        try:
+            await ReportService(self.db).refresh_report_snapshot(candidate_id)
+        except Exception:
+            # A stale snapshot is rebuilt on the next view; never fail the write
+            self.db.rollback()
+            logger.exception("Report snapshot refresh failed for candidate %s", candidate_id)
+
+    async def update_candidate_status(self, status: str, candidate_id: int, refresh_snapshot: bool = True) -> bool:
         """Update candidate verification status"""
         candidate = await self.get_candidate_by_id(candidate_id)
         if not candidate:
@@ -417,6 +541,8 @@ class CandidateService:
             candidate.verification_status_id = verification_status.id
         
         self.db.commit()
+        if refresh_snapshot:
+            await self.refresh_report_snapshot(candidate_id)
         return True
 
     async def candidate_login(self, login_data: CandidateLogin) -> Dict[str, Any]:
@@ -486,33 +612,30 @@ class CandidateService:
         }
 
     async def get_candidate_insights(self, company_id: int) -> Dict[str, Any]:
-        """Get candidate insights for company"""
-        total_candidates = self.db.query(Candidate).filter(
-            Candidate.company_id == company_id
-        ).count()
-        
-        pending_candidates = self.db.query(Candidate).filter(
-            and_(
-                Candidate.company_id == company_id,
-                or_(
-                    Candidate.verification_status_id.is_(None),
-                    VerificationStatus.name == "PENDING"
-                )
-            )
-        ).count()
-        
-        completed_candidates = self.db.query(Candidate).filter(
-            and_(
-                Candidate.company_id == company_id,
-                VerificationStatus.name == "COMPLETED"
-            )
-        ).count()
-        
-        return {
-            "total": total_candidates,
-            "pending": pending_candidates,
-            "completed": completed_candidates
-        }
+        """Get candidate insights for company in a single grouped query"""
+        rows = self.db.query(
+            VerificationStatus.name, func.count(Candidate.id)
+        ).select_from(Candidate).outerjoin(
+            VerificationStatus, Candidate.verification_status_id == VerificationStatus.id
+        ).filter(
+            Candidate.company_id == company_id,
+            Candidate.is_shadowed == False
+        ).group_by(VerificationStatus.name).all()
+
+        insights = {"total": 0, "pending": 0, "completed": 0, "in_progress": 0, "rejected": 0}
+        for name, count in rows:
+            insights["total"] += count
+            upper = (name or "PENDING").upper()
+            if upper in ("PENDING", "UNKNOWN"):
+                insights["pending"] += count
+            elif upper == "COMPLETED":
+                insights["completed"] += count
+            elif upper == "IN_PROGRESS":
+                insights["in_progress"] += count
+            elif upper == "REJECTED":
+                insights["rejected"] += count
+
+        return insights
 
     async def reject_candidate(self, candidate_id: int) -> bool:
         """Reject candidate"""
@@ -545,6 +668,7 @@ class CandidateService:
                 setattr(aadhar_details, field, value)
         
         self.db.commit()
+        await self.refresh_report_snapshot(candidate_id)
         return True
 
     async def get_reference_data(self, company_id: int) -> List[CandidateReferenceCheck]:
@@ -662,7 +786,7 @@ class CandidateService:
         verifier = VerificationService()
 
         # Move to IN_PROGRESS
-        await self.update_candidate_status("IN_PROGRESS", candidate_id)
+        await self.update_candidate_status("IN_PROGRESS", candidate_id, refresh_snapshot=False)
 
         # Identity: PAN and Aadhaar
         try:
@@ -944,8 +1068,9 @@ class CandidateService:
             ]
             candidate.score = int(sum(scores) / len(scores)) if scores else 100
             candidate.updated_at = datetime.utcnow()
-            await self.update_candidate_status("COMPLETED", candidate_id)
+            await self.update_candidate_status("COMPLETED", candidate_id, refresh_snapshot=False)
         except Exception:
             pass
 
-        self.db.commit() 
\ No newline at end of file
+        self.db.commit()
+        await self.refresh_report_snapshot(candidate_id)
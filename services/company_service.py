@@ -4,6 +4,7 @@ from typing import Optional, Dict, Any
 
 from models.company import Company
 from schemas.company import CompanyUpdate
+from services.credit_service import CreditService
 
 class CompanyService:
     def __init__(self, db: Session):
@@ -41,23 +42,15 @@ class CompanyService:
 
     async def add_credits(self, company_id: int, credits: int) -> bool:
         """Add credits to company"""
-        company = await self.get_company_by_id(company_id)
-        if not company:
-            return False
-        
-        company.credits += credits
+        added = CreditService(self.db).grant(company_id, credits, "topup")
         self.db.commit()
-        return True
+        return added
 
     async def reduce_credits(self, company_id: int, credits: int) -> bool:
-        """Reduce company credits"""
-        company = await self.get_company_by_id(company_id)
-        if not company or company.credits < credits:
-            return False
-        
-        company.credits -= credits
+        """Reduce company credits, only if the balance covers them"""
+        reduced = CreditService(self.db).reserve(company_id, credits, "usage")
         self.db.commit()
-        return True
+        return reduced
 
     async def upsert_company(self, company_id: Optional[int], admin_id: int, company_data: Optional[Dict] = None, credits: Optional[int] = None, subscription_id: int = 1) -> Company:
         """Create or update company for super admin"""
@@ -81,7 +74,8 @@ class CompanyService:
             company = Company(
                 code=code,
                 name=f"Company_{code}",
-                credits=credits or 0
+                # Opening balance is set (and recorded in the ledger) below
+                credits=0
             )
             self.db.add(company)
             self.db.flush()
@@ -93,7 +87,7 @@ class CompanyService:
                     setattr(company, field, value)
 
         if credits is not None:
-            company.credits = credits
+            CreditService(self.db).set_balance(company.id, credits, "admin_set")
 
         # Create subscription company relationship if needed
         from models.company import SubscriptionCompany, Subscription
@@ -134,6 +128,8 @@ class CompanyService:
                 user_id=admin_id
             )
             self.db.add(company_user)
+            from dependencies.auth import revoke_user_tokens
+            revoke_user_tokens(self.db, admin_id)
             self.db.commit()
         
         return company
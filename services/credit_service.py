@@ -0,0 +1,65 @@
+# services/credit_service.py
+from sqlalchemy.orm import Session
+from sqlalchemy import update
+from typing import Optional
+
+from models.company import Company, CreditLedger
+
+
+class CreditService:
+    """Company credit changes as single conditional UPDATEs plus a ledger entry.
+
+    Methods do not commit: the caller commits the change together with its own
+    work, or right away to keep the company row lock short.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _record(self, company_id: int, delta: int, reason: str, reference: Optional[str]) -> None:
+        # The row is locked by the UPDATE above, so this is the balance it produced
+        balance = self.db.query(Company.credits).filter(Company.id == company_id).scalar()
+        self.db.add(CreditLedger(
+            company_id=company_id,
+            delta=delta,
+            balance_after=balance,
+            reason=reason,
+            reference=reference,
+        ))
+
+    def reserve(self, company_id: int, amount: int, reason: str, reference: Optional[str] = None) -> bool:
+        """Take credits only if the balance covers them; False when it does not"""
+        if amount < 0:
+            raise ValueError("Credits to take must not be negative")
+        if amount == 0:
+            return True
+        reserved = self.db.execute(
+            update(Company)
+            .where(Company.id == company_id, Company.credits >= amount)
+            .values(credits=Company.credits - amount)
+        ).rowcount
+        if not reserved:
+            return False
+        self._record(company_id, -amount, reason, reference)
+        return True
+
+    def grant(self, company_id: int, amount: int, reason: str, reference: Optional[str] = None) -> bool:
+        """Add credits (top-ups, and releases of unused reservations)"""
+        if amount <= 0:
+            raise ValueError("Credits to add must be a positive number")
+        granted = self.db.execute(
+            update(Company)
+            .where(Company.id == company_id)
+            .values(credits=Company.credits + amount)
+        ).rowcount
+        if not granted:
+            return False
+        self._record(company_id, amount, reason, reference)
+        return True
+
+    def set_balance(self, company_id: int, credits: int, reason: str, reference: Optional[str] = None) -> None:
+        """Overwrite the balance (admin adjustment), recording the difference"""
+        current = self.db.query(Company.credits).filter(Company.id == company_id).with_for_update().scalar() or 0
+        self.db.execute(update(Company).where(Company.id == company_id).values(credits=credits))
+        if credits != current:
+            self._record(company_id, credits - current, reason, reference)
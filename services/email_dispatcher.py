@@ -0,0 +1,373 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+import asyncio
+import random
+
+from config import settings
+from models.database import SessionLocal
+from models.email_outbox import EmailOutbox, EmailOutboxStatus
+from services.email_service import EmailService, get_smtp_pool
+from utils.rate_limit import TokenBucket
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with a little jitter so failed batches don't retry in lockstep"""
+    delay = min(
+        settings.EMAIL_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)),
+        settings.EMAIL_RETRY_MAX_SECONDS
+    )
+    return delay * random.uniform(1.0, 1.2)
+
+
+def recipient_domain(to_email: str) -> str:
+    return (to_email or "").rsplit("@", 1)[-1].strip().lower()
+
+
+class EmailRateLimiter:
+    """Per-sender and per-recipient-domain token buckets plus daily quotas.
+
+    Limits are in-process, so they hold per dispatcher; start_email_dispatcher
+    runs only one. Daily counts are seeded from today's SENT rows so a restart
+    doesn't reset the quota, and only successful sends count against it; admitted
+    messages are held as in flight until settle() records the outcome. A quota
+    or rate of 0 disables that limit.
+    """
+
+    def __init__(
+        self,
+        sender_per_minute: float,
+        sender_burst: int,
+        sender_daily_quota: int,
+        domain_per_minute: float,
+        domain_burst: int,
+        domain_daily_quota: int,
+    ):
+        self.sender_per_minute = sender_per_minute
+        self.sender_burst = sender_burst
+        self.sender_daily_quota = sender_daily_quota
+        self.domain_per_minute = domain_per_minute
+        self.domain_burst = domain_burst
+        self.domain_daily_quota = domain_daily_quota
+        self._sender_buckets: Dict[str, TokenBucket] = {}
+        self._domain_buckets: Dict[str, TokenBucket] = {}
+        self._day = None
+        self._sent_today: Dict[str, int] = {}
+        self._in_flight: Dict[str, int] = {}
+
+    @classmethod
+    def from_settings(cls) -> "EmailRateLimiter":
+        return cls(
+            settings.EMAIL_SENDER_RATE_PER_MINUTE,
+            settings.EMAIL_SENDER_BURST,
+            settings.EMAIL_SENDER_DAILY_QUOTA,
+            settings.EMAIL_DOMAIN_RATE_PER_MINUTE,
+            settings.EMAIL_DOMAIN_BURST,
+            settings.EMAIL_DOMAIN_DAILY_QUOTA,
+        )
+
+    def _bucket(self, buckets: Dict[str, TokenBucket], key: str, per_minute: float, burst: int) -> Optional[TokenBucket]:
+        if per_minute <= 0:
+            return None
+        if key not in buckets:
+            buckets[key] = TokenBucket(per_minute / 60, max(burst, 1))
+        return buckets[key]
+
+    def start_day(self, db: Session, sender: str, now: datetime) -> None:
+        """Reset daily counts at UTC midnight, seeded from what was already sent today"""
+        today = now.date()
+        if self._day == today:
+            return
+        self._day = today
+        self._sent_today = {}
+        if not (self.sender_daily_quota or self.domain_daily_quota):
+            return
+        midnight = datetime(today.year, today.month, today.day)
+        sent = db.query(EmailOutbox.to_email).filter(
+            EmailOutbox.status == EmailOutboxStatus.SENT,
+            EmailOutbox.sent_at >= midnight
+        ).all()
+        self._sent_today[f"sender:{sender}"] = len(sent)
+        for (to_email,) in sent:
+            key = f"domain:{recipient_domain(to_email)}"
+            self._sent_today[key] = self._sent_today.get(key, 0) + 1
+
+    def admit(self, sender: str, to_email: str, deferred: Dict[str, int], now: datetime) -> Optional[datetime]:
+        """None if the message may go now; otherwise when to try it again.
+
+        ``deferred`` counts messages already pushed back per key in this pass, so
+        a backlog is spread over future token arrivals instead of all retrying at once.
+        """
+        sender_key, domain_key = self._keys(sender, to_email)
+
+        # Daily quotas: wait for the next UTC day
+        for key, quota in ((sender_key, self.sender_daily_quota), (domain_key, self.domain_daily_quota)):
+            if quota and self._sent_today.get(key, 0) + self._in_flight.get(key, 0) >= quota:
+                tomorrow = datetime(now.year, now.month, now.day) + timedelta(days=1)
+                return tomorrow + timedelta(seconds=random.uniform(0, 60))
+
+        buckets = [
+            (sender_key, self._bucket(self._sender_buckets, sender, self.sender_per_minute, self.sender_burst)),
+            (domain_key, self._bucket(self._domain_buckets, domain_key, self.domain_per_minute, self.domain_burst)),
+        ]
+        buckets = [(key, bucket) for key, bucket in buckets if bucket is not None]
+        # Take a token only when every bucket has one, so a deferral costs nothing
+        if all(bucket.tokens >= 1 for _, bucket in buckets):
+            for _, bucket in buckets:
+                bucket.try_acquire()
+            for key in (sender_key, domain_key):
+                self._in_flight[key] = self._in_flight.get(key, 0) + 1
+            return None
+
+        delay = 0.0
+        for key, bucket in buckets:
+            deferred[key] = deferred.get(key, 0) + 1
+            delay = max(delay, bucket.delay_for(deferred[key]))
+        return now + timedelta(seconds=delay)
+
+    def settle(self, sender: str, to_email: str, sent: bool) -> None:
+        """Record the outcome of an admitted message; failed sends don't use quota"""
+        for key in self._keys(sender, to_email):
+            self._in_flight[key] = max(self._in_flight.get(key, 0) - 1, 0)
+            if sent:
+                self._sent_today[key] = self._sent_today.get(key, 0) + 1
+
+    def _keys(self, sender: str, to_email: str) -> Tuple[str, str]:
+        return f"sender:{sender}", f"domain:{recipient_domain(to_email)}"
+
+
+class EmailDispatcher:
+    """Delivers the email outbox: claims due rows in batches, sends them through
+    the SMTP pool and records the outcome. Delivery is at-least-once; a row whose
+    sender died mid-send is retried after EMAIL_SENDING_TIMEOUT_SECONDS."""
+
+    def __init__(self, batch_size: Optional[int] = None, interval: Optional[float] = None):
+        self.batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+        self.interval = interval or settings.EMAIL_DISPATCH_INTERVAL
+        self.email_service = EmailService()
+        self.rate_limiter = EmailRateLimiter.from_settings()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    def _claim_batch(self) -> List[Dict]:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            # Reclaim rows abandoned by a dispatcher that died mid-send
+            db.query(EmailOutbox).filter(
+                EmailOutbox.status == EmailOutboxStatus.SENDING,
+                EmailOutbox.locked_at < now - timedelta(seconds=settings.EMAIL_SENDING_TIMEOUT_SECONDS)
+            ).update({
+                EmailOutbox.status: EmailOutboxStatus.PENDING,
+                EmailOutbox.locked_at: None,
+            }, synchronize_session=False)
+
+            # SKIP LOCKED lets several workers claim disjoint batches (ignored on SQLite)
+            rows = db.query(EmailOutbox).filter(
+                EmailOutbox.status == EmailOutboxStatus.PENDING,
+                EmailOutbox.next_attempt_at <= now
+            ).order_by(
+                EmailOutbox.next_attempt_at, EmailOutbox.id
+            ).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+            sender = self.email_service.from_email
+            self.rate_limiter.start_day(db, sender, now)
+            deferred: Dict[str, int] = {}
+            batch = []
+            for row in rows:
+                retry_at = self.rate_limiter.admit(sender, row.to_email, deferred, now)
+                if retry_at is not None:
+                    # Over a rate or quota: reschedule without spending an attempt
+                    row.next_attempt_at = retry_at
+                    continue
+                row.status = EmailOutboxStatus.SENDING
+                row.locked_at = now
+                row.attempts = (row.attempts or 0) + 1
+                batch.append({
+                    "id": row.id,
+                    "to_email": row.to_email,
+                    "subject": row.subject,
+                    "html_body": row.html_body or "",
+                    "text_body": row.text_body or "",
+                    "attempts": row.attempts,
+                })
+            db.commit()
+            return batch
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _record_results(self, results: List[Tuple[Dict, Optional[str]]]) -> None:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            for item, error in results:
+                if error is None:
+                    values = {
+                        EmailOutbox.status: EmailOutboxStatus.SENT,
+                        EmailOutbox.sent_at: now,
+                        EmailOutbox.locked_at: None,
+                        EmailOutbox.last_error: None,
+                    }
+                elif item["attempts"] >= settings.EMAIL_MAX_ATTEMPTS:
+                    # Dead-lettered: kept for inspection, never retried automatically
+                    print(f"❌ Email {item['id']} to {item['to_email']} dead after {item['attempts']} attempts: {error}")
+                    values = {
+                        EmailOutbox.status: EmailOutboxStatus.DEAD,
+                        EmailOutbox.locked_at: None,
+                        EmailOutbox.last_error: error,
+                    }
+                else:
+                    values = {
+                        EmailOutbox.status: EmailOutboxStatus.PENDING,
+                        EmailOutbox.locked_at: None,
+                        EmailOutbox.last_error: error,
+                        EmailOutbox.next_attempt_at: now + timedelta(seconds=retry_delay(item["attempts"])),
+                    }
+                db.query(EmailOutbox).filter(
+                    EmailOutbox.id == item["id"],
+                    EmailOutbox.status == EmailOutboxStatus.SENDING
+                ).update(values, synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _deliver(self, item: Dict) -> Tuple[Dict, Optional[str]]:
+        msg = self.email_service.build_message(
+            item["to_email"], item["subject"], item["html_body"], item["text_body"]
+        )
+        try:
+            await get_smtp_pool().send(msg)
+            return item, None
+        except Exception as e:
+            return item, f"{type(e).__name__}: {e}"[:1000]
+
+    async def dispatch_once(self) -> int:
+        """Send one batch of due emails; returns how many were claimed for sending"""
+        # Session work is blocking, so keep it off the event loop
+        batch = await asyncio.to_thread(self._claim_batch)
+        if not batch:
+            return 0
+        results = await asyncio.gather(*(self._deliver(item) for item in batch))
+        sender = self.email_service.from_email
+        for item, error in results:
+            self.rate_limiter.settle(sender, item["to_email"], error is None)
+        await asyncio.to_thread(self._record_results, list(results))
+        sent = sum(1 for _, error in results if error is None)
+        print(f"📧 Email outbox: sent {sent}/{len(batch)}")
+        return len(batch)
+
+    async def run(self) -> None:
+        while not self._stopping:
+            try:
+                claimed = await self.dispatch_once()
+            except Exception as e:
+                print(f"❌ Email dispatch failed: {e}")
+                claimed = 0
+            # A full batch means more is probably due; otherwise wait for the next poll
+            if claimed < self.batch_size and not self._stopping:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+        if self._task is not None:
+            # Let the in-flight batch finish so its results are recorded
+            await self._task
+            self._task = None
+
+
+_dispatcher: Optional[EmailDispatcher] = None
+_standby: Optional[asyncio.Task] = None
+_lock_file = None
+
+# Seconds between attempts by a standby worker to take over the dispatcher lock
+DISPATCHER_STANDBY_INTERVAL = 30
+
+
+def _acquire_dispatcher_lock() -> bool:
+    """Take the host-wide dispatcher lock without blocking; the OS drops it if the worker dies"""
+    global _lock_file
+    try:
+        import fcntl
+    except ImportError:
+        # No flock (Windows): a single worker is assumed
+        return True
+    lock_file = open(settings.EMAIL_DISPATCHER_LOCK_FILE, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _lock_file = lock_file
+    return True
+
+
+def _release_dispatcher_lock() -> None:
+    global _lock_file
+    if _lock_file is not None:
+        # Closing the file releases the flock
+        _lock_file.close()
+        _lock_file = None
+
+
+async def _standby_for_lock() -> None:
+    global _dispatcher
+    while _dispatcher is None:
+        await asyncio.sleep(DISPATCHER_STANDBY_INTERVAL)
+        if _acquire_dispatcher_lock():
+            print("📧 Email dispatcher lock acquired; taking over delivery")
+            _dispatcher = EmailDispatcher()
+            _dispatcher.start()
+
+
+def start_email_dispatcher() -> Optional[EmailDispatcher]:
+    """Start the outbox dispatcher if this worker wins the dispatcher lock.
+
+    Other workers only queue emails, and stand by to take over if the
+    dispatching worker exits. None when this worker is not dispatching.
+    """
+    global _dispatcher, _standby
+    if not settings.EMAIL_DISPATCHER_ENABLED or _dispatcher is not None or _standby is not None:
+        return _dispatcher
+    if _acquire_dispatcher_lock():
+        _dispatcher = EmailDispatcher()
+        _dispatcher.start()
+    else:
+        print("📧 Email dispatcher runs in another worker; standing by")
+        _standby = asyncio.get_running_loop().create_task(_standby_for_lock())
+    return _dispatcher
+
+
+def wake_email_dispatcher() -> None:
+    """Deliver freshly committed outbox rows now rather than at the next poll"""
+    if _dispatcher is not None:
+        _dispatcher.wake()
+
+
+async def stop_email_dispatcher() -> None:
+    global _dispatcher, _standby
+    if _standby is not None:
+        _standby.cancel()
+        _standby = None
+    if _dispatcher is not None:
+        await _dispatcher.stop()
+        _dispatcher = None
+    _release_dispatcher_lock()
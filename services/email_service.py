@@ -1,9 +1,55 @@
-from typing import Optional, Dict, Any
-import smtplib
+from typing import Optional, Dict, Any, List
+from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from sqlalchemy.orm import Session
 from config import settings
+from models.email_outbox import EmailOutbox, EmailOutboxStatus
 from utils.candidate_utils import encrypt_slug
+from utils.smtp_pool import SMTPConnectionPool
+from utils.email_templates import EmailTemplateRegistry
+
+_smtp_pool: Optional[SMTPConnectionPool] = None
+_email_templates: Optional[EmailTemplateRegistry] = None
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """Shared SMTP connection pool, created on first use"""
+    global _smtp_pool
+    if _smtp_pool is None:
+        _smtp_pool = SMTPConnectionPool(
+            settings.SMTP_SERVER,
+            settings.SMTP_PORT,
+            settings.SMTP_USERNAME,
+            settings.SMTP_PASSWORD,
+            use_tls=settings.SMTP_USE_TLS,
+            size=settings.SMTP_POOL_SIZE,
+            idle_timeout=settings.SMTP_IDLE_TIMEOUT,
+            timeout=settings.SMTP_TIMEOUT,
+        )
+    return _smtp_pool
+
+
+def get_email_templates() -> EmailTemplateRegistry:
+    """Compiled email templates, loaded on first use"""
+    if _email_templates is None:
+        return load_email_templates()
+    return _email_templates
+
+
+def load_email_templates() -> EmailTemplateRegistry:
+    """(Re)load and compile every template; called at startup so a broken template fails fast"""
+    global _email_templates
+    _email_templates = EmailTemplateRegistry(settings.EMAIL_TEMPLATE_DIR).load()
+    return _email_templates
+
+
+def shutdown_smtp_pool() -> None:
+    global _smtp_pool
+    if _smtp_pool is not None:
+        _smtp_pool.close()
+        _smtp_pool = None
+
 
 class EmailService:
     def __init__(self):
@@ -13,6 +59,24 @@ class EmailService:
         self.smtp_password = settings.SMTP_PASSWORD
         self.from_email = settings.FROM_EMAIL
 
+    def build_message(
+        self,
+        to_email: str,
+        subject: str,
+        html_content: str = "",
+        text_content: str = ""
+    ) -> MIMEMultipart:
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = self.from_email
+        msg['To'] = to_email
+
+        if html_content:
+            msg.attach(MIMEText(html_content, 'html'))
+        if text_content:
+            msg.attach(MIMEText(text_content, 'plain'))
+        return msg
+
     async def send_email(
         self, 
         to_email: str, 
@@ -20,7 +84,7 @@ class EmailService:
         html_content: str = "", 
         text_content: str = ""
     ) -> bool:
-        """Send email"""
+        """Send email immediately; request handlers should queue_email instead"""
         try:
             print(f"📧 Attempting to send email to: {to_email}")
             print(f"📧 Subject: {subject}")
@@ -30,24 +94,10 @@ class EmailService:
             print(f"📧 HTML Content Length: {len(html_content)}")
             print(f"📧 Text Content Length: {len(text_content)}")
             
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = self.from_email
-            msg['To'] = to_email
-
-            if html_content:
-                msg.attach(MIMEText(html_content, 'html'))
-            if text_content:
-                msg.attach(MIMEText(text_content, 'plain'))
-
-            print(f"📧 Connecting to SMTP server...")
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                print(f"📧 Starting TLS...")
-                server.starttls()
-                print(f"📧 Logging in...")
-                server.login(self.smtp_username, self.smtp_password)
-                print(f"📧 Sending message...")
-                server.send_message(msg)
+            msg = self.build_message(to_email, subject, html_content, text_content)
+
+            # Pooled, already-authenticated connection; the send runs off the event loop
+            await get_smtp_pool().send(msg)
 
             print(f"✅ Email sent successfully to: {to_email}")
             return True
@@ -57,192 +107,93 @@ class EmailService:
             print(f"❌ Error details: {str(e)}")
             return False
 
-    async def send_candidate_email(self, candidate, resend: bool = False) -> bool:
-        """Send email to candidate"""
-        try:
+    def queue_email(
+        self,
+        db: Session,
+        to_email: str,
+        subject: str,
+        html_content: str = "",
+        text_content: str = "",
+        reference: Optional[str] = None
+    ) -> EmailOutbox:
+        """Add an email to the outbox; it is sent once the caller's transaction commits"""
+        if not to_email:
+            raise ValueError("Email recipient is required")
+        entry = EmailOutbox(
+            to_email=to_email,
+            subject=subject,
+            html_body=html_content or None,
+            text_body=text_content or None,
+            reference=reference,
+            status=EmailOutboxStatus.PENDING,
+            attempts=0,
+            next_attempt_at=datetime.utcnow(),
+        )
+        db.add(entry)
+        return entry
+
+    def _candidate_context(self, candidate) -> Dict[str, str]:
+        return {
+            "candidate_name": f"{candidate.first_name or ''} {candidate.last_name or ''}".strip(),
+            "login_url": f"{settings.FRONTEND_URL}/login/{encrypt_slug(str(candidate.id))}",
+            "user_id": candidate.email or "",
+        }
+
+    def queue_candidate_emails(self, db: Session, candidates: List[Any], company_name: Optional[str] = None) -> List[EmailOutbox]:
+        """Render the invite for many candidates in one batch and queue them (each needs candidate.id)"""
+        if not candidates:
+            return []
+        if company_name is None:
             # Get company name safely
-            company_name = "our company"
-            if hasattr(candidate, 'company') and candidate.company:
-                company_name = candidate.company.name
-            elif hasattr(candidate, 'company_id'):
-                # If company relationship not loaded, we can't get the name
-                company_name = "our company"
-            
-            subject = f"Background check for {company_name} | Submit your profile"
-            
-            # Generate email content
-            html_content = self._generate_candidate_email_html(candidate, company_name)
-            text_content = self._generate_candidate_email_text(candidate, company_name)
-            
-            return await self.send_email(candidate.email, subject, html_content, text_content)
-        except Exception as e:
-            print(f"Error in send_candidate_email: {e}")
-            return False
-
-    async def send_reference_email(self, candidate, reference, resend: bool = False) -> bool:
-        """Send email to reference with secure link"""
-        try:
-            if not reference or not getattr(reference, 'id', None):
-                return False
-
-            slug = encrypt_slug(str(reference.id))
-
-            subject = f"Reference check for {getattr(candidate, 'first_name', '')} {getattr(candidate, 'last_name', '')}"
-
-            base_url = settings.REFERENCE_FRONTEND_URL or settings.FRONTEND_URL
-            login_url = f"{base_url}/reference/login/{slug}"
-            reference_name = getattr(reference, 'reference_name', None) or getattr(reference, 'referenceEmail', None) or 'there'
-            user_id = getattr(reference, 'reference_email', None) or getattr(reference, 'referenceEmail', None) or ''
-
-            html_content = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-              <p>Hey <b>{reference_name}</b>,</p>
-
-              <p>
-                {getattr(candidate, 'first_name', '')} {getattr(candidate, 'last_name', '')} has provided your reference for their verification process.
-                To verify and complete the reference check, please click on the link below:
-              </p>
-
-              <p>
-                <a href="{login_url}">Click here to open the reference form</a>
-              </p>
-
-              <p>
-                Use <b>{user_id}</b> as your username to login.
-              </p>
-
-              <p>Best regards,<br/>InfinitiAI</p>
-            </body>
-            </html>
-            """
-
-            text_content = f"""
-            Hey {reference_name},
-
-            {getattr(candidate, 'first_name', '')} {getattr(candidate, 'last_name', '')} has provided your reference for their verification process.
-            To verify and complete the reference check, open this link:
-
-            {login_url}
-
-            Use {user_id} as your username to login.
-
-            Best regards,
-            InfinitiAI
-            """
-
-            return await self.send_email(
-                to_email=getattr(reference, 'reference_email', None) or getattr(reference, 'referenceEmail', None),
+            company = getattr(candidates[0], 'company', None)
+            company_name = company.name if company else "our company"
+
+        rendered = get_email_templates().render_batch(
+            "candidate_invite",
+            (self._candidate_context(candidate) for candidate in candidates),
+            shared={"company_name": company_name},
+        )
+        entries = [
+            EmailOutbox(
+                to_email=candidate.email,
                 subject=subject,
-                html_content=html_content,
-                text_content=text_content,
+                html_body=html_content or None,
+                text_body=text_content or None,
+                reference=f"candidate:{candidate.id}",
+                status=EmailOutboxStatus.PENDING,
+                attempts=0,
+                next_attempt_at=datetime.utcnow(),
             )
-        except Exception as e:
-            print(f"Error in send_reference_email: {e}")
-            return False
-
-    def _generate_candidate_email_html(self, candidate, company_name: str) -> str:
-        """Generate formatted HTML email content for candidate"""
-        return f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-          <p>Dear <b>{candidate.first_name} {candidate.last_name}</b>,</p>
-
-          <p>
-            Greetings from <b>InfinitiAI</b> - the Fastest, most Reliable and Innovative Indian 
-            Employee Background Verification company.
-          </p>
-
-          <p>
-            We have been engaged by <b>{company_name}</b> to conduct your background verification 
-            as a part of their hiring process. We require you to submit some information in that regard.
-          </p>
-
-          <p>
-            Please refer below enclosed a link to our platform <b>InfinitiAI</b>, for you to register 
-            and submit this information. Instructions for filling the form are mentioned later in this 
-            email to provide you with a seamless experience. Kindly note that the information shared by 
-            you will be used only for the purpose of background verification.
-          </p>
-
-          <p>
-            Background verification is an extremely important part of your hiring process at 
-            <b>{company_name}</b>, and it's our priority to keep this process simple and convenient for you.
-          </p>
-
-          <p><b>Steps to follow:</b></p>
-          <ol>
-            <li>
-              Please arrange the scanned copies of your documents like Identity proof, education 
-              mark sheets, degree, work experience (or relieving letter), etc.
-            </li>
-            <li>
-              Use the link below to register at our InfinitiAI portal. Once registered, you should 
-              fill the form and upload the documents with utmost care and attention.
-            </li>
-          </ol>
-
-          <p>
-            <b>InfinitiAI Portal:</b> 
-            <a href="{settings.FRONTEND_URL}/login/{encrypt_slug(str(candidate.id))}">
-              Click here to login
-            </a>
-            <br>
-            <b>User ID:</b> {candidate.email}
-          </p>
-
-          <p><b>Important Instructions:</b></p>
-          <ul>
-            <li>Your login credentials will expire in <b>7 days</b> from receipt of this mail.</li>
-            <li>Since Background Verification is an important step in the hiring process, please ensure accuracy.</li>
-            <li>We recommend completing your submission in a single sitting.</li>
-            <li>Please ensure that the scanned copies of the documents uploaded are clear.</li>
-          </ul>
-
-          <p>
-            Best Regards,<br>
-            <b>HR Team</b><br>
-            InfinitiAI
-          </p>
-        </body>
-        </html>
-        """
-
-    def _generate_candidate_email_text(self, candidate, company_name: str) -> str:
-        """Generate formatted email content for candidate"""
-        return f"""
-        Dear {candidate.first_name} {candidate.last_name},
-
-        Greetings from InfinitiAI - the Fastest, most Reliable and Innovative Indian Employee Background Verification company.
-
-        We have been engaged by {company_name} to conduct your background verification as a part of their hiring process. 
-        We require you to submit some information in that regard.
-
-        Please refer below enclosed a link to our platform InfinitiAI, for you to register and submit this information. 
-        Instructions for filling the form are mentioned later in this email to provide you with a seamless experience. 
-        Kindly note that the information shared by you will be used only for the purpose of background verification.
-
-        Background verification is an extremely important part of your hiring process at {company_name}, and it's our priority 
-        to keep this process simple and convenient for you.
-
-        All you need to do is carefully follow some simple steps and instructions as mentioned below:
-
-        Step 1: Please arrange the scanned copies of your documents like Identity proof, education mark sheets, degree, 
-        work experience (or relieving letter), etc.
-
-        Step 2: Use the link below to register at our InfinitiAI portal. Once registered, you should fill the form and upload 
-        the documents with utmost care and attention.
-
-        InfinitiAI Portal: {settings.FRONTEND_URL}/login/{encrypt_slug(str(candidate.id))}
-        User ID: {candidate.email}
-
-        Important Instructions:
-        • Your login credentials will expire in 7 days from receipt of this mail, so please complete this process within this time-period.
-        • Since Background Verification is an important step in the hiring process, please ensure that you fill the form with utmost care and accuracy.
-        • We recommend completing your submission in a single sitting.
-        • Please ensure that the scanned copies of the documents uploaded are clear.
-
-        Best Regards,
-        HR Team
-        InfinitiAI
-        """
+            for candidate, (subject, html_content, text_content) in zip(candidates, rendered)
+            if candidate.email
+        ]
+        db.add_all(entries)
+        return entries
+
+    def queue_candidate_email(self, db: Session, candidate) -> Optional[EmailOutbox]:
+        """Queue the profile submission invite for a candidate (needs candidate.id)"""
+        entries = self.queue_candidate_emails(db, [candidate])
+        return entries[0] if entries else None
+
+    def queue_reference_email(self, db: Session, candidate, reference) -> Optional[EmailOutbox]:
+        """Queue the reference check email with its secure link (needs reference.id)"""
+        if not reference or not getattr(reference, 'id', None):
+            return None
+
+        base_url = settings.REFERENCE_FRONTEND_URL or settings.FRONTEND_URL
+        reference_email = getattr(reference, 'reference_email', None) or getattr(reference, 'referenceEmail', None)
+        subject, html_content, text_content = get_email_templates().render("reference_request", {
+            "candidate_name": f"{getattr(candidate, 'first_name', '') or ''} {getattr(candidate, 'last_name', '') or ''}".strip(),
+            "reference_name": getattr(reference, 'reference_name', None) or reference_email or 'there',
+            "login_url": f"{base_url}/reference/login/{encrypt_slug(str(reference.id))}",
+            "user_id": reference_email or '',
+        })
+
+        return self.queue_email(
+            db,
+            reference_email,
+            subject,
+            html_content,
+            text_content,
+            reference=f"reference:{reference.id}"
+        )
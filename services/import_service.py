@@ -0,0 +1,445 @@
+# services/import_service.py
+from sqlalchemy.orm import Session
+from sqlalchemy import insert, update, and_, or_
+from pydantic import ValidationError
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+import asyncio
+import csv
+import io
+import itertools
+import os
+import shutil
+import uuid
+
+from config import settings
+from models.database import SessionLocal
+from models.import_job import ImportJob, ImportJobError, ImportJobStatus
+from models.candidate import Candidate, CheckStatus
+from models.candidate import Gender as ModelGender
+from models.company import Company
+from schemas.candidate import CandidateCreate
+from services.credit_service import CreditService
+from services.email_service import EmailService
+from services.search_service import CandidateSearchService
+from utils.candidate_utils import generate_candidate_code, normalize_email, normalize_phone
+
+# Upload formats the import job can read
+IMPORT_EXTENSIONS = (".csv", ".xlsx")
+
+# (row number in the file, raw row)
+ImportRow = Tuple[int, Dict[str, Any]]
+
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[ImportRow]:
+    """Stream rows of an uploaded CSV without reading the whole file into memory"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        # Row 1 is the header
+        for number, row in enumerate(csv.DictReader(text), start=2):
+            yield number, row
+    finally:
+        # Leave the underlying upload file open for its owner
+        text.detach()
+
+
+def _xlsx_cell(value: Any) -> Any:
+    """Normalize an Excel cell to what CandidateCreate accepts"""
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, float) and value.is_integer():
+        # Phone numbers typed into Excel come back as floats
+        return str(int(value))
+    return str(value)
+
+
+def iter_xlsx_rows(path: str) -> Iterator[ImportRow]:
+    """Stream rows of the first worksheet without loading the workbook into memory"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return
+        keys = [str(h).strip() if h is not None else None for h in header]
+        for number, values in enumerate(rows, start=2):
+            if not any(v is not None for v in values):
+                continue
+            yield number, {k: _xlsx_cell(v) for k, v in zip(keys, values)}
+    finally:
+        # Read-only workbooks keep the file open until closed
+        workbook.close()
+
+
+def iter_file_rows(path: str) -> Iterator[ImportRow]:
+    """Stream rows of a stored import file"""
+    if path.lower().endswith(".xlsx"):
+        yield from iter_xlsx_rows(path)
+        return
+    with open(path, "rb") as f:
+        yield from iter_csv_rows(f)
+
+
+def iter_chunks(rows: Iterable[ImportRow], size: int) -> Iterator[List[ImportRow]]:
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def clean_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip cells and drop empty ones so schema defaults apply"""
+    cleaned = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        if value in ("", None):
+            continue
+        cleaned[key.strip()] = value
+    return cleaned
+
+
+def _save_upload(stream: BinaryIO, path: str) -> None:
+    """Write an uploaded file to disk (blocking; run in a worker thread)"""
+    with open(path, "wb") as out:
+        shutil.copyfileobj(stream, out)
+
+
+class ImportJobLost(Exception):
+    """The job was requeued as stale and claimed by another runner"""
+
+
+class CandidateImportService:
+    def __init__(self, db: Session):
+        self.db = db
+        # Set by claim_job; identifies this runner's claim on the job
+        self.runner_token: Optional[str] = None
+
+    def _candidate_mapping(self, data: CandidateCreate, company_id: int) -> Dict[str, Any]:
+        """Column values for one inserted candidate, matching CandidateService.add_candidate"""
+        return {
+            "candidate_code": generate_candidate_code(),
+            "first_name": data.first_name,
+            "middle_name": data.middle_name,
+            "last_name": data.last_name,
+            "gender": ModelGender(data.gender.value) if data.gender else None,
+            "dob": data.dob,
+            "father_name": data.father_name,
+            "mother_name": data.mother_name,
+            "marital_status": data.marital_status,
+            "phone": data.phone,
+            # Core INSERT skips the model's validator, so set it here
+            "phone_normalized": normalize_phone(data.phone) or None,
+            "alternate_phone": data.alternate_phone,
+            "email": data.email,
+            "company_id": company_id,
+            "score": 100,
+            "is_shadowed": False,
+            "identity_check": CheckStatus.pending,
+            "employment_check": CheckStatus.pending,
+            "court_check": CheckStatus.pending,
+            "aml_check": CheckStatus.pending,
+            "bank_account_check": CheckStatus.pending,
+        }
+
+    def validate_chunk(self, chunk: List[ImportRow]) -> Tuple[List[Tuple[int, CandidateCreate]], List[Dict[str, Any]]]:
+        """Validate a chunk of raw rows into (valid rows, row errors)"""
+        valid, errors = [], []
+        for number, row in chunk:
+            try:
+                valid.append((number, CandidateCreate(**clean_row(row))))
+            except ValidationError as e:
+                message = "; ".join(
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                )
+                errors.append({"row": number, "error": message})
+            except TypeError as e:
+                errors.append({"row": number, "error": str(e)})
+        return valid, errors
+
+    def find_duplicates(
+        self, valid: List[Tuple[int, CandidateCreate]], company_id: int
+    ) -> Tuple[List[Tuple[int, CandidateCreate]], List[Dict[str, Any]]]:
+        """Split valid rows into new candidates and duplicates (by normalized email or phone).
+
+        Rows are checked against the company's candidates with one set-based lookup
+        and against earlier rows of the chunk; earlier chunks are already in the
+        database, so duplicates across the whole file are caught.
+        """
+        if not valid:
+            return [], []
+
+        emails, phones = set(), set()
+        for _, data in valid:
+            emails.update({data.email, normalize_email(data.email)})
+            phones.add(normalize_phone(data.phone))
+        # A phone without digits identifies nobody
+        phones.discard("")
+        conditions = [Candidate.email.in_(emails)]
+        if phones:
+            conditions.append(Candidate.phone_normalized.in_(phones))
+        existing = self.db.query(Candidate.email, Candidate.phone_normalized).filter(
+            Candidate.company_id == company_id,
+            Candidate.is_shadowed == False,
+            or_(*conditions)
+        ).all()
+        existing_emails = {normalize_email(row.email) for row in existing}
+        existing_phones = {row.phone_normalized for row in existing if row.phone_normalized}
+
+        unique, duplicates = [], []
+        seen_emails: Dict[str, int] = {}
+        seen_phones: Dict[str, int] = {}
+        for number, data in valid:
+            email, phone = normalize_email(data.email), normalize_phone(data.phone)
+            if email in existing_emails:
+                reason = f"Duplicate: email {email} already exists"
+            elif phone and phone in existing_phones:
+                reason = f"Duplicate: phone {phone} already exists"
+            elif email in seen_emails:
+                reason = f"Duplicate: email {email} repeats row {seen_emails[email]}"
+            elif phone and phone in seen_phones:
+                reason = f"Duplicate: phone {phone} repeats row {seen_phones[phone]}"
+            else:
+                seen_emails[email] = number
+                if phone:
+                    seen_phones[phone] = number
+                unique.append((number, data))
+                continue
+            duplicates.append({"row": number, "error": reason})
+        return unique, duplicates
+
+    def _insert_candidates(self, valid: List[Tuple[int, CandidateCreate]], company_id: int) -> None:
+        """Insert with one multi-row INSERT and index (caller commits)"""
+        mappings = [self._candidate_mapping(data, company_id) for _, data in valid]
+
+        # executemany of a single INSERT; the driver batches it into multi-row statements
+        self.db.execute(insert(Candidate), mappings)
+
+        codes = [m["candidate_code"] for m in mappings]
+        inserted = self.db.query(Candidate).filter(Candidate.candidate_code.in_(codes)).all()
+        CandidateSearchService(self.db).index_candidates(inserted)
+        if settings.IMPORT_SEND_INVITES:
+            # Rendered as one batch and committed with the chunk; the outbox dispatcher sends them
+            company = self.db.query(Company.name).filter(Company.id == company_id).first()
+            EmailService().queue_candidate_emails(
+                self.db, inserted, company_name=company.name if company else "our company"
+            )
+        for candidate in inserted:
+            self.db.expunge(candidate)
+
+    def heartbeat(self, job: ImportJob) -> None:
+        """Refresh the job's heartbeat if this runner still owns it (caller commits).
+
+        The conditional UPDATE also locks the job row until the commit, so a
+        concurrent requeue waits and then sees a fresh heartbeat.
+        """
+        owned = self.db.execute(
+            update(ImportJob).where(
+                ImportJob.id == job.id,
+                ImportJob.status == ImportJobStatus.RUNNING,
+                ImportJob.runner_token == self.runner_token
+            ).values(heartbeat_at=datetime.utcnow())
+        ).rowcount
+        if not owned:
+            raise ImportJobLost(f"Import job {job.id} was claimed by another runner")
+
+    def process_chunk(self, job: ImportJob, chunk: List[ImportRow]) -> None:
+        """Import one chunk; its candidates, row errors, credits and the job's progress commit together"""
+        valid, errors = self.validate_chunk(chunk)
+        try:
+            self.heartbeat(job)
+            valid, duplicates = self.find_duplicates(valid, job.company_id)
+            if valid:
+                self._insert_candidates(valid, job.company_id)
+            if errors or duplicates:
+                self.db.bulk_insert_mappings(ImportJobError, [
+                    {"job_id": job.id, "row_number": e["row"], "error": e["error"]}
+                    for e in sorted(errors + duplicates, key=lambda e: e["row"])
+                ])
+            # Charged per chunk for inserted rows only, last to keep the company row lock short
+            if not CreditService(self.db).reserve(job.company_id, len(valid), "import", f"import_job:{job.id}"):
+                raise ValueError(f"Not enough credits for {len(valid)} rows after row {job.last_row}")
+            job.processed_rows += len(chunk)
+            job.inserted_rows += len(valid)
+            job.failed_rows += len(errors)
+            job.duplicate_rows += len(duplicates)
+            job.last_row = chunk[-1][0]
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    async def create_job(self, company_id: int, user_id: int, filename: str, stream: BinaryIO) -> ImportJob:
+        """Store the uploaded file and queue an import job for it"""
+        os.makedirs(settings.IMPORT_UPLOAD_DIR, exist_ok=True)
+        extension = os.path.splitext(filename)[1].lower()
+        path = os.path.join(settings.IMPORT_UPLOAD_DIR, f"{uuid.uuid4().hex}{extension}")
+        # The upload may be spooled to disk; copy it off the event loop
+        await asyncio.to_thread(_save_upload, stream, path)
+
+        job = ImportJob(
+            company_id=company_id,
+            user_id=user_id,
+            filename=filename,
+            file_path=path,
+            status=ImportJobStatus.QUEUED,
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    async def get_job(self, job_id: int, company_id: int) -> Optional[ImportJob]:
+        return self.db.query(ImportJob).filter(
+            ImportJob.id == job_id,
+            ImportJob.company_id == company_id
+        ).first()
+
+    async def requeue_job(self, job: ImportJob) -> bool:
+        """Queue a failed or stalled job again; it continues after its last committed chunk"""
+        stale_before = datetime.utcnow() - timedelta(seconds=settings.IMPORT_JOB_STALE_SECONDS)
+        requeued = self.db.execute(
+            update(ImportJob).where(ImportJob.id == job.id, _resumable(stale_before)).values(
+                status=ImportJobStatus.QUEUED, error=None, finished_at=None, runner_token=None
+            )
+        ).rowcount
+        self.db.commit()
+        self.db.refresh(job)
+        return bool(requeued)
+
+    def claim_job(self, job_id: int) -> Optional[ImportJob]:
+        """Move a queued job to RUNNING; only one runner can win the conditional update"""
+        token = uuid.uuid4().hex
+        claimed = self.db.execute(
+            update(ImportJob).where(
+                ImportJob.id == job_id,
+                ImportJob.status == ImportJobStatus.QUEUED
+            ).values(status=ImportJobStatus.RUNNING, runner_token=token, heartbeat_at=datetime.utcnow())
+        ).rowcount
+        self.db.commit()
+        if not claimed:
+            return None
+        self.runner_token = token
+        return self.db.query(ImportJob).filter(ImportJob.id == job_id).first()
+
+    def finish_job(self, job: ImportJob, job_status: ImportJobStatus, error: Optional[str] = None) -> bool:
+        """Record the outcome if this runner still owns the job; False if it was taken over"""
+        finished = self.db.execute(
+            update(ImportJob).where(
+                ImportJob.id == job.id,
+                ImportJob.runner_token == self.runner_token
+            ).values(status=job_status, error=error, runner_token=None, finished_at=datetime.utcnow())
+        ).rowcount
+        self.db.commit()
+        self.db.refresh(job)
+        return bool(finished)
+
+    def run_job(self, job_id: int) -> None:
+        job = self.claim_job(job_id)
+        if not job:
+            return
+
+        resume_after = job.last_row or 0
+        if resume_after:
+            print(f"📥 Resuming import job {job.id} after row {resume_after}")
+
+        rows = (row for row in iter_file_rows(job.file_path) if row[0] > resume_after)
+        try:
+            for chunk in iter_chunks(rows, settings.IMPORT_CHUNK_SIZE):
+                self.process_chunk(job, chunk)
+        except ImportJobLost as e:
+            # The new runner owns the job now; leave it alone
+            self.db.rollback()
+            print(f"⚠️ {e}; stopping after row {job.last_row}")
+            return
+        except Exception as e:
+            # Committed chunks (and the credits they used) stay; the job can be
+            # resumed from job.last_row
+            self.db.rollback()
+            if self.finish_job(job, ImportJobStatus.FAILED, str(e)):
+                print(f"❌ Import job {job.id} failed after row {job.last_row}: {e}")
+            return
+
+        if self.finish_job(job, ImportJobStatus.COMPLETED):
+            _remove_file(job.file_path)
+            print(f"📥 Import job {job.id}: {job.inserted_rows} inserted, {job.duplicate_rows} duplicates, {job.failed_rows} failed")
+
+
+def _resumable(stale_before: datetime):
+    """Failed jobs, and running jobs whose runner stopped sending heartbeats"""
+    return or_(
+        ImportJob.status == ImportJobStatus.FAILED,
+        and_(
+            ImportJob.status == ImportJobStatus.RUNNING,
+            or_(ImportJob.heartbeat_at.is_(None), ImportJob.heartbeat_at < stale_before)
+        )
+    )
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def run_import_job(job_id: int) -> None:
+    """Background entry point (runs in the threadpool); owns its session"""
+    db = SessionLocal()
+    try:
+        CandidateImportService(db).run_job(job_id)
+    finally:
+        db.close()
+
+
+async def resume_import_jobs() -> None:
+    """Re-queue jobs interrupted by a crash or restart; called from the app lifespan"""
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.IMPORT_JOB_STALE_SECONDS)
+    db = SessionLocal()
+    try:
+        service = CandidateImportService(db)
+        jobs = db.query(ImportJob).filter(or_(
+            ImportJob.status == ImportJobStatus.QUEUED,
+            and_(
+                ImportJob.status == ImportJobStatus.RUNNING,
+                or_(ImportJob.heartbeat_at.is_(None), ImportJob.heartbeat_at < stale_before)
+            )
+        )).all()
+        job_ids = [job.id for job in jobs if job.status == ImportJobStatus.QUEUED or await service.requeue_job(job)]
+    finally:
+        db.close()
+
+    loop = asyncio.get_running_loop()
+    for job_id in job_ids:
+        loop.run_in_executor(None, run_import_job, job_id)
+    if job_ids:
+        print(f"📥 Resuming {len(job_ids)} import job(s)")
+
+
+def stream_import_errors(job_id: int) -> Iterator[str]:
+    """CSV of a job's rejected rows, streamed from its own session"""
+    db = SessionLocal()
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["row", "error"])
+        query = db.query(ImportJobError.row_number, ImportJobError.error).filter(
+            ImportJobError.job_id == job_id
+        ).order_by(ImportJobError.row_number).yield_per(1000)
+        for count, (row_number, error) in enumerate(query, start=1):
+            writer.writerow([row_number, error])
+            if count % 500 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    finally:
+        db.close()
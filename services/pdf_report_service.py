@@ -0,0 +1,226 @@
+# services/pdf_report_service.py
+from sqlalchemy.orm import Session
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any, List
+import asyncio
+import glob
+import json
+import os
+import threading
+
+from config import settings
+from models.database import SessionLocal
+from models.candidate import Candidate
+from models.verification import VerificationStatus
+from services.report_service import ReportService
+from utils.pdf import build_text_pdf, PdfLine
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+# Bulk render jobs run on threadpool threads, so the pool may be created off the loop
+_pdf_pool_lock = threading.Lock()
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Process pool used for PDF rendering, created on first use"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=settings.PDF_RENDER_WORKERS)
+        return _pdf_pool
+
+
+def shutdown_pdf_pool() -> None:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown(wait=False, cancel_futures=True)
+            _pdf_pool = None
+
+
+def _report_lines(report: Dict[str, Any]) -> List[PdfLine]:
+    """Lay out a report snapshot as PDF text lines"""
+    name = " ".join(p for p in [report.get("firstName"), report.get("middleName"), report.get("lastName")] if p)
+    lines: List[PdfLine] = [
+        ("Background Verification Report", 18, True),
+        ("", 10, False),
+        (f"Candidate: {name}", 12, True),
+        (f"Candidate code: {report.get('candidateCode') or ''}", 10, False),
+        (f"Email: {report.get('email') or ''}    Phone: {report.get('phone') or ''}", 10, False),
+        (f"Date of birth: {report.get('dob') or ''}    Gender: {report.get('gender') or ''}", 10, False),
+        (f"Status: {(report.get('verificationStatus') or {}).get('name', '')}", 10, False),
+        (f"Overall score: {report.get('score')}    TOW: {report.get('towTime') or ''}", 10, False),
+        (f"Last updated: {report.get('updatedAt') or ''}", 10, False),
+        ("", 10, False),
+        ("Checks", 14, True),
+    ]
+
+    sections = [
+        ("Identity", "identityData"),
+        ("Employment", "employmentData"),
+        ("Court", "courtData"),
+        ("AML", "amlData"),
+        ("Bank account", "bankAccountData"),
+    ]
+    checks = report.get("report") or {}
+    for label, key in sections:
+        block = checks.get(key) or {}
+        score = block.get("score")
+        score_text = f"    Score: {score}" if score is not None else ""
+        lines.append((f"{label}: {block.get('status', '')}{score_text}    Impact: {block.get('impact', '')}", 10, False))
+
+    employment_rows = ((checks.get("employmentData") or {}).get("data") or {}).get("result") or []
+    if employment_rows:
+        lines += [("", 10, False), ("Employment history (EPFO)", 14, True)]
+        for row in employment_rows:
+            lines.append((
+                f"{row.get('establishment_name') or ''}: {row.get('date_of_joining') or ''} - {row.get('last_pf_submitted') or ''}",
+                10, False
+            ))
+
+    court = (checks.get("courtData") or {}).get("data") or {}
+    lines += [("", 10, False), ("Court records", 14, True), (f"Total cases: {court.get('total', 0)}", 10, False)]
+
+    bank = (checks.get("bankAccountData") or {}).get("data") or {}
+    lines += [
+        ("", 10, False),
+        ("Bank account", 14, True),
+        (f"Beneficiary: {bank.get('beneficiaryName') or ''}    Name match: {bank.get('nameMatchStatus') or ''}", 10, False),
+    ]
+
+    if report.get("employments"):
+        lines += [("", 10, False), ("Declared employment", 14, True)]
+        for emp in report["employments"]:
+            period = f"{emp.get('startsFrom') or ''} - {emp.get('endsAt') or ('present' if emp.get('currentlyWorking') else '')}"
+            lines.append((f"{emp.get('company') or ''}, {emp.get('designation') or ''} ({period})", 10, False))
+
+    if report.get("educations"):
+        lines += [("", 10, False), ("Education", 14, True)]
+        for ed in report["educations"]:
+            lines.append((f"{ed.get('degree') or ''} {ed.get('course') or ''}, {ed.get('college') or ed.get('university') or ''}", 10, False))
+
+    if report.get("address"):
+        lines += [("", 10, False), ("Addresses", 14, True)]
+        for addr in report["address"]:
+            parts = [addr.get(k) for k in ("houseNo", "locality", "residencyName", "city", "state", "pincode")]
+            current = " (current)" if addr.get("isCurrent") else ""
+            lines.append((", ".join(str(p) for p in parts if p) + current, 10, False))
+
+    return lines
+
+
+def render_report_pdf(body: str) -> bytes:
+    """Render a serialized report snapshot to PDF bytes (runs in the process pool)"""
+    report = json.loads(body)
+    title = f"Verification report {report.get('candidateCode') or report.get('id')}"
+    return build_text_pdf(_report_lines(report), title=title)
+
+
+def report_pdf_path(candidate_id: int, version: int) -> str:
+    return os.path.join(settings.REPORT_PDF_DIR, f"{candidate_id}-v{version}.pdf")
+
+
+class PdfReportService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def get_report_pdf(self, candidate_id: int, company_id: int) -> Optional[str]:
+        """Get the cached PDF path for the candidate's current report version, rendering it if needed"""
+        snapshot = await ReportService(self.db).get_report_snapshot(candidate_id, company_id)
+        if not snapshot:
+            return None
+
+        path = report_pdf_path(candidate_id, snapshot.version)
+        if os.path.exists(path):
+            return path
+
+        loop = asyncio.get_running_loop()
+        pdf = await loop.run_in_executor(get_pdf_pool(), render_report_pdf, snapshot.body)
+        self._store_pdf(candidate_id, path, pdf)
+        return path
+
+    def _store_pdf(self, candidate_id: int, path: str, pdf: bytes) -> None:
+        os.makedirs(settings.REPORT_PDF_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(pdf)
+        os.replace(tmp_path, path)
+
+        # Drop PDFs of superseded report versions
+        for old in glob.glob(os.path.join(settings.REPORT_PDF_DIR, f"{candidate_id}-v*.pdf")):
+            if old != path:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+    async def render_company_reports(self, company_id: int) -> Dict[str, int]:
+        """Render PDFs for every completed report of a company"""
+        candidate_ids = [
+            row.id for row in self.db.query(Candidate.id).join(
+                VerificationStatus, Candidate.verification_status_id == VerificationStatus.id
+            ).filter(
+                Candidate.company_id == company_id,
+                Candidate.is_shadowed == False,
+                VerificationStatus.name == "COMPLETED"
+            ).all()
+        ]
+
+        # Snapshots are resolved one by one on this session; only the CPU-bound
+        # rendering fans out across the process pool, a bounded batch at a time
+        report_service = ReportService(self.db)
+        batch_size = settings.PDF_RENDER_WORKERS * 4
+        pending = []
+        counts = {"total": len(candidate_ids), "rendered": 0, "cached": 0, "failed": 0}
+        for candidate_id in candidate_ids:
+            try:
+                snapshot = await report_service.get_report_snapshot(candidate_id, company_id)
+            except Exception as e:
+                counts["failed"] += 1
+                self.db.rollback()
+                print(f"❌ Report snapshot failed for candidate {candidate_id}: {e}")
+                continue
+            if not snapshot:
+                continue
+            path = report_pdf_path(candidate_id, snapshot.version)
+            if os.path.exists(path):
+                counts["cached"] += 1
+                continue
+            pending.append((candidate_id, path, snapshot.body))
+            if len(pending) >= batch_size:
+                await self._render_batch(pending, counts)
+                pending = []
+
+        if pending:
+            await self._render_batch(pending, counts)
+
+        return counts
+
+    async def _render_batch(self, pending: list, counts: Dict[str, int]) -> None:
+        loop = asyncio.get_running_loop()
+        pool = get_pdf_pool()
+        results = await asyncio.gather(
+            *[loop.run_in_executor(pool, render_report_pdf, body) for _, _, body in pending],
+            return_exceptions=True
+        )
+        for (candidate_id, path, _), result in zip(pending, results):
+            if isinstance(result, Exception):
+                counts["failed"] += 1
+                print(f"❌ PDF render failed for candidate {candidate_id}: {result}")
+                continue
+            self._store_pdf(candidate_id, path, result)
+            counts["rendered"] += 1
+
+
+def render_company_reports_job(company_id: int) -> None:
+    """Background job entry point; owns its session since the request has finished.
+
+    Sync on purpose: Starlette runs it on the threadpool, and the job drives its
+    own event loop there, so the snapshot queries and rebuilds block this worker
+    thread instead of the server's event loop. Only rendering goes to the pool.
+    """
+    db = SessionLocal()
+    try:
+        result = asyncio.run(PdfReportService(db).render_company_reports(company_id))
+        print(f"📄 Bulk PDF render for company {company_id}: {result}")
+    finally:
+        db.close()
@@ -0,0 +1,589 @@
+# services/report_service.py
+from sqlalchemy.orm import Session, contains_eager, aliased
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Dict, Any, Tuple, Iterator, Set
+from datetime import datetime, date
+import enum
+import csv
+import io
+import json
+import hashlib
+
+from models.database import SessionLocal
+from models.candidate import Candidate
+from models.verification import VerificationStatus, ReportSnapshot
+from services.candidate_service import CandidateService
+from utils.pagination import encode_cursor, decode_id_cursor, keyset_page
+from utils.fieldsets import select_fields
+
+# Sort keys accepted by the report list; "-" prefix means descending
+REPORT_SORT_FIELDS = {"created_at", "score"}
+
+# The keyset anchor row (last row of the previous page), read in a subquery.
+# Built once: constructing an alias per request costs more than the seek.
+REPORT_ANCHOR = aliased(Candidate, name="anchor")
+
+# Columns available to the report export, in default output order
+EXPORT_COLUMNS = {
+    "id": Candidate.id,
+    "candidateCode": Candidate.candidate_code,
+    "firstName": Candidate.first_name,
+    "middleName": Candidate.middle_name,
+    "lastName": Candidate.last_name,
+    "email": Candidate.email,
+    "phone": Candidate.phone,
+    "status": VerificationStatus.name,
+    "score": Candidate.score,
+    "identityCheck": Candidate.identity_check,
+    "employmentCheck": Candidate.employment_check,
+    "courtCheck": Candidate.court_check,
+    "amlCheck": Candidate.aml_check,
+    "bankAccountCheck": Candidate.bank_account_check,
+    "createdAt": Candidate.created_at,
+    "updatedAt": Candidate.updated_at,
+}
+
+# Top-level keys of the report detail payload, selectable with ?fields=
+REPORT_DETAIL_FIELDS = (
+    "id", "firstName", "lastName", "middleName", "phone", "email", "image", "candidateCode",
+    "score", "verificationStatus", "towTime", "lastAction", "gender", "dob", "fatherName",
+    "motherName", "maritalStatus", "alternatePhone", "uan", "nid", "address", "isFresher",
+    "educations", "employments", "bankAccount", "report", "updatedAt", "subscription", "services",
+)
+
+# Rows fetched per server-side cursor round trip, and rows per streamed chunk
+EXPORT_YIELD_PER = 1000
+EXPORT_CHUNK_ROWS = 500
+
+
+# Normalize backend status names to frontend-friendly ones
+# - None/UNKNOWN -> PENDING
+# - COMPLETED -> VERIFIED
+# - Keep SUBMITTED/IN_PROGRESS/REJECTED/REQUESTED as-is
+
+def normalize_status(status_name: str | None) -> str:
+    if not status_name or status_name.upper() == "UNKNOWN":
+        return "PENDING"
+    upper = status_name.upper()
+    if upper == "COMPLETED":
+        return "VERIFIED"
+    return upper
+
+
+def calculate_tow_time(candidate) -> str:
+    """Calculate Time of Work (TOW) based on employment history and verification time"""
+    try:
+        # Calculate work experience component (70% weight)
+        work_experience_score = 0
+        if candidate.employments and len(candidate.employments) > 0:
+            total_years = 0
+            for emp in candidate.employments:
+                if emp.starts_from:
+                    start_date = emp.starts_from
+                    end_date = emp.ends_at if emp.ends_at else datetime.utcnow().date()
+
+                    # Calculate years between start and end
+                    years = (end_date - start_date).days / 365.25
+                    total_years += years
+
+            # Convert years to percentage (assuming 10+ years = 100%)
+            if total_years >= 10:
+                work_experience_score = 100
+            elif total_years <= 0:
+                work_experience_score = 0
+            else:
+                work_experience_score = int((total_years / 10) * 100)
+        else:
+            work_experience_score = 0
+
+        # Calculate verification time component (30% weight)
+        verification_time_score = 0
+        if candidate.created_at:
+            # Calculate days since candidate was created
+            days_since_creation = (datetime.utcnow().date() - candidate.created_at.date()).days
+
+            # If verification completed within 7 days = 100%, if > 30 days = 0%
+            if days_since_creation <= 7:
+                verification_time_score = 100
+            elif days_since_creation >= 30:
+                verification_time_score = 0
+            else:
+                verification_time_score = int(((30 - days_since_creation) / 23) * 100)
+        else:
+            verification_time_score = 50  # Default if no creation date
+
+        # Calculate weighted average
+        final_score = int((work_experience_score * 0.7) + (verification_time_score * 0.3))
+
+        return f"{final_score}%"
+
+    except Exception as e:
+        print(f"Error calculating TOW time: {e}")
+        return "25%"  # Default fallback
+
+
+def status_filter(statuses: List[str]):
+    """Build a WHERE clause matching frontend (normalized) status names"""
+    clauses = []
+    for s in statuses:
+        upper = s.strip().upper()
+        if not upper:
+            continue
+        if upper == "PENDING":
+            clauses.append(or_(
+                Candidate.verification_status_id.is_(None),
+                VerificationStatus.name.in_(["PENDING", "UNKNOWN"])
+            ))
+        elif upper == "VERIFIED":
+            clauses.append(VerificationStatus.name.in_(["COMPLETED", "VERIFIED"]))
+        else:
+            clauses.append(VerificationStatus.name == upper)
+    return or_(*clauses) if clauses else None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against a strong ETag"""
+    if not if_none_match or not etag:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+class ReportService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _sort_column(self, field: str, entity=Candidate):
+        # Bare columns so ix_candidate_company_created / ix_candidate_company_score
+        # serve the seek; legacy rows without a score sort as NULL (last descending)
+        if field == "score":
+            return entity.score
+        return entity.created_at
+
+    def _report_list_query(
+        self,
+        company_id: int,
+        statuses: Optional[List[str]] = None,
+        min_score: Optional[int] = None,
+        max_score: Optional[int] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ):
+        """Company-scoped candidate query with the report list filters applied"""
+        query = self.db.query(Candidate).outerjoin(
+            VerificationStatus, Candidate.verification_status_id == VerificationStatus.id
+        ).filter(
+            Candidate.company_id == company_id,
+            Candidate.is_shadowed == False
+        )
+
+        if statuses:
+            clause = status_filter(statuses)
+            if clause is not None:
+                query = query.filter(clause)
+        if min_score is not None:
+            query = query.filter(Candidate.score >= min_score)
+        if max_score is not None:
+            query = query.filter(Candidate.score <= max_score)
+        if created_from is not None:
+            query = query.filter(Candidate.created_at >= created_from)
+        if created_to is not None:
+            query = query.filter(Candidate.created_at <= created_to)
+
+        return query
+
+    async def list_reports(
+        self,
+        company_id: int,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort: str = "-created_at",
+        statuses: Optional[List[str]] = None,
+        min_score: Optional[int] = None,
+        max_score: Optional[int] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one keyset page of report list items and the cursor for the next page"""
+        descending = sort.startswith("-")
+        field = sort.lstrip("-")
+        if field not in REPORT_SORT_FIELDS:
+            raise ValueError(f"Invalid sort field: {field}")
+
+        sort_col = self._sort_column(field)
+        query = self._report_list_query(
+            company_id, statuses, min_score, max_score, created_from, created_to
+        )
+
+        # The cursor only names the last row; its sort value is read back from
+        # the table so the seek compares against the stored value
+        anchor_sort, last_id = None, None
+        if cursor:
+            last_id = decode_id_cursor(cursor)
+            anchor_sort = select(self._sort_column(field, REPORT_ANCHOR)).where(
+                REPORT_ANCHOR.id == last_id, REPORT_ANCHOR.company_id == company_id
+            )
+
+        # Fetch one extra row to know whether another page exists
+        query = query.options(contains_eager(Candidate.verification_status))
+        candidates = keyset_page(
+            query, sort_col, Candidate.id, limit, descending,
+            anchor_sort=anchor_sort, last_id=last_id
+        )
+
+        has_more = len(candidates) > limit
+        candidates = candidates[:limit]
+
+        items = [
+            {
+                "id": c.id,
+                "firstName": c.first_name or "",
+                "lastName": c.last_name or "",
+                "phone": c.phone or "",
+                "email": c.email or "",
+                "image": c.image,
+                "createdAt": (c.created_at.isoformat() if c.created_at else datetime.utcnow().isoformat()),
+                "status": normalize_status(c.verification_status.name if c.verification_status else None),
+                # The stored score: the one the list is sorted and filtered by,
+                # and the one report detail and export show
+                "score": c.score,
+            }
+            for c in candidates
+        ]
+
+        next_cursor = None
+        if has_more and candidates:
+            next_cursor = encode_cursor([candidates[-1].id])
+
+        return items, next_cursor
+
+    def build_report_detail(self, c: Candidate) -> Dict[str, Any]:
+        """Build the report detail payload from a fully loaded candidate graph"""
+        # Build minimal structure matching frontend ReportDataModel
+        dob_str = c.dob.isoformat() if c.dob else (getattr(getattr(c, "aadhar_details", None), "dob", "") or "")
+        report = {
+            "identityData": {
+                "isApplicable": True,
+                "isIdentityVerified": True,
+                "impact": "Low",
+                "score": c.report_identity.score if getattr(c, "report_identity", None) and c.report_identity.score is not None else 100,
+                "weightage": 25,
+                "status": normalize_status(c.verification_status.name if c.verification_status else None),
+                "isAadharVerified": True,
+                "isDobVerified": True,
+                "isFatherNameVerified": True,
+                "isGenderVerified": True,
+                "isNameVerified": True,
+                "isPanVerified": True,
+                "currentAddressCheckScore": 100,
+                "permanentAddressCheckScore": 100,
+                "towTime": calculate_tow_time(c),  # Time of Work/Time on Work metric
+            },
+            "employmentData": {
+            "isApplicable": True,
+            "impact": "Low",
+            # ReportEmployment carries no verification status of its own
+            "status": normalize_status(None),
+            "towTime": calculate_tow_time(c),
+            "data": (
+                getattr(c.report_employment, "data", None)
+                if getattr(c, "report_employment", None)
+                else None
+            )
+            or (
+                (getattr(c.report_employment, "apis", {}) or {}).get("employment_history")
+                if getattr(c, "report_employment", None)
+                else None
+            )
+            or {"result": [], "status": 200, "message": "Verified"},
+        },
+
+
+
+            "courtData": {
+                "isApplicable": True,
+                "score": c.report_court_check.score if getattr(c, "report_court_check", None) and c.report_court_check.score is not None else 100,
+                "impact": "Low",
+                "weightage": 25,
+                "status": normalize_status(c.verification_status.name if c.verification_status else None),
+                "data": (getattr(c.report_court_check, "data", None) if getattr(c, "report_court_check", None) else None)
+                    or ((getattr(c.report_court_check, "apis", {}) or {}).get("court_search") if getattr(c, "report_court_check", None) else None)
+                    or {"total": 0, "status": 200, "pdfName": "", "cases": []},
+            },
+            "amlData": {
+                "isApplicable": True,
+                "score": (lambda: (
+                    (lambda aml_payload: (
+                        100 if (
+                            isinstance(aml_payload, dict)
+                            and (
+                                len((aml_payload.get("data") or {}).get("entitychecks") or aml_payload.get("entitychecks") or []) == 0
+                            )
+                            and (not ((aml_payload.get("data") or {}).get("Case_Outcome") or aml_payload.get("Case_Outcome") or {}))
+                        ) else 100 if aml_payload is None else (c.report_aml.score if getattr(c, "report_aml", None) and c.report_aml.score is not None else 100)
+                    ))(
+                        (((getattr(c.report_aml, "apis", {}) or {}).get("aml") or {}) if getattr(c, "report_aml", None) else {})
+                    )
+                ))(),
+                "impact": "Low",
+                "weightage": 25,
+                "status": normalize_status(c.verification_status.name if c.verification_status else None),
+                "data": {"Case_Outcome": {}, "entitychecks": []},
+            },
+            "bankAccountData": {
+                "isApplicable": True,
+                "impact": "Low",
+                "score": c.report_bank_account.score if getattr(c, "report_bank_account", None) and c.report_bank_account.score is not None else 100,
+                "weightage": 25,
+                "status": normalize_status(c.verification_status.name if c.verification_status else None),
+                "data": {
+                    "status": 200,
+                    "message": "Verified",
+                    "ifscInfo": {},
+                    "bankRefNo": "",
+                    "nameMatchScore": 100,
+                    "beneficiaryName": (
+                        # Use real beneficiary name from bank account (updated by external API)
+                        getattr(c.bank_account, "name", None) if getattr(c, "bank_account", None) else None
+                        # Fallback to report data if available
+                        or (getattr(c.report_bank_account, "data", {}).get("beneficiaryName") if getattr(c, "report_bank_account", None) else None)
+                        # Final fallback to candidate name
+                        or f"{c.first_name} {c.last_name or ''}".strip()
+                    ),
+                    "nameMatchStatus": "MATCHED",
+                    "verificationStatus": "VERIFIED",
+                },
+            },
+        }
+
+        response = {
+            "id": c.id,
+            "firstName": c.first_name or "",
+            "lastName": c.last_name or "",
+            "phone": c.phone or "",
+            "email": c.email or "",
+            "image": c.image,
+            "candidateCode": c.candidate_code,
+            "score": int(c.score) if c.score is not None else 100,
+            "verificationStatus": {"name": normalize_status(c.verification_status.name if c.verification_status else None)},
+            "towTime": calculate_tow_time(c),  # Time of Work/Time on Work metric
+            "bankAccount": {
+                "accountNo": getattr(c.bank_account, "account_no", None) if getattr(c, "bank_account", None) else None,
+                "ifsc": getattr(c.bank_account, "ifsc", None) if getattr(c, "bank_account", None) else None,
+            },
+            "lastAction": None,
+            "middleName": c.middle_name,
+            "gender": str(c.gender.name) if c.gender else "",
+            "dob": dob_str,
+            "fatherName": c.father_name or "",
+            "motherName": c.mother_name or "",
+            "maritalStatus": c.marital_status or "",
+            "alternatePhone": c.alternate_phone or "",
+            "uan": c.uan or "",
+            "nid": {
+                "photo": getattr(c.nid, "photo", "") if getattr(c, "nid", None) else "",
+                "aadhar": getattr(c.nid, "aadhar", "") if getattr(c, "nid", None) else "",
+                "pan": getattr(c.nid, "pan", "") if getattr(c, "nid", None) else "",
+                "passport": getattr(c.nid, "passport", "") if getattr(c, "nid", None) else "",
+                "aadharNo": getattr(c.nid, "aadhar_no", "") if getattr(c, "nid", None) else "",
+                "uanNo": getattr(c.nid, "uan_no", "") if getattr(c, "nid", None) else "",
+                "panNo": getattr(c.nid, "pan_no", "") if getattr(c, "nid", None) else "",
+            },
+            "address": [
+                {
+                    "inIndia": getattr(addr, "in_india", False),
+                    "houseNo": getattr(addr, "house_no", ""),
+                    "locality": getattr(addr, "locality", ""),
+                    "residencyName": getattr(addr, "residency_name", ""),
+                    "city": getattr(addr, "city", ""),
+                    "state": getattr(addr, "state", ""),
+                    "pincode": getattr(addr, "pincode", ""),  # This maps to pin_code in DB
+                    "landmark": getattr(addr, "landmark", ""),
+                    "residingFrom": addr.residing_from.isoformat() if getattr(addr, "residing_from", None) else "",
+                    "residencyProof": getattr(addr, "residency_proof", ""),
+                    "isCurrent": getattr(addr, "is_current", False),
+                }
+                for addr in (c.address or [])
+            ],
+            "isFresher": len(c.employments or []) == 0,
+            "educations": [
+                {
+                    "university": getattr(ed, "university", ""),
+                    "degree": getattr(ed, "degree", ""),
+                    "course": getattr(ed, "course", ""),
+                    "idNumber": getattr(ed, "id_number", ""),
+                    "grade": getattr(ed, "grade", ""),
+                    "college": getattr(ed, "college", ""),
+                    "country": getattr(ed, "country", ""),
+                    "state": getattr(ed, "state", ""),
+                    "city": getattr(ed, "city", ""),
+                    "markSheet": getattr(ed, "mark_sheet", ""),
+                    "certificate": getattr(ed, "certificate", ""),
+                }
+                for ed in (c.educations or [])
+            ],
+            "employments": [
+                {
+                    "company": getattr(emp, "company", ""),
+                    "designation": getattr(emp, "designation", ""),
+                    "city": getattr(emp, "city", ""),
+                    "phone": getattr(emp, "phone", ""),
+                    "email": getattr(emp, "email", ""),
+                    "address": getattr(emp, "address", ""),
+                    "employeeType": getattr(emp, "employee_type", ""),
+                    "department": getattr(emp, "department", ""),
+                    "startsFrom": emp.starts_from.isoformat() if getattr(emp, "starts_from", None) else "",
+                    "endsAt": emp.ends_at.isoformat() if getattr(emp, "ends_at", None) else "",
+                    "currentlyWorking": bool(getattr(emp, "currently_working", False)),
+                    "salary": getattr(emp, "salary", 0) or 0,
+                    "uan": getattr(emp, "uan", ""),
+                    "employeeCode": getattr(emp, "employee_code", ""),
+                    "band": getattr(emp, "band", ""),
+                    "remark": getattr(emp, "remark", ""),
+                }
+                for emp in (c.employments or [])
+            ],
+            "bankAccount": {
+                "accountNo": getattr(c.bank_account, "account_no", "") if c.bank_account else "",
+                "ifsc": getattr(c.bank_account, "ifsc", "") if c.bank_account else "",
+                "name": getattr(c.bank_account, "name", "") if c.bank_account else ""
+            },
+            "report": report,
+            # Fall back to created_at (not "now") so the snapshot ETag stays stable
+            "updatedAt": (c.updated_at or c.created_at or datetime.utcnow()).isoformat(),
+            "subscription": {"id": 1, "name": "Basic"},
+            "services": [],
+        }
+
+        return response
+
+    async def get_report_snapshot(self, candidate_id: int, company_id: int) -> Optional[ReportSnapshot]:
+        """Get the current report snapshot, building it if missing or generated on a previous day"""
+        snapshot = self.db.query(ReportSnapshot).filter(
+            ReportSnapshot.candidate_id == candidate_id,
+            ReportSnapshot.company_id == company_id
+        ).first()
+        # towTime depends on the current date, so snapshots only live for the day
+        if snapshot and snapshot.generated_at and snapshot.generated_at.date() == datetime.utcnow().date():
+            return snapshot
+        return await self.refresh_report_snapshot(candidate_id, company_id)
+
+    def _stored_snapshot(self, candidate_id: int) -> Optional[ReportSnapshot]:
+        return self.db.query(ReportSnapshot).filter(
+            ReportSnapshot.candidate_id == candidate_id
+        ).first()
+
+    async def refresh_report_snapshot(self, candidate_id: int, company_id: Optional[int] = None) -> Optional[ReportSnapshot]:
+        """Rebuild and store the serialized report; the version only moves when the content changed"""
+        candidate = await CandidateService(self.db).get_candidate_graph(candidate_id, company_id)
+        if not candidate:
+            return None
+
+        body = json.dumps(self.build_report_detail(candidate), default=str, separators=(",", ":"))
+        etag = f'"{hashlib.sha256(body.encode()).hexdigest()}"'
+
+        snapshot = self._stored_snapshot(candidate_id)
+        if not snapshot:
+            snapshot = ReportSnapshot(candidate_id=candidate_id, company_id=candidate.company_id, version=1)
+            self.db.add(snapshot)
+            try:
+                self.db.flush()
+            except IntegrityError:
+                # Another first viewer inserted it meanwhile; update theirs instead
+                self.db.rollback()
+                snapshot = self._stored_snapshot(candidate_id)
+        if snapshot.etag is not None and snapshot.etag != etag:
+            snapshot.version = (snapshot.version or 0) + 1
+
+        snapshot.etag = etag
+        snapshot.body = body
+        snapshot.generated_at = datetime.utcnow()
+        self.db.commit()
+        return snapshot
+
+
+def report_fields_etag(etag: str, fields: Optional[Set[str]]) -> str:
+    """ETag of a field-selected variant of a snapshot, distinct per field set"""
+    if fields is None:
+        return etag
+    variant = hashlib.sha256(",".join(sorted(fields)).encode()).hexdigest()[:12]
+    return f'{etag[:-1]}-{variant}"'
+
+
+def project_report_body(body: str, fields: Optional[Set[str]]) -> str:
+    """Trim a serialized report snapshot to the requested top-level fields"""
+    if fields is None:
+        return body
+    return json.dumps(select_fields(json.loads(body), fields), separators=(",", ":"))
+
+
+def _export_value(name: str, value: Any) -> Any:
+    if name == "status":
+        return normalize_status(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def parse_export_columns(columns: Optional[str]) -> List[str]:
+    """Validate a comma separated column list, defaulting to every export column"""
+    if not columns:
+        return list(EXPORT_COLUMNS)
+    names = [c.strip() for c in columns.split(",") if c.strip()]
+    unknown = [c for c in names if c not in EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown export columns: {', '.join(unknown)}")
+    return names
+
+
+def stream_report_export(
+    company_id: int,
+    columns: List[str],
+    fmt: str = "csv",
+    **filters,
+) -> Iterator[str]:
+    """Stream report rows as CSV or NDJSON straight from a server-side cursor.
+
+    Owns its session because the response body is produced after the request
+    dependencies (and their session) have been torn down.
+    """
+    db = SessionLocal()
+    try:
+        service = ReportService(db)
+        rows = service._report_list_query(company_id, **filters).with_entities(
+            *[EXPORT_COLUMNS[c] for c in columns]
+        ).order_by(
+            Candidate.created_at.desc(), Candidate.id.desc()
+        ).yield_per(EXPORT_YIELD_PER)
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if fmt == "csv" else None
+        if writer:
+            writer.writerow(columns)
+            # Send the header on its own so the client sees the first bytes immediately
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        pending = 0
+        for row in rows:
+            values = [_export_value(name, value) for name, value in zip(columns, row)]
+            if writer:
+                writer.writerow(["" if v is None else v for v in values])
+            else:
+                buffer.write(json.dumps(dict(zip(columns, values)), separators=(",", ":")))
+                buffer.write("\n")
+            pending += 1
+            if pending >= EXPORT_CHUNK_ROWS:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+
+        if pending:
+            yield buffer.getvalue()
+    finally:
+        db.close()
@@ -0,0 +1,142 @@
+# services/search_service.py
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import List, Optional, Iterable
+import re
+
+from models.candidate import Candidate, CandidateNid, CandidateSearch
+
+# Shortest PAN/UAN/phone tail that can be searched on its own
+MIN_SUFFIX_LENGTH = 4
+# Candidates (re)indexed per batch when rebuilding
+REINDEX_BATCH_SIZE = 1000
+
+_TOKEN_RE = re.compile(r"[\w@.+-]+", re.UNICODE)
+
+
+def _suffixes(value: Optional[str]) -> List[str]:
+    """All tails of an identifier down to MIN_SUFFIX_LENGTH, so suffix search becomes prefix search"""
+    value = re.sub(r"\W", "", value or "").lower()
+    return [value[i:] for i in range(1, len(value) - MIN_SUFFIX_LENGTH + 1)]
+
+
+def build_search_document(candidate: Candidate, nid: Optional[CandidateNid] = None) -> str:
+    """Build the text indexed for a candidate"""
+    phone_digits = re.sub(r"\D", "", candidate.phone or "")
+    email = (candidate.email or "").strip().lower()
+    pan = (getattr(nid, "pan_no", None) or "").strip().lower()
+    uan = (getattr(nid, "uan_no", None) or candidate.uan or "").strip().lower()
+
+    parts = [
+        candidate.first_name, candidate.middle_name, candidate.last_name,
+        email, email.split("@")[0] if email else None,
+        phone_digits, candidate.candidate_code,
+        pan, uan,
+    ]
+    parts += _suffixes(phone_digits) + _suffixes(pan) + _suffixes(uan)
+    return " ".join(p.strip().lower() for p in parts if p and p.strip())
+
+
+class CandidateSearchService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    @property
+    def dialect(self) -> str:
+        return self.db.get_bind().dialect.name
+
+    def index_candidate(self, candidate: Candidate) -> None:
+        """Insert or refresh the search document of one candidate (caller commits)"""
+        nid = self.db.query(CandidateNid).filter(CandidateNid.candidate_id == candidate.id).first()
+        self.db.merge(CandidateSearch(
+            candidate_id=candidate.id,
+            company_id=candidate.company_id,
+            document=build_search_document(candidate, nid),
+        ))
+
+    def index_candidates(self, candidates: Iterable[Candidate]) -> None:
+        """Replace the search documents of many candidates with two statements (caller commits)"""
+        candidates = list(candidates)
+        if not candidates:
+            return
+        ids = [c.id for c in candidates]
+        nids = {
+            n.candidate_id: n for n in
+            self.db.query(CandidateNid).filter(CandidateNid.candidate_id.in_(ids)).all()
+        }
+        self.db.query(CandidateSearch).filter(
+            CandidateSearch.candidate_id.in_(ids)
+        ).delete(synchronize_session=False)
+        self.db.bulk_insert_mappings(CandidateSearch, [
+            {
+                "candidate_id": c.id,
+                "company_id": c.company_id,
+                "document": build_search_document(c, nids.get(c.id)),
+            }
+            for c in candidates
+        ])
+
+    def rebuild_index(self, company_id: Optional[int] = None) -> int:
+        """Re-index every candidate (optionally of one company) in keyset batches"""
+        indexed = 0
+        last_id = 0
+        while True:
+            query = self.db.query(Candidate).filter(Candidate.id > last_id)
+            if company_id is not None:
+                query = query.filter(Candidate.company_id == company_id)
+            batch = query.order_by(Candidate.id).limit(REINDEX_BATCH_SIZE).all()
+            if not batch:
+                break
+            self.index_candidates(batch)
+            self.db.commit()
+            indexed += len(batch)
+            last_id = batch[-1].id
+            self.db.expunge_all()
+        return indexed
+
+    def _query_tokens(self, q: str) -> List[str]:
+        return [t.lower() for t in _TOKEN_RE.findall(q or "")][:8]
+
+    def search_ids(self, company_id: int, q: str, limit: int = 20) -> List[int]:
+        """Ranked candidate ids matching every query term as a prefix, scoped to the company.
+
+        Shadowed candidates are excluded in the same statement, before LIMIT, so
+        they never take a slot of the page.
+        """
+        tokens = self._query_tokens(q)
+        if not tokens:
+            return []
+
+        if self.dialect == "sqlite":
+            # Every term is a quoted phrase with a trailing prefix wildcard
+            match = " ".join('"{}"*'.format(t.replace('"', '""')) for t in tokens)
+            rows = self.db.execute(text(
+                "SELECT s.candidate_id FROM candidate_search_fts f "
+                "JOIN candidate_search s ON s.candidate_id = f.rowid "
+                "JOIN candidate c ON c.id = s.candidate_id "
+                "WHERE candidate_search_fts MATCH :match AND s.company_id = :company_id "
+                "AND NOT c.is_shadowed "
+                "ORDER BY f.rank LIMIT :limit"
+            ), {"match": match, "company_id": company_id, "limit": limit})
+        elif self.dialect == "mysql":
+            # ngram parser: each required phrase matches anywhere in the document
+            match = " ".join('+"{}"'.format(t.replace('"', "")) for t in tokens)
+            rows = self.db.execute(text(
+                "SELECT s.candidate_id FROM candidate_search s "
+                "JOIN candidate c ON c.id = s.candidate_id "
+                "WHERE MATCH(s.document) AGAINST (:match IN BOOLEAN MODE) AND s.company_id = :company_id "
+                "AND NOT c.is_shadowed "
+                "ORDER BY MATCH(s.document) AGAINST (:match IN BOOLEAN MODE) DESC LIMIT :limit"
+            ), {"match": match, "company_id": company_id, "limit": limit})
+        else:
+            query = self.db.query(CandidateSearch.candidate_id).join(
+                Candidate, Candidate.id == CandidateSearch.candidate_id
+            ).filter(
+                CandidateSearch.company_id == company_id,
+                Candidate.is_shadowed == False
+            )
+            for t in tokens:
+                query = query.filter(CandidateSearch.document.like(f"%{t}%"))
+            rows = query.limit(limit)
+
+        return [row[0] for row in rows]
@@ -0,0 +1,49 @@
+# tests/test_candidate_search.py
+# Candidate search on SQLite FTS5: shadowed candidates must not use up the
+# page before the list rows are read.
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Company, Candidate
+from services.candidate_service import CandidateService
+from services.search_service import CandidateSearchService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def test_shadowed_matches_do_not_shrink_the_page(db):
+    company = Company(code="SRCH", name="Search Co", credits=0)
+    db.add(company)
+    db.flush()
+    # Shadowed rows first, so they would fill a LIMIT applied before the filter
+    db.add_all([
+        Candidate(candidate_code=f"SRCH-{i}", first_name="Ravi", email=f"ravi{i}@example.com",
+                  company_id=company.id, is_shadowed=i < 5)
+        for i in range(8)
+    ])
+    db.commit()
+    company_id = company.id
+    search = CandidateSearchService(db)
+    search.rebuild_index(company_id)
+
+    ids = search.search_ids(company_id, "ravi", limit=3)
+    items = asyncio.run(CandidateService(db).get_candidate_rows(company_id, ids))
+
+    visible = {c.id for c in db.query(Candidate).filter(Candidate.is_shadowed == False)}
+    assert len(ids) == 3
+    assert set(ids) <= visible
+    assert [item["id"] for item in items] == ids
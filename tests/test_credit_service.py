@@ -0,0 +1,78 @@
+# tests/test_credit_service.py
+# Credit changes are conditional UPDATEs with a ledger row each: concurrent
+# reservations never overdraw the balance, and every change is accounted for.
+
+import threading
+
+import pytest
+
+from models import Company
+from models.company import CreditLedger
+from services.credit_service import CreditService
+
+
+def seed(session_factory, credits: int) -> int:
+    with session_factory() as db:
+        company = Company(code="CRED", name="Credit Co", credits=credits)
+        db.add(company)
+        db.commit()
+        return company.id
+
+
+def test_concurrent_reservations_never_overdraw(session_factory):
+    company_id = seed(session_factory, credits=10)
+    start = threading.Barrier(20)
+    results = []
+
+    def reserve(n: int):
+        with session_factory() as db:
+            start.wait()
+            reserved = CreditService(db).reserve(company_id, 1, "candidate", f"worker-{n}")
+            db.commit()
+            results.append(reserved)
+
+    threads = [threading.Thread(target=reserve, args=(n,)) for n in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results.count(True) == 10 and results.count(False) == 10
+    with session_factory() as db:
+        assert db.get(Company, company_id).credits == 0
+        ledger = db.query(CreditLedger).filter(CreditLedger.company_id == company_id).all()
+        # One row per successful reservation, each with the balance it produced
+        assert len(ledger) == 10
+        assert {l.delta for l in ledger} == {-1}
+        assert sorted(l.balance_after for l in ledger) == list(range(10))
+
+
+def test_ledger_records_grants_adjustments_and_reservations(session_factory):
+    company_id = seed(session_factory, credits=5)
+    with session_factory() as db:
+        service = CreditService(db)
+        assert service.reserve(company_id, 3, "candidate", "a@example.com")
+        assert not service.reserve(company_id, 3, "candidate", "b@example.com")
+        assert service.grant(company_id, 1, "release", "a@example.com")
+        service.set_balance(company_id, 20, "admin")
+        db.commit()
+
+        ledger = db.query(CreditLedger).order_by(CreditLedger.id).all()
+        assert [(l.delta, l.balance_after, l.reason, l.reference) for l in ledger] == [
+            (-3, 2, "candidate", "a@example.com"),
+            (1, 3, "release", "a@example.com"),
+            (17, 20, "admin", None),
+        ]
+
+
+def test_non_positive_changes_are_rejected(session_factory):
+    company_id = seed(session_factory, credits=5)
+    with session_factory() as db:
+        service = CreditService(db)
+        for change in (lambda: service.grant(company_id, 0, "topup"),
+                       lambda: service.grant(company_id, -5, "topup"),
+                       lambda: service.reserve(company_id, -1, "usage")):
+            with pytest.raises(ValueError):
+                change()
+        assert db.get(Company, company_id).credits == 5
+        assert db.query(CreditLedger).count() == 0
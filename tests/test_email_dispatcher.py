@@ -0,0 +1,135 @@
+# tests/test_email_dispatcher.py
+# The email outbox dispatcher against a fake SMTP pool: failed sends retry with
+# exponential backoff until dead-lettered, and the rate limiter pushes sends
+# back without spending their attempts.
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+import services.email_dispatcher as email_dispatcher
+from config import settings
+from models.email_outbox import EmailOutbox, EmailOutboxStatus
+from services.email_dispatcher import EmailDispatcher
+
+
+class FakePool:
+    """Records delivered recipients; sends to ``failing`` addresses raise"""
+
+    def __init__(self):
+        self.failing = set()
+        self.sent = []
+
+    async def send(self, msg):
+        if msg["To"] in self.failing:
+            raise ConnectionError("450 mailbox busy")
+        self.sent.append(msg["To"])
+
+
+@pytest.fixture
+def pool(session_factory, monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(email_dispatcher, "SessionLocal", session_factory)
+    monkeypatch.setattr(email_dispatcher, "get_smtp_pool", lambda: pool)
+    monkeypatch.setattr(settings, "EMAIL_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "EMAIL_RETRY_BASE_SECONDS", 30)
+    monkeypatch.setattr(settings, "EMAIL_RETRY_MAX_SECONDS", 3600)
+    return pool
+
+
+def queue(session_factory, *recipients: str) -> None:
+    with session_factory() as db:
+        db.add_all([
+            EmailOutbox(to_email=to, subject="Verify your details", text_body="Hello",
+                        next_attempt_at=datetime.utcnow() - timedelta(seconds=1))
+            for to in recipients
+        ])
+        db.commit()
+
+
+def rows(session_factory):
+    with session_factory() as db:
+        return db.query(EmailOutbox).order_by(EmailOutbox.id).all()
+
+
+def make_due(session_factory) -> None:
+    with session_factory() as db:
+        db.execute(update(EmailOutbox).values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.commit()
+
+
+def test_failed_sends_back_off_then_dead_letter(session_factory, pool):
+    queue(session_factory, "asha@example.com")
+    pool.failing.add("asha@example.com")
+    dispatcher = EmailDispatcher()
+
+    for attempt, base_delay in ((1, 30), (2, 60)):
+        before = datetime.utcnow()
+        assert asyncio.run(dispatcher.dispatch_once()) == 1
+        [row] = rows(session_factory)
+        assert row.status == EmailOutboxStatus.PENDING and row.attempts == attempt
+        assert row.last_error == "ConnectionError: 450 mailbox busy"
+        # Exponential delay plus up to 20% jitter
+        delay = (row.next_attempt_at - before).total_seconds()
+        assert base_delay <= delay <= base_delay * 1.2 + 1
+        assert asyncio.run(dispatcher.dispatch_once()) == 0
+        make_due(session_factory)
+
+    assert asyncio.run(dispatcher.dispatch_once()) == 1
+    [row] = rows(session_factory)
+    assert row.status == EmailOutboxStatus.DEAD and row.attempts == 3 and row.locked_at is None
+
+    # Dead rows are never picked up again, even once due
+    make_due(session_factory)
+    assert asyncio.run(dispatcher.dispatch_once()) == 0
+    assert pool.sent == []
+
+
+def test_domain_rate_limit_defers_without_spending_attempts(session_factory, pool, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_DOMAIN_RATE_PER_MINUTE", 30)
+    monkeypatch.setattr(settings, "EMAIL_DOMAIN_BURST", 2)
+    queue(session_factory, *[f"user{i}@example.com" for i in range(5)], "ravi@other.org")
+    dispatcher = EmailDispatcher()
+
+    before = datetime.utcnow()
+    assert asyncio.run(dispatcher.dispatch_once()) == 3
+
+    assert sorted(pool.sent) == ["ravi@other.org", "user0@example.com", "user1@example.com"]
+    deferred = [r for r in rows(session_factory) if r.status == EmailOutboxStatus.PENDING]
+    assert [r.to_email for r in deferred] == ["user2@example.com", "user3@example.com", "user4@example.com"]
+    assert all(r.attempts == 0 and r.last_error is None for r in deferred)
+    # Spread over the next token arrivals (one every 2s) instead of retrying together
+    delays = [(r.next_attempt_at - before).total_seconds() for r in deferred]
+    assert delays == sorted(delays)
+    assert [round(d) for d in delays] == [2, 4, 6]
+
+
+def test_daily_quota_counts_only_successful_sends(session_factory, pool, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_SENDER_DAILY_QUOTA", 1)
+    queue(session_factory, "asha@example.com", "ravi@example.com")
+    pool.failing.add("asha@example.com")
+    dispatcher = EmailDispatcher()
+
+    # The in-flight send holds the quota, so the second row waits for tomorrow
+    assert asyncio.run(dispatcher.dispatch_once()) == 1
+    asha, ravi = rows(session_factory)
+    assert asha.attempts == 1 and ravi.attempts == 0
+    assert ravi.next_attempt_at.date() == datetime.utcnow().date() + timedelta(days=1)
+
+    # The failure gave its quota back: the retry is admitted and succeeds
+    pool.failing.clear()
+    with session_factory() as db:
+        db.execute(update(EmailOutbox).where(EmailOutbox.id == asha.id).values(
+            next_attempt_at=datetime.utcnow() - timedelta(seconds=1)
+        ))
+        db.commit()
+    assert asyncio.run(dispatcher.dispatch_once()) == 1
+    assert pool.sent == ["asha@example.com"]
+
+    # Now the day's quota is used up
+    make_due(session_factory)
+    assert asyncio.run(dispatcher.dispatch_once()) == 0
+    asha, ravi = rows(session_factory)
+    assert asha.status == EmailOutboxStatus.SENT and ravi.status == EmailOutboxStatus.PENDING
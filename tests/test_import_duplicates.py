@@ -0,0 +1,69 @@
+# tests/test_import_duplicates.py
+# Duplicate detection for bulk imports matches phones on the normalized,
+# indexed column whatever format the stored number was written in.
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Company, Candidate
+from schemas.candidate import CandidateCreate
+from services.import_service import CandidateImportService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def row(i: int, phone: str) -> CandidateCreate:
+    return CandidateCreate(first_name=f"First{i}", phone=phone, email=f"row{i}@example.com")
+
+
+def test_stored_phone_formats_match_and_empty_phones_do_not(db):
+    company = Company(code="DUP", name="Dup Co", credits=0)
+    db.add(company)
+    db.flush()
+    db.add_all([
+        Candidate(candidate_code="DUP-1", company_id=company.id, email="a@example.com",
+                  phone="+91 98765-43210", is_shadowed=False),
+        Candidate(candidate_code="DUP-2", company_id=company.id, email="b@example.com",
+                  phone="not provided", is_shadowed=False),
+    ])
+    db.commit()
+    assert db.query(Candidate.phone_normalized).filter_by(candidate_code="DUP-1").scalar() == "9876543210"
+    assert db.query(Candidate.phone_normalized).filter_by(candidate_code="DUP-2").scalar() is None
+
+    unique, duplicates = CandidateImportService(db).find_duplicates([
+        (2, row(2, "09876543210")),
+        (3, row(3, "unknown phone")),
+        (4, row(4, "no phone yet")),
+        (5, row(5, "(987) 000-1111")),
+        (6, row(6, "987-000-1111")),
+    ], company.id)
+
+    assert [number for number, _ in unique] == [3, 4, 5]
+    assert duplicates == [
+        {"row": 2, "error": "Duplicate: phone 9876543210 already exists"},
+        {"row": 6, "error": "Duplicate: phone 9870001111 repeats row 5"},
+    ]
+
+
+def test_imported_rows_store_the_normalized_phone(db):
+    company = Company(code="IMP", name="Import Co", credits=0)
+    db.add(company)
+    db.commit()
+
+    service = CandidateImportService(db)
+    service._insert_candidates([(2, row(2, "+91-98765 43210")), (3, row(3, "no phone yet"))], company.id)
+    db.commit()
+
+    stored = dict(db.query(Candidate.email, Candidate.phone_normalized).all())
+    assert stored == {"row2@example.com": "9876543210", "row3@example.com": None}
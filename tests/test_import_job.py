@@ -0,0 +1,140 @@
+# tests/test_import_job.py
+# Candidate import jobs end to end: chunked inserts with duplicate and row
+# errors, per-chunk credits, the error CSV, and a stale job resumed by a new
+# runner while the old one is fenced off by its runner_token.
+
+import asyncio
+import io
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+import services.import_service as import_service
+from config import settings
+from models import Company, Candidate
+from models.company import CreditLedger
+from models.import_job import ImportJob, ImportJobStatus
+from services.import_service import (
+    CandidateImportService, ImportJobLost, iter_chunks, iter_file_rows, run_import_job, stream_import_errors,
+)
+
+CSV = (
+    "first_name,phone,email\n"
+    "Asha,9876500001,asha@example.com\n"            # 2: new
+    "Dup,9876500002,Existing@Example.com\n"         # 3: email already stored
+    ",9876500003,nameless@example.com\n"            # 4: invalid
+    "Ravi,+91 99999-00000,ravi@example.com\n"       # 5: phone already stored
+    "Asha Again,9876500006,asha@example.com\n"      # 6: same email as row 2
+    "Meera,9876500007,meera@example.com\n"          # 7: new
+)
+
+
+@pytest.fixture
+def env(session_factory, tmp_path, monkeypatch):
+    monkeypatch.setattr(import_service, "SessionLocal", session_factory)
+    monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(settings, "IMPORT_UPLOAD_DIR", str(tmp_path / "imports"))
+    with session_factory() as db:
+        company = Company(code="IMP", name="Import Co", credits=10)
+        db.add(company)
+        db.flush()
+        db.add(Candidate(candidate_code="IMP-0", first_name="Old", email="existing@example.com",
+                         phone="09999900000", company_id=company.id, is_shadowed=False))
+        db.commit()
+        return session_factory, company.id
+
+
+def create_job(db, company_id: int) -> ImportJob:
+    service = CandidateImportService(db)
+    return asyncio.run(service.create_job(company_id, None, "candidates.csv", io.BytesIO(CSV.encode())))
+
+
+def test_import_job_end_to_end(env):
+    session_factory, company_id = env
+    with session_factory() as db:
+        job = create_job(db, company_id)
+        job_id, path = job.id, job.file_path
+    assert os.path.exists(path)
+
+    run_import_job(job_id)
+
+    with session_factory() as db:
+        job = db.get(ImportJob, job_id)
+        assert job.status == ImportJobStatus.COMPLETED
+        assert (job.processed_rows, job.inserted_rows, job.duplicate_rows, job.failed_rows) == (6, 2, 3, 1)
+        assert job.last_row == 7 and job.runner_token is None
+        emails = {c.email for c in db.query(Candidate).filter(Candidate.company_id == company_id)}
+        assert emails == {"existing@example.com", "asha@example.com", "meera@example.com"}
+        # Charged per chunk for inserted rows only; the all-rejected chunk writes no ledger row
+        assert db.get(Company, company_id).credits == 8
+        ledger = db.query(CreditLedger).order_by(CreditLedger.id).all()
+        assert [(l.delta, l.balance_after, l.reason, l.reference) for l in ledger] == [
+            (-1, 9, "import", f"import_job:{job_id}"),
+            (-1, 8, "import", f"import_job:{job_id}"),
+        ]
+    assert not os.path.exists(path)
+
+    assert "".join(stream_import_errors(job_id)).splitlines() == [
+        "row,error",
+        "3,Duplicate: email existing@example.com already exists",
+        "4,first_name: Field required",
+        "5,Duplicate: phone 9999900000 already exists",
+        # Row 2 was committed with an earlier chunk
+        "6,Duplicate: email asha@example.com already exists",
+    ]
+
+
+def test_chunk_without_credits_fails_the_job_and_keeps_committed_chunks(env):
+    session_factory, company_id = env
+    with session_factory() as db:
+        db.execute(update(Company).where(Company.id == company_id).values(credits=1))
+        db.commit()
+        job_id = create_job(db, company_id).id
+
+    run_import_job(job_id)
+
+    with session_factory() as db:
+        job = db.get(ImportJob, job_id)
+        # Chunk 1 used the only credit; chunk 2 inserted nothing; chunk 3 could not pay
+        assert job.status == ImportJobStatus.FAILED
+        assert job.last_row == 5 and job.inserted_rows == 1
+        assert "Not enough credits" in job.error
+        assert db.query(Candidate).filter(Candidate.email == "meera@example.com").count() == 0
+
+
+def test_stale_job_resumes_on_a_new_runner_and_fences_the_old_one(env):
+    session_factory, company_id = env
+    with session_factory() as db:
+        job_id = create_job(db, company_id).id
+
+    old_db = session_factory()
+    old = CandidateImportService(old_db)
+    job = old.claim_job(job_id)
+    chunks = iter_chunks(iter_file_rows(job.file_path), settings.IMPORT_CHUNK_SIZE)
+    old.process_chunk(job, next(chunks))
+
+    # The old runner stalls: no heartbeat for longer than the stale window
+    with session_factory() as db:
+        db.execute(update(ImportJob).where(ImportJob.id == job_id).values(
+            heartbeat_at=datetime.utcnow() - timedelta(seconds=settings.IMPORT_JOB_STALE_SECONDS + 60)
+        ))
+        db.commit()
+        assert asyncio.run(CandidateImportService(db).requeue_job(db.get(ImportJob, job_id)))
+
+    run_import_job(job_id)
+
+    # The old runner wakes up: its next chunk and its outcome are both rejected
+    with pytest.raises(ImportJobLost):
+        old.process_chunk(job, next(chunks))
+    assert old.finish_job(job, ImportJobStatus.FAILED, "late") is False
+    old_db.close()
+
+    with session_factory() as db:
+        job = db.get(ImportJob, job_id)
+        assert job.status == ImportJobStatus.COMPLETED and job.error is None
+        assert (job.processed_rows, job.inserted_rows, job.duplicate_rows, job.failed_rows) == (6, 2, 3, 1)
+        assert db.query(Candidate).filter(Candidate.email == "asha@example.com").count() == 1
+        assert db.query(Candidate).filter(Candidate.email == "meera@example.com").count() == 1
+        assert db.get(Company, company_id).credits == 8
@@ -0,0 +1,122 @@
+# tests/test_keyset_pagination.py
+# Walks GET /candidate and /admin/reports pages end to end on SQLite, where
+# created_at is stored as text and ties on the sort column are common.
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Company, Candidate
+from services.candidate_service import CandidateService
+from services.report_service import ReportService
+from utils.pagination import encode_cursor, decode_id_cursor
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def seed(db, rows: int = 53) -> int:
+    company = Company(code="PAGE", name="Paging Co", credits=0)
+    other = Company(code="OTHER", name="Other Co", credits=0)
+    db.add_all([company, other])
+    db.flush()
+    # created_at comes from the server default, stored by SQLite as
+    # 'YYYY-MM-DD HH:MM:SS' text, exactly like rows created through the API
+    db.bulk_insert_mappings(Candidate, [
+        {
+            "candidate_code": f"PAGE-{i:04d}",
+            "first_name": f"First{i}",
+            "email": f"candidate{i}@example.com",
+            "company_id": company.id,
+            "is_shadowed": False,
+            "score": i % 4,
+        }
+        for i in range(rows)
+    ] + [
+        {"candidate_code": "SHADOW", "company_id": company.id, "is_shadowed": True},
+        {"candidate_code": "OTHER", "company_id": other.id, "is_shadowed": False},
+    ])
+    # Groups of five share a timestamp; a few legacy rows have none
+    db.execute(text(
+        "UPDATE candidate SET created_at = CASE WHEN id % 17 = 0 THEN NULL "
+        "ELSE datetime(created_at, '-' || (id / 5) || ' seconds') END"
+    ))
+    db.commit()
+    return company.id
+
+
+def walk(fetch):
+    ids, cursor = [], None
+    for _ in range(100):
+        items, cursor = asyncio.run(fetch(cursor))
+        ids.extend(item["id"] for item in items)
+        if cursor is None:
+            return ids
+    pytest.fail("pagination did not terminate")
+
+
+def expected_ids(db, company_id: int):
+    return {
+        c.id for c in db.query(Candidate).filter(
+            Candidate.company_id == company_id, Candidate.is_shadowed == False
+        )
+    }
+
+
+def test_candidate_pages_cover_every_row_once(db):
+    company_id = seed(db)
+    service = CandidateService(db)
+
+    ids = walk(lambda cursor: service.get_candidates(company_id, 7, cursor))
+
+    assert len(ids) == len(set(ids))
+    assert set(ids) == expected_ids(db, company_id)
+
+
+@pytest.mark.parametrize("sort", ["-created_at", "created_at", "-score", "score"])
+def test_report_pages_cover_every_row_once(db, sort):
+    company_id = seed(db)
+    service = ReportService(db)
+
+    ids = walk(lambda cursor: service.list_reports(company_id, limit=6, cursor=cursor, sort=sort))
+
+    assert len(ids) == len(set(ids))
+    assert set(ids) == expected_ids(db, company_id)
+
+
+@pytest.mark.parametrize("values", [[1, 2], ["2024-01-01", 1], [True], [0], ["1"], [None], []])
+def test_malformed_cursor_is_rejected(values):
+    with pytest.raises(ValueError):
+        decode_id_cursor(encode_cursor(values))
+
+
+def test_garbage_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_id_cursor("not a cursor!")
+
+
+def test_report_score_sort_and_filter_use_the_displayed_score(db):
+    company_id = seed(db)
+    service = ReportService(db)
+
+    scores = []
+    cursor = None
+    while True:
+        items, cursor = asyncio.run(service.list_reports(company_id, limit=6, cursor=cursor, sort="-score", min_score=2))
+        scores.extend(item["score"] for item in items)
+        if cursor is None:
+            break
+
+    assert scores == sorted(scores, reverse=True)
+    assert scores and all(score >= 2 for score in scores)
@@ -0,0 +1,78 @@
+# tests/test_list_responses.py
+# The list endpoints return plain dicts validated and serialized by their
+# response_model, so the documented schema is the one actually served.
+
+import warnings
+
+import pytest
+from fastapi.exceptions import FastAPIDeprecationWarning
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from main import app
+from models import Base, Company, Candidate
+from models.database import get_db
+from dependencies.auth import get_current_company_context, Principal
+from services.search_service import CandidateSearchService
+
+
+@pytest.fixture
+def client():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        company = Company(code="LIST", name="List Co", credits=0)
+        db.add(company)
+        db.flush()
+        db.add_all([
+            Candidate(candidate_code=f"LIST-{i}", first_name="Meera", last_name=f"Rao{i}",
+                      email=f"meera{i}@example.com", phone=f"98765432{i:02d}",
+                      company_id=company.id, is_shadowed=False, score=i * 10)
+            for i in range(3)
+        ])
+        db.commit()
+        company_id = company.id
+        CandidateSearchService(db).rebuild_index(company_id)
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_company_context] = lambda: Principal(
+        user_id=1, email="admin@example.com", role="ADMIN", company_id=company_id
+    )
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+@pytest.mark.parametrize("path, key", [
+    ("/candidate?limit=2", "items"),
+    ("/candidate/search?q=meera", "items"),
+    ("/admin/reports?limit=2&sort=-score", "reports"),
+])
+def test_list_endpoints_serve_their_response_model(client, path, key):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", FastAPIDeprecationWarning)
+        response = client.get(path)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body[key]
+    assert {"id", "email"} <= set(body[key][0])
+
+
+def test_report_list_shows_the_stored_score(client):
+    body = client.get("/admin/reports?sort=-score").json()
+
+    assert [r["score"] for r in body["reports"]] == [20, 10, 0]
+    assert body["next"] is None
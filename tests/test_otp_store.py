@@ -0,0 +1,90 @@
+# tests/test_otp_store.py
+# The OTP attempt budget and expiry belong to the email, not the code:
+# re-requesting a code must not reset either, and codes per window are capped.
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import dependencies.auth as auth
+from config import settings
+from main import app
+from utils.otp_store import InMemoryOtpStore, OtpResult
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def store(clock, **limits) -> InMemoryOtpStore:
+    return InMemoryOtpStore("secret", ttl=300, clock=clock, **limits)
+
+
+def test_reissue_keeps_the_attempt_budget(clock):
+    otp = store(clock, max_attempts=3)
+
+    async def scenario():
+        assert await otp.issue("a@example.com", "111111")
+        assert await otp.verify_and_consume("a@example.com", "000000") == OtpResult.INVALID
+        assert await otp.verify_and_consume("a@example.com", "000001") == OtpResult.INVALID
+        # A fresh code, but only the one attempt left over from the first
+        assert await otp.issue("a@example.com", "222222")
+        assert await otp.verify_and_consume("a@example.com", "000002") == OtpResult.LOCKED
+        # Locked: the right code is refused and no new code can be issued
+        assert await otp.verify_and_consume("a@example.com", "222222") == OtpResult.LOCKED
+        assert not await otp.issue("a@example.com", "333333")
+        # Other emails are unaffected
+        assert await otp.issue("b@example.com", "444444")
+
+        clock.now += 301
+        assert await otp.issue("a@example.com", "555555")
+        assert await otp.verify_and_consume("a@example.com", "555555") == OtpResult.OK
+        assert await otp.verify_and_consume("a@example.com", "555555") == OtpResult.MISSING
+
+    asyncio.run(scenario())
+
+
+def test_reissue_keeps_the_original_expiry(clock):
+    otp = store(clock)
+
+    async def scenario():
+        assert await otp.issue("a@example.com", "111111")
+        clock.now += 200
+        assert await otp.issue("a@example.com", "222222")
+        clock.now += 101
+        assert await otp.verify_and_consume("a@example.com", "222222") == OtpResult.MISSING
+
+    asyncio.run(scenario())
+
+
+def test_issues_per_window_are_limited(clock):
+    otp = store(clock, max_issues=3)
+
+    async def scenario():
+        assert [await otp.issue("a@example.com", f"{i:06d}") for i in range(4)] == [True, True, True, False]
+        # The last issued code still works
+        assert await otp.verify_and_consume("a@example.com", "000002") == OtpResult.OK
+        clock.now += 301
+        assert await otp.issue("a@example.com", "999999")
+
+    asyncio.run(scenario())
+
+
+def test_request_endpoint_returns_429_past_the_issue_limit(clock, monkeypatch):
+    monkeypatch.setattr(auth, "_otp_store", store(clock, max_issues=2))
+    client = TestClient(app)
+
+    responses = [client.post("/accounts/otp/request", json={"email": "A@example.com"}) for _ in range(3)]
+
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert responses[-1].headers["Retry-After"] == str(settings.OTP_TTL_SECONDS)
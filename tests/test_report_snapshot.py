@@ -0,0 +1,72 @@
+# tests/test_report_snapshot.py
+# Report snapshots: building one reads only the eager-loaded graph, and two
+# first viewers refreshing the same report do not collide on its unique row.
+
+import asyncio
+
+from sqlalchemy import event
+
+from models import Company, Candidate
+from models.verification import ReportEmployment, ReportSnapshot
+from services.candidate_service import CandidateService
+from services.report_service import ReportService
+
+
+def seed(db) -> int:
+    company = Company(code="SNAP", name="Snapshot Co", credits=0)
+    db.add(company)
+    db.flush()
+    candidate = Candidate(candidate_code="SNAP-1", first_name="Asha", email="asha@example.com",
+                          phone="9876543210", company_id=company.id, is_shadowed=False)
+    db.add(candidate)
+    db.flush()
+    db.add(ReportEmployment(candidate_id=candidate.id, data={"result": [], "status": 200}))
+    db.commit()
+    return candidate.id
+
+
+def test_building_the_report_issues_no_further_queries(session_factory):
+    db = session_factory()
+    candidate_id = seed(db)
+    db.expire_all()
+
+    candidate = asyncio.run(CandidateService(db).get_candidate_graph(candidate_id))
+    statements = []
+    engine = db.get_bind()
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        ReportService(db).build_report_detail(candidate)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+        db.close()
+
+    assert statements == []
+
+
+def test_concurrent_first_refresh_updates_the_winning_snapshot(session_factory, monkeypatch):
+    with session_factory() as db:
+        candidate_id = seed(db)
+
+    original = ReportService._stored_snapshot
+    raced = []
+
+    def stored_snapshot(self, candidate_id):
+        if not raced:
+            # The other first viewer commits its snapshot between our read and insert
+            raced.append(True)
+            with session_factory() as other:
+                other.add(ReportSnapshot(candidate_id=candidate_id, version=1, etag='"stale"', body="{}"))
+                other.commit()
+            return None
+        return original(self, candidate_id)
+
+    monkeypatch.setattr(ReportService, "_stored_snapshot", stored_snapshot)
+    with session_factory() as db:
+        snapshot = asyncio.run(ReportService(db).refresh_report_snapshot(candidate_id))
+        assert snapshot.etag != '"stale"'
+        assert snapshot.version == 2
+
+    with session_factory() as db:
+        stored = db.query(ReportSnapshot).filter(ReportSnapshot.candidate_id == candidate_id).all()
+        assert [(s.etag, s.version) for s in stored] == [(snapshot.etag, 2)]
@@ -0,0 +1,68 @@
+# tests/test_token_revocation.py
+# Revoking a user's tokens drops the cached token version only once the bump
+# commits: a request racing the revocation cannot re-cache the old version,
+# and a rolled-back revocation leaves the token working.
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+import dependencies.auth as auth
+from dependencies.auth import create_user_access_token, get_current_principal, revoke_user_tokens
+from models import Company
+from models.user import User, Role, CompanyUser
+
+
+@pytest.fixture
+def token(session_factory):
+    auth._token_version_cache.clear()
+    auth._verified_token_cache.clear()
+    with session_factory() as db:
+        role = Role(name="HR")
+        company = Company(code="AUTH", name="Auth Co", credits=0)
+        db.add_all([role, company])
+        db.flush()
+        user = User(email="hr@example.com", role=role.id, is_shadowed=False)
+        db.add(user)
+        db.flush()
+        db.add(CompanyUser(company_id=company.id, user_id=user.id))
+        db.commit()
+        yield user.id, create_user_access_token(db, user)
+    auth._token_version_cache.clear()
+    auth._verified_token_cache.clear()
+
+
+def authenticate(session_factory, token: str):
+    with session_factory() as db:
+        return get_current_principal(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token), db)
+
+
+def test_revoked_token_is_rejected_once_the_revocation_commits(session_factory, token):
+    user_id, access_token = token
+    assert authenticate(session_factory, access_token).user_id == user_id
+
+    with session_factory() as db:
+        revoke_user_tokens(db, user_id)
+        # A concurrent request before the commit still sees, and caches, the old version
+        assert authenticate(session_factory, access_token).role == "HR"
+        db.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        authenticate(session_factory, access_token)
+    assert exc.value.status_code == 401 and exc.value.detail == "Token has been revoked"
+
+
+def test_rolled_back_revocation_keeps_the_token_working(session_factory, token):
+    user_id, access_token = token
+    assert authenticate(session_factory, access_token).user_id == user_id
+
+    with session_factory() as db:
+        revoke_user_tokens(db, user_id)
+        db.rollback()
+
+    assert authenticate(session_factory, access_token).user_id == user_id
+    # Not just the cache: the stored version is unchanged too
+    auth._token_version_cache.clear()
+    assert authenticate(session_factory, access_token).user_id == user_id
+    with session_factory() as db:
+        assert db.get(User, user_id).token_version == 0
@@ -0,0 +1,111 @@
+# tests/test_verified_token_cache.py
+# The verified-token cache skips repeated signature checks, but never past the
+# token's exp or the configured TTL, and never past a revocation.
+
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+import dependencies.auth as auth
+from config import settings
+from dependencies.auth import create_access_token, create_user_access_token, get_current_principal, revoke_user_tokens
+from models import Company
+from models.user import User, Role, CompanyUser
+from utils.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(auth, "_verified_token_cache", TTLCache(ttl=settings.VERIFIED_TOKEN_CACHE_TTL_SECONDS, clock=clock))
+    auth._token_version_cache.clear()
+    yield clock
+    auth._token_version_cache.clear()
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    calls = []
+    decode_token = auth.decode_token
+
+    def counting(token):
+        calls.append(token)
+        return decode_token(token)
+
+    monkeypatch.setattr(auth, "decode_token", counting)
+    return calls
+
+
+def test_cached_claims_expire_with_the_token(clock, decodes):
+    token = create_access_token({"sub": "7"}, expires_delta=timedelta(seconds=10))
+
+    assert auth.verify_token(token)["sub"] == "7"
+    assert auth.verify_token(token)["sub"] == "7"
+    assert len(decodes) == 1
+
+    # Past exp the entry is gone, so the token goes through the full check again
+    clock.now += 11
+    auth.verify_token(token)
+    assert len(decodes) == 2
+
+
+def test_cached_claims_expire_after_the_configured_ttl(clock, decodes):
+    token = create_access_token({"sub": "7"})
+
+    auth.verify_token(token)
+    clock.now += settings.VERIFIED_TOKEN_CACHE_TTL_SECONDS - 1
+    auth.verify_token(token)
+    assert len(decodes) == 1
+
+    clock.now += 2
+    auth.verify_token(token)
+    assert len(decodes) == 2
+
+
+def test_expired_tokens_are_rejected_and_not_cached(clock, decodes):
+    token = create_access_token({"sub": "7"}, expires_delta=timedelta(seconds=-1))
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            auth.verify_token(token)
+        assert exc.value.status_code == 401
+    assert len(decodes) == 2
+    assert len(auth._verified_token_cache) == 0
+
+
+def test_cached_claims_do_not_outlive_a_revocation(session_factory, clock, decodes):
+    with session_factory() as db:
+        role = Role(name="HR")
+        company = Company(code="VTC", name="Cache Co", credits=0)
+        db.add_all([role, company])
+        db.flush()
+        user = User(email="hr@example.com", role=role.id, is_shadowed=False)
+        db.add(user)
+        db.flush()
+        db.add(CompanyUser(company_id=company.id, user_id=user.id))
+        db.commit()
+        user_id, company_id = user.id, company.id
+        token = create_user_access_token(db, user)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    with session_factory() as db:
+        assert get_current_principal(credentials, db).company_id == company_id
+        revoke_user_tokens(db, user_id)
+        db.commit()
+
+    with session_factory() as db:
+        with pytest.raises(HTTPException) as exc:
+            get_current_principal(credentials, db)
+    assert exc.value.detail == "Token has been revoked"
+    # The signature check was still served from the cache; the version check caught it
+    assert len(decodes) == 1
@@ -0,0 +1,68 @@
+# tests/test_write_hooks.py
+# Post-write hooks (search index, report snapshot) never fail the write, but
+# their failures are logged with the traceback instead of vanishing.
+
+import asyncio
+import logging
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Company, Candidate
+from services.candidate_service import CandidateService
+from services.report_service import ReportService
+from services.search_service import CandidateSearchService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def seed(db) -> Candidate:
+    company = Company(code="HOOK", name="Hook Co", credits=0)
+    db.add(company)
+    db.flush()
+    candidate = Candidate(candidate_code="HOOK-1", first_name="Asha", email="asha@example.com",
+                          company_id=company.id, is_shadowed=False)
+    db.add(candidate)
+    db.commit()
+    return candidate
+
+
+def test_search_index_failure_is_logged(db, monkeypatch, caplog):
+    candidate = seed(db)
+
+    def broken(self, candidate):
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(CandidateSearchService, "index_candidate", broken)
+    with caplog.at_level(logging.ERROR, logger="services.candidate_service"):
+        asyncio.run(CandidateService(db).update_search_index(candidate))
+
+    [record] = caplog.records
+    assert record.getMessage() == f"Search index update failed for candidate {candidate.id}"
+    assert record.exc_info[1].args == ("index unavailable",)
+
+
+def test_report_snapshot_failure_is_logged(db, monkeypatch, caplog):
+    candidate_id = seed(db).id
+
+    async def broken(self, candidate_id, company_id=None):
+        raise RuntimeError("snapshot store unavailable")
+
+    monkeypatch.setattr(ReportService, "refresh_report_snapshot", broken)
+    with caplog.at_level(logging.ERROR, logger="services.candidate_service"):
+        asyncio.run(CandidateService(db).refresh_report_snapshot(candidate_id))
+
+    [record] = caplog.records
+    assert record.getMessage() == f"Report snapshot refresh failed for candidate {candidate_id}"
+    assert record.exc_info[1].args == ("snapshot store unavailable",)
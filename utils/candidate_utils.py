@@ -1,12 +1,22 @@
 import uuid
 import base64
 import hashlib
+import re
 from typing import Dict, Any
 
 def generate_candidate_code() -> str:
     """Generate unique candidate code"""
     return str(uuid.uuid4())
 
+def normalize_email(email: str) -> str:
+    """Normalized email used for duplicate detection"""
+    return (email or "").strip().lower()
+
+def normalize_phone(phone: str) -> str:
+    """Normalized phone used for duplicate detection: digits only, national number without +91/0 prefix"""
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-10:] if len(digits) > 10 else digits
+
 def encrypt_slug(id_str: str) -> str:
     """Encrypt ID to create slug"""
     # Simple base64 encoding for now
@@ -0,0 +1,104 @@
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from string import Template
+import html
+import os
+
+# Parts a template may have: <name>.subject, <name>.html, <name>.txt
+TEMPLATE_PARTS = ("subject", "html", "txt")
+
+RenderedEmail = Tuple[str, str, str]
+
+
+def compile_template(source: str) -> str:
+    """Turn ``$name``/``${name}`` placeholders into a str.format pattern.
+
+    Parsing happens once here; rendering is then a single format_map call
+    instead of a regex scan per recipient.
+    """
+    parts = []
+    last = 0
+    for match in Template.pattern.finditer(source):
+        parts.append(source[last:match.start()].replace("{", "{{").replace("}", "}}"))
+        named = match.group("named") or match.group("braced")
+        if named:
+            parts.append("{" + named + "}")
+        elif match.group("escaped") is not None:
+            parts.append("$")
+        else:
+            raise ValueError(f"Invalid placeholder in template at offset {match.start()}")
+        last = match.end()
+    parts.append(source[last:].replace("{", "{{").replace("}", "}}"))
+    return "".join(parts)
+
+
+class EmailTemplate:
+    def __init__(self, name: str, subject: str = "", html_body: str = "", text_body: str = ""):
+        self.name = name
+        self.subject = compile_template(subject.strip())
+        self.html = compile_template(html_body)
+        self.text = compile_template(text_body)
+
+    def render(self, context: Mapping[str, str], html_context: Optional[Mapping[str, str]] = None) -> RenderedEmail:
+        """Render (subject, html, text); html_context is the HTML-escaped context"""
+        if html_context is None:
+            html_context = escape_context(context)
+        return (
+            self.subject.format_map(context),
+            self.html.format_map(html_context) if self.html else "",
+            self.text.format_map(context) if self.text else "",
+        )
+
+    def render_batch(self, contexts: Iterable[Mapping[str, str]], shared: Optional[Mapping[str, str]] = None) -> List[RenderedEmail]:
+        """Render one email per context; ``shared`` values are merged and escaped only once"""
+        shared = dict(shared or {})
+        shared_html = escape_context(shared)
+        rendered = []
+        for context in contexts:
+            merged = {**shared, **context}
+            merged_html = {**shared_html, **escape_context(context)}
+            rendered.append(self.render(merged, merged_html))
+        return rendered
+
+
+def escape_context(context: Mapping[str, str]) -> Dict[str, str]:
+    return {key: html.escape(str(value)) for key, value in context.items()}
+
+
+class EmailTemplateRegistry:
+    """Compiled email templates, loaded from disk once and kept in memory"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._templates: Dict[str, EmailTemplate] = {}
+
+    def load(self) -> "EmailTemplateRegistry":
+        sources: Dict[str, Dict[str, str]] = {}
+        for filename in sorted(os.listdir(self.directory)):
+            name, _, part = filename.rpartition(".")
+            if not name or part not in TEMPLATE_PARTS:
+                continue
+            with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                sources.setdefault(name, {})[part] = f.read()
+
+        self._templates = {
+            name: EmailTemplate(
+                name,
+                subject=parts.get("subject", ""),
+                html_body=parts.get("html", ""),
+                text_body=parts.get("txt", ""),
+            )
+            for name, parts in sources.items()
+        }
+        return self
+
+    def get(self, name: str) -> EmailTemplate:
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise KeyError(f"Unknown email template: {name}")
+
+    def render(self, name: str, context: Mapping[str, str]) -> RenderedEmail:
+        return self.get(name).render(context)
+
+    def render_batch(self, name: str, contexts: Iterable[Mapping[str, str]], shared: Optional[Mapping[str, str]] = None) -> List[RenderedEmail]:
+        return self.get(name).render_batch(contexts, shared)
@@ -0,0 +1,20 @@
+# utils/fieldsets.py
+from typing import Any, Dict, Iterable, Optional, Set
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[Set[str]]:
+    """Parse a comma-separated ?fields= value; None means every field"""
+    if not fields:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested or None
+
+
+def select_fields(payload: Dict[str, Any], fields: Optional[Set[str]]) -> Dict[str, Any]:
+    """Keep only the requested top-level keys (the id is always kept)"""
+    if fields is None:
+        return payload
+    return {k: v for k, v in payload.items() if k in fields or k == "id"}
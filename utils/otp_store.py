@@ -0,0 +1,176 @@
+# utils/otp_store.py
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+import asyncio
+import enum
+import hashlib
+import hmac
+import time
+
+
+class OtpResult(enum.Enum):
+    OK = "OK"
+    INVALID = "INVALID"
+    # Never issued, expired or already used
+    MISSING = "MISSING"
+    # Wrong code with no attempts left; the OTP is gone
+    LOCKED = "LOCKED"
+
+
+class OtpStore(ABC):
+    """One-time codes with expiry and an attempt budget.
+
+    Codes are stored as keyed digests, never in clear. verify_and_consume is
+    atomic: a code can be used exactly once, and each wrong guess spends an
+    attempt. The budget belongs to the key, not the code: issuing a new code
+    replaces the old one but keeps the attempts left and the original expiry,
+    and a key may be issued at most ``max_issues`` codes per ``ttl`` window.
+    A key that ran out of attempts stays locked until the window ends.
+    """
+
+    def __init__(self, secret: str, ttl: int = 300, max_attempts: int = 5, max_issues: int = 5):
+        self.secret = secret.encode()
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.max_issues = max_issues
+
+    def digest(self, code: str) -> str:
+        return hmac.new(self.secret, code.encode(), hashlib.sha256).hexdigest()
+
+    @abstractmethod
+    async def issue(self, key: str, code: str) -> bool:
+        """Store a new code for the key; False if the key is locked or out of issues"""
+
+    @abstractmethod
+    async def verify_and_consume(self, key: str, code: str) -> OtpResult:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryOtpStore(OtpStore):
+    """Single-process store; codes are lost on restart"""
+
+    def __init__(self, secret: str, ttl: int = 300, max_attempts: int = 5, max_issues: int = 5, clock=time.monotonic):
+        super().__init__(secret, ttl, max_attempts, max_issues)
+        self._clock = clock
+        # key -> (digest, expires_at, attempts_left, issues_left); digest is None once locked
+        self._entries: Dict[str, Tuple[Optional[str], float, int, int]] = {}
+        self._lock = asyncio.Lock()
+
+    def _prune(self, now: float) -> None:
+        expired = [key for key, (_, expires_at, _, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+
+    async def issue(self, key: str, code: str) -> bool:
+        async with self._lock:
+            now = self._clock()
+            self._prune(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = (self.digest(code), now + self.ttl, self.max_attempts, self.max_issues - 1)
+                return True
+            _, expires_at, attempts_left, issues_left = entry
+            if attempts_left <= 0 or issues_left <= 0:
+                return False
+            self._entries[key] = (self.digest(code), expires_at, attempts_left, issues_left - 1)
+            return True
+
+    async def verify_and_consume(self, key: str, code: str) -> OtpResult:
+        async with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return OtpResult.MISSING
+            digest, expires_at, attempts_left, issues_left = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return OtpResult.MISSING
+            if digest is None:
+                return OtpResult.LOCKED
+            if hmac.compare_digest(digest, self.digest(code)):
+                del self._entries[key]
+                return OtpResult.OK
+            attempts_left -= 1
+            if attempts_left <= 0:
+                # Keep the entry so re-issuing can't reset the budget before it expires
+                self._entries[key] = (None, expires_at, 0, issues_left)
+                return OtpResult.LOCKED
+            self._entries[key] = (digest, expires_at, attempts_left, issues_left)
+            return OtpResult.INVALID
+
+
+# Replace the code but keep the key's attempt budget and expiry; only a new
+# key starts a window. Returns 1 issued, 0 refused (locked or out of issues).
+_ISSUE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    local attempts = tonumber(redis.call('HGET', KEYS[1], 'attempts'))
+    local issues = tonumber(redis.call('HGET', KEYS[1], 'issues'))
+    if attempts <= 0 or issues <= 0 then
+        return 0
+    end
+    redis.call('HSET', KEYS[1], 'digest', ARGV[1], 'issues', issues - 1)
+    return 1
+end
+redis.call('HSET', KEYS[1], 'digest', ARGV[1], 'attempts', ARGV[2], 'issues', tonumber(ARGV[3]) - 1)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+# Check and consume in one step so concurrent verifies can't both succeed or
+# both spend the same attempt. Returns 1 OK, 2 INVALID, 3 LOCKED, 0 MISSING.
+# A locked key keeps its hash with an empty digest until it expires.
+_VERIFY_SCRIPT = """
+local digest = redis.call('HGET', KEYS[1], 'digest')
+if not digest then
+    return 0
+end
+if digest == '' then
+    return 3
+end
+if digest == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+local left = redis.call('HINCRBY', KEYS[1], 'attempts', -1)
+if left <= 0 then
+    redis.call('HSET', KEYS[1], 'digest', '')
+    return 3
+end
+return 2
+"""
+
+_SCRIPT_RESULTS = {0: OtpResult.MISSING, 1: OtpResult.OK, 2: OtpResult.INVALID, 3: OtpResult.LOCKED}
+
+
+class RedisOtpStore(OtpStore):
+    """Shared store for several workers; Redis expires the keys"""
+
+    def __init__(self, url: str, secret: str, ttl: int = 300, max_attempts: int = 5, max_issues: int = 5, prefix: str = "otp:"):
+        super().__init__(secret, ttl, max_attempts, max_issues)
+        # Optional dependency, only needed when this backend is configured
+        from redis import asyncio as aioredis
+
+        self.prefix = prefix
+        self._redis = aioredis.from_url(url, decode_responses=True)
+        self._issue = self._redis.register_script(_ISSUE_SCRIPT)
+        self._verify = self._redis.register_script(_VERIFY_SCRIPT)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    async def issue(self, key: str, code: str) -> bool:
+        issued = await self._issue(
+            keys=[self._key(key)], args=[self.digest(code), self.max_attempts, self.max_issues, self.ttl]
+        )
+        return bool(int(issued))
+
+    async def verify_and_consume(self, key: str, code: str) -> OtpResult:
+        result = await self._verify(keys=[self._key(key)], args=[self.digest(code)])
+        return _SCRIPT_RESULTS[int(result)]
+
+    async def close(self) -> None:
+        # aclose() on redis>=5, close() before that
+        close = getattr(self._redis, "aclose", None) or self._redis.close
+        await close()
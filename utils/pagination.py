@@ -0,0 +1,97 @@
+# utils/pagination.py
+import base64
+import json
+from typing import Any, List, Optional
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode keyset values (e.g. [last_id]) into an opaque cursor"""
+    raw = json.dumps(values, separators=(",", ":"), default=str)
+    encoded = base64.urlsafe_b64encode(raw.encode()).decode()
+    return encoded.rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode an opaque cursor back into its keyset values"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def decode_id_cursor(cursor: str) -> int:
+    """Decode a cursor holding the id of the last row of the previous page"""
+    values = decode_cursor(cursor)
+    # bool is an int subclass; reject it along with every other shape
+    if len(values) != 1 or type(values[0]) is not int or values[0] <= 0:
+        raise ValueError("Invalid cursor")
+    return values[0]
+
+
+def keyset_page(query, sort_col, id_col, limit: int, descending: bool = True,
+                anchor_sort=None, last_id: Optional[int] = None, nullable: bool = True) -> List[Any]:
+    """Fetch up to ``limit + 1`` rows after the anchor row in (sort_col, id_col) order.
+
+    ``anchor_sort`` selects sort_col from the anchor row (the last row of the
+    previous page). The seek compares against it in SQL, so it sees the stored
+    value and not one round-tripped through the cursor: SQLite compares DATETIME
+    columns as text, and a bound datetime is formatted differently.
+
+    The rows after the anchor are read as consecutive sections (the anchor's
+    ties, then later sort values, then NULLs, which order last descending and
+    first ascending as on MySQL and SQLite) instead of one OR-ed condition, so
+    every query is a single range scan on the (sort_col, id_col) index.
+    """
+    anchor_value = None
+    anchor_null = False
+    if last_id is not None:
+        anchor = query.session.execute(anchor_sort).first()
+        if anchor is None:
+            raise ValueError("Invalid cursor")
+        anchor_null = anchor[0] is None
+        anchor_value = anchor_sort.scalar_subquery()
+
+    def before_id(section):
+        return section.filter(id_col < last_id if descending else id_col > last_id)
+
+    def by_id(section):
+        return section.order_by(id_col.desc() if descending else id_col.asc())
+
+    def values(after_anchor: bool):
+        section = query.filter(sort_col.isnot(None)) if nullable else query
+        if after_anchor:
+            section = section.filter(sort_col < anchor_value if descending else sort_col > anchor_value)
+        if descending:
+            return section.order_by(sort_col.desc(), id_col.desc())
+        return section.order_by(sort_col.asc(), id_col.asc())
+
+    def ties():
+        return by_id(before_id(query.filter(sort_col == anchor_value)))
+
+    def nulls(after_anchor: bool):
+        section = query.filter(sort_col.is_(None))
+        return by_id(before_id(section) if after_anchor else section)
+
+    if last_id is None:
+        sections = [lambda: values(False)]
+        if nullable:
+            sections.insert(len(sections) if descending else 0, lambda: nulls(False))
+    elif anchor_null:
+        sections = [lambda: nulls(True)]
+        if not descending:
+            sections.append(lambda: values(False))
+    else:
+        sections = [ties, lambda: values(True)]
+        if nullable and descending:
+            sections.append(lambda: nulls(False))
+
+    rows: List[Any] = []
+    for section in sections:
+        rows.extend(section().limit(limit + 1 - len(rows)).all())
+        if len(rows) > limit:
+            break
+    return rows
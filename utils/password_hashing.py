@@ -0,0 +1,87 @@
+# utils/password_hashing.py
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict
+import asyncio
+import threading
+import time
+
+
+class PasswordHashOverloaded(Exception):
+    """More hashing work is waiting than the pool accepts"""
+
+
+class PasswordHashPool:
+    """Runs bcrypt off the event loop on a fixed number of threads.
+
+    bcrypt releases the GIL while hashing, so ``workers`` threads give that much
+    real parallelism without starving the loop. At most ``max_pending`` calls
+    may be queued or running; beyond that callers get PasswordHashOverloaded
+    (a 503) instead of an ever-growing queue. Queue wait and run time are
+    recorded for the last ``window`` calls.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 64, window: int = 1024):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._queue_waits: Deque[float] = deque(maxlen=window)
+        self._run_times: Deque[float] = deque(maxlen=window)
+
+    def _timed(self, fn: Callable[..., Any], submitted: float, *args) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._queue_waits.append(started - submitted)
+                self._run_times.append(finished - started)
+
+    def _release(self, future: Future) -> None:
+        # Runs when the work itself ends, not when the awaiting request gives up:
+        # a cancelled request leaves bcrypt running, and it still counts as pending
+        with self._lock:
+            self._pending -= 1
+            if not future.cancelled():
+                self._completed += 1
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordHashOverloaded("Too many concurrent password operations")
+            self._pending += 1
+        try:
+            future = self._executor.submit(self._timed, fn, time.perf_counter(), *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._queue_waits)
+            runs = sorted(self._run_times)
+            pending, completed, rejected = self._pending, self._completed, self._rejected
+
+        def pct(values, p):
+            return round(values[min(len(values) - 1, int(p / 100 * len(values)))] * 1000, 2) if values else 0.0
+
+        return {
+            "workers": self.workers,
+            "pending": pending,
+            "completed": completed,
+            "rejected": rejected,
+            "queue_wait_ms": {"p50": pct(waits, 50), "p95": pct(waits, 95), "p99": pct(waits, 99)},
+            "run_ms": {"p50": pct(runs, 50), "p95": pct(runs, 95), "p99": pct(runs, 99)},
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,88 @@
+# utils/pdf.py
+import textwrap
+from typing import List, Tuple
+
+# A4 portrait in PDF points
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+
+# (text, font size, bold)
+PdfLine = Tuple[str, int, bool]
+
+
+def _escape(text: str) -> str:
+    """Escape a string for use inside a PDF literal string"""
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _wrap(lines: List[PdfLine]) -> List[PdfLine]:
+    """Wrap lines to the page width using an average Helvetica glyph width"""
+    wrapped: List[PdfLine] = []
+    usable = PAGE_WIDTH - 2 * MARGIN
+    for text, size, bold in lines:
+        width = max(10, int(usable / (size * 0.5)))
+        parts = textwrap.wrap(text, width=width) or [""]
+        wrapped.extend((part, size, bold) for part in parts)
+    return wrapped
+
+
+def _paginate(lines: List[PdfLine]) -> List[List[PdfLine]]:
+    pages: List[List[PdfLine]] = [[]]
+    y = PAGE_HEIGHT - MARGIN
+    for line in lines:
+        leading = int(line[1] * 1.5)
+        if y - leading < MARGIN:
+            pages.append([])
+            y = PAGE_HEIGHT - MARGIN
+        pages[-1].append(line)
+        y -= leading
+    return pages
+
+
+def _content_stream(lines: List[PdfLine]) -> bytes:
+    ops = ["BT"]
+    y = PAGE_HEIGHT - MARGIN
+    for text, size, bold in lines:
+        y -= int(size * 1.5)
+        font = "F2" if bold else "F1"
+        ops.append(f"/{font} {size} Tf 1 0 0 1 {MARGIN} {y} Tm ({_escape(text)}) Tj")
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def build_text_pdf(lines: List[PdfLine], title: str = "") -> bytes:
+    """Build a minimal multi-page text PDF using the standard Helvetica fonts"""
+    pages = _paginate(_wrap(lines))
+
+    objects: List[bytes] = []
+    # 1: catalog, 2: page tree, 3/4: fonts, 5: info, then (page, content) pairs
+    page_ids = [6 + 2 * i for i in range(len(pages))]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+    objects.append(f"<< /Title ({_escape(title)}) /Producer (HRMS API) >>".encode("latin-1"))
+
+    for pid, page in zip(page_ids, pages):
+        stream = _content_stream(page)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {pid + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref_at = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R /Info 5 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode()
+    return bytes(out)
@@ -0,0 +1,104 @@
+# utils/smtp_pool.py
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+from typing import Optional, Tuple
+import asyncio
+import queue
+import smtplib
+import time
+
+
+class SMTPConnectionPool:
+    """Reusable authenticated SMTP connections, driven from a dedicated thread pool.
+
+    smtplib is blocking, so sends run on ``size`` worker threads; each worker
+    borrows an idle connection (or opens one: connect, STARTTLS, login) and
+    returns it afterwards. Connections idle for longer than ``idle_timeout``
+    seconds are closed instead of reused.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        size: int = 4,
+        idle_timeout: float = 60,
+        timeout: float = 30,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="smtp")
+        # Most recently used first, so surplus connections age out
+        self._idle: "queue.LifoQueue[Tuple[smtplib.SMTP, float]]" = queue.LifoQueue()
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password or "")
+        except Exception:
+            self._close(server)
+            raise
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _acquire(self) -> smtplib.SMTP:
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - last_used < self.idle_timeout:
+                return server
+            self._close(server)
+
+    def _release(self, server: smtplib.SMTP) -> None:
+        self._idle.put((server, time.monotonic()))
+
+    def _send_sync(self, msg: Message) -> None:
+        server = self._acquire()
+        try:
+            server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # The server dropped a pooled connection; retry once on a fresh one
+            self._close(server)
+            server = self._connect()
+            try:
+                server.send_message(msg)
+            except Exception:
+                self._close(server)
+                raise
+        except Exception:
+            self._close(server)
+            raise
+        self._release(server)
+
+    async def send(self, msg: Message) -> None:
+        """Send a message without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._send_sync, msg)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)